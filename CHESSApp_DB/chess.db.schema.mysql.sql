@@ -94,9 +94,11 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`transcript` (
   `start` INT UNSIGNED NOT NULL,
   `end` INT UNSIGNED NOT NULL,
   `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `chain_hash` CHAR(32) NULL COMMENT 'MD5 of sequence_id|strand|intron chain. Used to match transcripts with identical intron chains during ingestion',
   PRIMARY KEY (`tid`),
   UNIQUE INDEX `tid_UNIQUE` (`tid` ASC) VISIBLE,
   INDEX `fk_Transcript_sequenceID_idx` (`sequence_id` ASC) VISIBLE,
+  INDEX `chain_hash_idx` (`chain_hash` ASC, `start` ASC) VISIBLE,
   CONSTRAINT `fk_Transcript_sequenceID`
     FOREIGN KEY (`sequence_id`)
     REFERENCES `CHESS_DB`.`sequence_id` (`sequence_id`)
@@ -157,6 +159,8 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`source_version_assembly` (
   `assembly_id` INT UNSIGNED NOT NULL,
   `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   `information` TEXT NULL,
+  `load_status` ENUM('loading', 'complete') NOT NULL DEFAULT 'complete' COMMENT 'Annotations loaded with chunked commits stay hidden from the public views until the load is complete',
+  `sequence_version` INT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Incremented every time the annotation is loaded; versions the cached transcript sequences',
   PRIMARY KEY (`sva_id`),
   INDEX `assembly_id_idx` (`assembly_id` ASC) VISIBLE,
   UNIQUE INDEX `sva_id_UNIQUE` (`sva_id` ASC) VISIBLE,
@@ -206,6 +210,7 @@ DROP TABLE IF EXISTS `CHESS_DB`.`data_type` ;
 CREATE TABLE IF NOT EXISTS `CHESS_DB`.`data_type` (
   `data_type` VARCHAR(45) NOT NULL,
   `description` TEXT NULL,
+  `is_numeric` TINYINT(1) NOT NULL DEFAULT 0 COMMENT 'Values of datasets of this type are numbers and are stored in transcript_data.value_num',
   PRIMARY KEY (`data_type`),
   UNIQUE INDEX `data_type_UNIQUE` (`data_type` ASC) VISIBLE)
 ENGINE = InnoDB;
@@ -283,8 +288,10 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`transcript_data` (
   `transcript_id` VARCHAR(512) NOT NULL,
   `dataset_id` INT UNSIGNED NOT NULL,
   `data` MEDIUMTEXT NOT NULL,
+  `value_num` DOUBLE NULL COMMENT 'data as a number for datasets of numeric data types, NULL otherwise',
   PRIMARY KEY (`td_id`),
   INDEX `dataset_id_idx` (`dataset_id` ASC) VISIBLE,
+  INDEX `dataset_value_idx` (`dataset_id` ASC, `value_num` ASC) VISIBLE,
   UNIQUE INDEX `td_id_UNIQUE` (`td_id` ASC) VISIBLE,
   INDEX `fk_transcriptData_txDBXREF_idx` (`tid` ASC, `sva_id` ASC, `transcript_id` ASC) VISIBLE,
   CONSTRAINT `dataset_id`
@@ -477,6 +484,7 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`source_file` (
   `nomenclature` VARCHAR(45) NOT NULL,
   `filetype` VARCHAR(45) NOT NULL,
   `description` TEXT NULL,
+  `built_from` VARCHAR(45) NULL COMMENT 'Nomenclature of the files this one is generated from on first request (see SourceFileCache); NULL for files built at ingest',
   UNIQUE INDEX `file_path_UNIQUE` (`file_path` ASC) VISIBLE,
   PRIMARY KEY (`file_path`, `sva_id`),
   INDEX `nomenclature_idx` (`assembly_id` ASC, `nomenclature` ASC) VISIBLE,
@@ -502,9 +510,13 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`genome_file` (
   `genome_file_id` INT UNSIGNED NOT NULL AUTO_INCREMENT,
   `assembly_id` INT UNSIGNED NOT NULL,
   `nomenclature` VARCHAR(45) NOT NULL,
-  `file_path` VARCHAR(512) NOT NULL,
+  `file_path` VARCHAR(512) NOT NULL COMMENT 'FASTA files are stored by content (<sha256>.fasta), so several records may share a file',
+  `content_hash` CHAR(64) NULL COMMENT 'SHA-256 of the FASTA file',
+  `file_size` BIGINT UNSIGNED NULL,
+  `file_nomenclature` VARCHAR(45) NULL COMMENT 'Nomenclature of the sequence names inside the file when it is shared with that nomenclature (virtual nomenclature); NULL if the file uses the names of this nomenclature',
   PRIMARY KEY (`genome_file_id`),
-  UNIQUE INDEX `file_path_UNIQUE` (`file_path` ASC) VISIBLE,
+  INDEX `file_path_idx` (`file_path` ASC) VISIBLE,
+  INDEX `content_hash_idx` (`content_hash` ASC) VISIBLE,
   INDEX `fk_GenomeFile_assembly_idx` (`assembly_id` ASC) VISIBLE,
   UNIQUE INDEX `nomenclature_UNIQUE` (`assembly_id` ASC, `nomenclature` ASC) VISIBLE,
   CONSTRAINT `fk_GenomeFile_assembly`
@@ -559,6 +571,90 @@ CREATE TABLE IF NOT EXISTS `CHESS_DB`.`database_configuration` (
   UNIQUE INDEX `data_dir_UNIQUE` (`data_dir` ASC))
 ENGINE = InnoDB;
 
+
+-- -----------------------------------------------------
+-- Table `CHESS_DB`.`id_sequence`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `CHESS_DB`.`id_sequence` ;
+
+CREATE TABLE IF NOT EXISTS `CHESS_DB`.`id_sequence` (
+  `name` VARCHAR(45) NOT NULL,
+  `next_id` INT UNSIGNED NOT NULL,
+  PRIMARY KEY (`name`))
+ENGINE = InnoDB
+COMMENT = 'Next free primary key per table. Used by bulk ingestion to reserve blocks of identifiers (gid, tid, iid) ahead of multi-row inserts.';
+
+
+-- -----------------------------------------------------
+-- Table `CHESS_DB`.`job`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `CHESS_DB`.`job` ;
+
+CREATE TABLE IF NOT EXISTS `CHESS_DB`.`job` (
+  `job_id` INT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `job_type` VARCHAR(45) NOT NULL,
+  `status` ENUM('queued', 'running', 'completed', 'failed', 'cancelled') NOT NULL DEFAULT 'queued',
+  `stage` VARCHAR(255) NULL,
+  `percent_complete` FLOAT NOT NULL DEFAULT 0,
+  `rows_written` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  `parameters` JSON NOT NULL,
+  `result` JSON NULL,
+  `message` TEXT NULL,
+  `cancel_requested` TINYINT NOT NULL DEFAULT 0,
+  `worker` VARCHAR(255) NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `started_at` TIMESTAMP NULL,
+  `finished_at` TIMESTAMP NULL,
+  PRIMARY KEY (`job_id`),
+  INDEX `status_idx` (`status` ASC, `job_id` ASC) VISIBLE)
+ENGINE = InnoDB
+COMMENT = 'Queue of background ingestion jobs (annotation, FASTA and dataset uploads) processed by worker.py.';
+
+
+-- -----------------------------------------------------
+-- Table `CHESS_DB`.`ingestion_checkpoint`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `CHESS_DB`.`ingestion_checkpoint` ;
+
+CREATE TABLE IF NOT EXISTS `CHESS_DB`.`ingestion_checkpoint` (
+  `sva_id` INT UNSIGNED NOT NULL,
+  `upload_hash` CHAR(64) NOT NULL COMMENT 'SHA-256 of the normalized annotation file being loaded',
+  `file_path` VARCHAR(512) NOT NULL COMMENT 'Normalized annotation file kept until the load completes',
+  `transcripts_done` INT UNSIGNED NOT NULL DEFAULT 0,
+  `status` ENUM('running', 'failed', 'complete') NOT NULL DEFAULT 'running',
+  `parameters` JSON NOT NULL COMMENT 'Confirmation parameters needed to resume the load',
+  `message` TEXT NULL,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sva_id`, `upload_hash`),
+  CONSTRAINT `fk_ingestion_checkpoint_sva_id`
+    FOREIGN KEY (`sva_id`)
+    REFERENCES `CHESS_DB`.`source_version_assembly` (`sva_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+COMMENT = 'Progress of annotation loads committed in chunks. A failed or cancelled load resumes after transcripts_done transcripts.';
+
+
+-- -----------------------------------------------------
+-- Table `CHESS_DB`.`chunked_upload`
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `CHESS_DB`.`chunked_upload` ;
+
+CREATE TABLE IF NOT EXISTS `CHESS_DB`.`chunked_upload` (
+  `upload_id` CHAR(32) NOT NULL,
+  `file_name` VARCHAR(255) NOT NULL,
+  `file_path` VARCHAR(512) NOT NULL COMMENT 'Chunks are written in place into this file (relative to the data directory)',
+  `total_size` BIGINT UNSIGNED NOT NULL,
+  `received_bytes` BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Length of the contiguous prefix written so far; the next chunk starts here',
+  `expected_sha256` CHAR(64) NULL COMMENT 'SHA-256 of the whole file announced by the client, checked when the upload is finalized',
+  `status` ENUM('uploading', 'complete', 'aborted', 'failed') NOT NULL DEFAULT 'uploading',
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`upload_id`),
+  INDEX `status_idx` (`status` ASC, `last_updated` ASC) VISIBLE)
+ENGINE = InnoDB
+COMMENT = 'Resumable uploads of large FASTA and annotation files sent in chunks to the admin API.';
+
 USE `CHESS_DB` ;
 
 -- -----------------------------------------------------
@@ -610,7 +706,7 @@ SELECT
     sf.description as file_description
 FROM `source_version` sv
 JOIN `source` s ON sv.source_id = s.source_id
-JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id
+JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id AND sva.load_status = 'complete'
 JOIN `assembly` a ON sva.assembly_id = a.assembly_id
 JOIN `organism` o ON a.taxonomy_id = o.taxonomy_id
 LEFT JOIN `source_file` sf ON sva.sva_id = sf.sva_id AND sva.assembly_id = sf.assembly_id
@@ -658,7 +754,7 @@ SELECT
     COALESCE(transcript_types.types, '') as transcript_types
 FROM `source` s
 LEFT JOIN `source_version` sv ON s.source_id = sv.source_id
-LEFT JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id
+LEFT JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id AND sva.load_status = 'complete'
 LEFT JOIN `assembly` a ON sva.assembly_id = a.assembly_id
 LEFT JOIN `organism` o ON a.taxonomy_id = o.taxonomy_id
 LEFT JOIN `source_file` sf ON sva.sva_id = sf.sva_id AND sva.assembly_id = sf.assembly_id
@@ -701,6 +797,7 @@ LEFT JOIN `tx_dbxref` txd ON sva.sva_id = txd.sva_id
 LEFT JOIN `transcript` t ON txd.tid = t.tid
 
 WHERE txd.sva_id IS NOT NULL  -- Only include sources that have transcripts
+  AND sva.load_status = 'complete'
 
 GROUP BY 
     sva.sva_id,
@@ -721,6 +818,7 @@ FROM `source_version_assembly` sva
 LEFT JOIN `gene` g ON sva.sva_id = g.sva_id
 
 WHERE g.sva_id IS NOT NULL  -- Only include sources that have genes
+  AND sva.load_status = 'complete'
 
 GROUP BY 
     sva.sva_id,
@@ -732,6 +830,11 @@ ORDER BY
     type_value;
 USE `CHESS_DB`;
 
+-- Bulk-load mode: while the session variable @chess_bulk_load is set (annotation ingestion), the per-row
+-- triggers on transcript, tx_dbxref and tx_attribute do nothing and BulkLoadReconciler
+-- (CHESSApp_back/db/methods/BulkLoadReconciler.py) applies coordinate validation, transcript start/end
+-- widening and last_updated bumps once per batch.
+
 DELIMITER $$
 
 USE `CHESS_DB`$$
@@ -745,29 +848,31 @@ BEGIN
     -- Checks that start < end
     DECLARE sequence_count INT;
     DECLARE sequence_length INT;
-    
-    SELECT COUNT(*) INTO sequence_count
-    FROM sequence_id
-    WHERE sequence_id = NEW.sequence_id;
-    
-    IF sequence_count = 0 THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
-    END IF;
-    
-    IF sequence_count > 0 THEN
-        SELECT length INTO sequence_length
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        SELECT COUNT(*) INTO sequence_count
         FROM sequence_id
         WHERE sequence_id = NEW.sequence_id;
+    
+        IF sequence_count = 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
+        END IF;
+    
+        IF sequence_count > 0 THEN
+            SELECT length INTO sequence_length
+            FROM sequence_id
+            WHERE sequence_id = NEW.sequence_id;
         
-        IF NEW.start >= NEW.end THEN
-			SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'start >= end';
-		END IF;
+            IF NEW.start >= NEW.end THEN
+    			SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'start >= end';
+    		END IF;
         
-        IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
-            SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
+                SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            END IF;
         END IF;
     END IF;
 END$$
@@ -779,9 +884,12 @@ USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_ai_sources_last_updated` AFTER INSERT ON `transcript` FOR EACH ROW
 BEGIN
 	-- 'propagates lastUpdated to the Source through dbxref'
-    UPDATE source_version
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    END IF;
 END$$
 
 
@@ -796,29 +904,31 @@ BEGIN
     -- Checks that start < end
     DECLARE sequence_count INT;
     DECLARE sequence_length INT;
-    
-    SELECT COUNT(*) INTO sequence_count
-    FROM sequence_id
-    WHERE sequence_id = NEW.sequence_id;
-    
-    IF sequence_count = 0 THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
-    END IF;
-    
-    IF sequence_count > 0 THEN
-        SELECT length INTO sequence_length
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        SELECT COUNT(*) INTO sequence_count
         FROM sequence_id
         WHERE sequence_id = NEW.sequence_id;
+    
+        IF sequence_count = 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
+        END IF;
+    
+        IF sequence_count > 0 THEN
+            SELECT length INTO sequence_length
+            FROM sequence_id
+            WHERE sequence_id = NEW.sequence_id;
         
-        IF NEW.start >= NEW.end THEN
-			SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'start >= end';
-		END IF;
+            IF NEW.start >= NEW.end THEN
+    			SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'start >= end';
+    		END IF;
         
-        IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
-            SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
+                SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            END IF;
         END IF;
     END IF;
 END$$
@@ -830,9 +940,12 @@ USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`update_sources_last_updated_after_update_in_Transcript` AFTER UPDATE ON `transcript` FOR EACH ROW
 BEGIN
 	-- 'propagates lastUpdated to the Source through dbxref'
-    UPDATE source_version
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    END IF;
 END$$
 
 
@@ -854,10 +967,13 @@ USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_dbxref_setEnds_AFTER_INSERT` AFTER INSERT ON `tx_dbxref` FOR EACH ROW
 BEGIN
 	-- updates record for the tid in Transcripts to extend towards the farthest 3' and 5' ends
-    UPDATE transcript
-    SET start = LEAST(NEW.start, (SELECT * FROM (SELECT start FROM transcript WHERE tid = NEW.tid) as transcript_start)),
-        end = GREATEST(NEW.end, (SELECT * FROM (SELECT end FROM transcript WHERE tid = NEW.tid) as transcript_end))
-    WHERE tid = NEW.tid;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE transcript
+        SET start = LEAST(NEW.start, (SELECT * FROM (SELECT start FROM transcript WHERE tid = NEW.tid) as transcript_start)),
+            end = GREATEST(NEW.end, (SELECT * FROM (SELECT end FROM transcript WHERE tid = NEW.tid) as transcript_end))
+        WHERE tid = NEW.tid;
+    END IF;
 END$$
 
 
@@ -868,9 +984,12 @@ CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_dbxref_update_source_versio
 AFTER INSERT ON `tx_dbxref` FOR EACH ROW
 BEGIN
     -- Force update to trigger the cascade to parent source
-    UPDATE source_version_assembly
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE sva_id = NEW.sva_id;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version_assembly
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sva_id = NEW.sva_id;
+    END IF;
 END$$
 
 
@@ -882,22 +1001,25 @@ BEGIN
 	-- updates record for the tid in Transcripts to extend towards the farthest 3' and 5' ends
     DECLARE min_start INT;
     DECLARE max_end INT;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
 
-    SELECT MAX(end) INTO max_end
-    FROM tx_dbxref
-    WHERE tid = NEW.tid;
+        SELECT MAX(end) INTO max_end
+        FROM tx_dbxref
+        WHERE tid = NEW.tid;
     
-    SELECT MIN(start) INTO min_start
-    FROM tx_dbxref
-    WHERE tid = NEW.tid;
+        SELECT MIN(start) INTO min_start
+        FROM tx_dbxref
+        WHERE tid = NEW.tid;
 
-    UPDATE transcript
-    SET end = max_end
-    WHERE tid = NEW.tid;
+        UPDATE transcript
+        SET end = max_end
+        WHERE tid = NEW.tid;
     
-    UPDATE transcript
-    SET start = min_start
-    WHERE tid = NEW.tid;
+        UPDATE transcript
+        SET start = min_start
+        WHERE tid = NEW.tid;
+    END IF;
 END$$
 
 
@@ -907,9 +1029,12 @@ USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_dbxref_update_source_version_assembly_AFTER_UPDATE` AFTER UPDATE ON `tx_dbxref` FOR EACH ROW
 BEGIN
     -- Force update to trigger the cascade to parent source
-    UPDATE source_version_assembly
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE sva_id = NEW.sva_id;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version_assembly
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sva_id = NEW.sva_id;
+    END IF;
 END$$
 
 
@@ -918,9 +1043,12 @@ DROP TRIGGER IF EXISTS `CHESS_DB`.`tx_attribute_AI` $$
 USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_attribute_AI` AFTER INSERT ON `tx_attribute` FOR EACH ROW
 BEGIN
-	UPDATE transcript
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE tid = NEW.tid;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+    	UPDATE transcript
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE tid = NEW.tid;
+    END IF;
 END$$
 
 
@@ -929,9 +1057,12 @@ DROP TRIGGER IF EXISTS `CHESS_DB`.`tx_attribute_AU` $$
 USE `CHESS_DB`$$
 CREATE DEFINER = CURRENT_USER TRIGGER `CHESS_DB`.`tx_attribute_AU` AFTER UPDATE ON `tx_attribute` FOR EACH ROW
 BEGIN
-    UPDATE transcript
-    SET last_updated = CURRENT_TIMESTAMP
-    WHERE tid = NEW.tid;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE transcript
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE tid = NEW.tid;
+    END IF;
 END$$
 
 
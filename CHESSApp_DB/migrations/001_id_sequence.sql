@@ -0,0 +1,10 @@
+-- Adds the id_sequence table used by bulk ingestion to reserve blocks of primary keys.
+-- Apply to databases created from a schema prior to this change:
+--   mysql -u chess_admin -p CHESS_DB < 001_id_sequence.sql
+
+CREATE TABLE IF NOT EXISTS `id_sequence` (
+  `name` VARCHAR(45) NOT NULL,
+  `next_id` INT UNSIGNED NOT NULL,
+  PRIMARY KEY (`name`))
+ENGINE = InnoDB
+COMMENT = 'Next free primary key per table. Used by bulk ingestion to reserve blocks of identifiers (gid, tid, iid) ahead of multi-row inserts.';
@@ -0,0 +1,21 @@
+-- Adds the job table backing the background job queue (see CHESSApp_back/worker.py).
+
+CREATE TABLE IF NOT EXISTS `job` (
+  `job_id` INT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `job_type` VARCHAR(45) NOT NULL,
+  `status` ENUM('queued', 'running', 'completed', 'failed', 'cancelled') NOT NULL DEFAULT 'queued',
+  `stage` VARCHAR(255) NULL,
+  `percent_complete` FLOAT NOT NULL DEFAULT 0,
+  `rows_written` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  `parameters` JSON NOT NULL,
+  `result` JSON NULL,
+  `message` TEXT NULL,
+  `cancel_requested` TINYINT NOT NULL DEFAULT 0,
+  `worker` VARCHAR(255) NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `started_at` TIMESTAMP NULL,
+  `finished_at` TIMESTAMP NULL,
+  PRIMARY KEY (`job_id`),
+  INDEX `status_idx` (`status` ASC, `job_id` ASC) VISIBLE)
+ENGINE = InnoDB
+COMMENT = 'Queue of background ingestion jobs (annotation, FASTA and dataset uploads) processed by worker.py.';
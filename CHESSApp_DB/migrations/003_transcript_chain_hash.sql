@@ -0,0 +1,22 @@
+-- Adds the intron-chain signature used to match transcripts during ingestion
+-- and computes it for existing transcripts.
+-- The signature must match intron_chain_signature() in CHESSApp_back/db/methods/ChainMatcher.py:
+--   MD5("sequence_id|strand|start-end,start-end,...") with introns in ascending order
+
+ALTER TABLE `transcript`
+  ADD COLUMN `chain_hash` CHAR(32) NULL COMMENT 'MD5 of sequence_id|strand|intron chain. Used to match transcripts with identical intron chains during ingestion',
+  ADD INDEX `chain_hash_idx` (`chain_hash` ASC, `start` ASC);
+
+SET SESSION group_concat_max_len = 16777216;
+
+UPDATE `transcript` t
+LEFT JOIN (
+    SELECT ti.tid,
+           GROUP_CONCAT(CONCAT(i.start, '-', i.end) ORDER BY i.start, i.end SEPARATOR ',') AS chain
+    FROM `transcript_intron` ti
+    JOIN `intron` i ON i.iid = ti.iid
+    GROUP BY ti.tid
+) c ON c.tid = t.tid
+SET t.chain_hash = MD5(CONCAT(t.sequence_id, '|', CAST(t.strand AS UNSIGNED), '|', COALESCE(c.chain, ''))),
+    t.last_updated = t.last_updated
+WHERE t.chain_hash IS NULL;
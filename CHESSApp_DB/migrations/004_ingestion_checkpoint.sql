@@ -0,0 +1,162 @@
+-- Adds chunked, resumable annotation loads:
+-- source_version_assembly.load_status hides partially loaded annotations from the public views
+-- and ingestion_checkpoint records how far a load has progressed.
+
+ALTER TABLE `source_version_assembly`
+  ADD COLUMN `load_status` ENUM('loading', 'complete') NOT NULL DEFAULT 'complete' COMMENT 'Annotations loaded with chunked commits stay hidden from the public views until the load is complete' AFTER `information`;
+
+CREATE TABLE IF NOT EXISTS `ingestion_checkpoint` (
+  `sva_id` INT UNSIGNED NOT NULL,
+  `upload_hash` CHAR(64) NOT NULL COMMENT 'SHA-256 of the normalized annotation file being loaded',
+  `file_path` VARCHAR(512) NOT NULL COMMENT 'Normalized annotation file kept until the load completes',
+  `transcripts_done` INT UNSIGNED NOT NULL DEFAULT 0,
+  `status` ENUM('running', 'failed', 'complete') NOT NULL DEFAULT 'running',
+  `parameters` JSON NOT NULL COMMENT 'Confirmation parameters needed to resume the load',
+  `message` TEXT NULL,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sva_id`, `upload_hash`),
+  CONSTRAINT `fk_ingestion_checkpoint_sva_id`
+    FOREIGN KEY (`sva_id`)
+    REFERENCES `source_version_assembly` (`sva_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+COMMENT = 'Progress of annotation loads committed in chunks. A failed or cancelled load resumes after transcripts_done transcripts.';
+
+CREATE  OR REPLACE VIEW `latest_source_versions` AS
+SELECT 
+    sv.sv_id,
+    s.name as source_name,
+    sv.version_name,
+    s.information,
+    s.link,
+    sv.last_updated,
+    sv.version_rank,
+    sv.source_id,
+    s.citation,
+    -- Assembly information
+    sva.sva_id,
+    sva.assembly_id,
+    a.assembly_name,
+    a.information as assembly_information,
+    -- Organism information
+    o.taxonomy_id,
+    o.scientific_name,
+    o.common_name,
+    o.information as organism_information,
+    -- File information (including new filetype)
+    sf.file_path,
+    sf.nomenclature,
+    sf.filetype,
+    sf.description as file_description
+FROM `source_version` sv
+JOIN `source` s ON sv.source_id = s.source_id
+JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id AND sva.load_status = 'complete'
+JOIN `assembly` a ON sva.assembly_id = a.assembly_id
+JOIN `organism` o ON a.taxonomy_id = o.taxonomy_id
+LEFT JOIN `source_file` sf ON sva.sva_id = sf.sva_id AND sva.assembly_id = sf.assembly_id
+WHERE sv.version_rank = (
+    SELECT MAX(sv2.version_rank) 
+    FROM `source_version` sv2 
+    WHERE sv2.source_id = sv.source_id
+);
+
+CREATE  OR REPLACE VIEW `all_source_versions` AS
+SELECT 
+    s.source_id,
+    s.name as source_name,
+    s.information,
+    s.link,
+    s.citation,
+    sv.sv_id,
+    sv.version_name,
+    COALESCE(sv.last_updated, s.last_updated) as last_updated,
+    sv.version_rank,
+    -- Assembly information
+    sva.sva_id,
+    sva.assembly_id,
+    a.assembly_name,
+    a.information as assembly_information,
+    -- Organism information
+    o.taxonomy_id,
+    o.scientific_name,
+    o.common_name,
+    o.information as organism_information,
+    -- File information (including new filetype)
+    sf.file_path,
+    sf.nomenclature,
+    sf.filetype,
+    sf.description as file_description,
+    -- Feature types (aggregated and sorted)
+    COALESCE(gene_types.types, '') as gene_types,
+    COALESCE(transcript_types.types, '') as transcript_types
+FROM `source` s
+LEFT JOIN `source_version` sv ON s.source_id = sv.source_id
+LEFT JOIN `source_version_assembly` sva ON sv.sv_id = sva.sv_id AND sva.load_status = 'complete'
+LEFT JOIN `assembly` a ON sva.assembly_id = a.assembly_id
+LEFT JOIN `organism` o ON a.taxonomy_id = o.taxonomy_id
+LEFT JOIN `source_file` sf ON sva.sva_id = sf.sva_id AND sva.assembly_id = sf.assembly_id
+-- Subquery for gene types
+LEFT JOIN (
+    SELECT 
+        sva_id,
+        GROUP_CONCAT(DISTINCT type_value ORDER BY type_value SEPARATOR ',') as types
+    FROM `gene`
+    GROUP BY sva_id
+) gene_types ON sva.sva_id = gene_types.sva_id
+-- Subquery for transcript types
+LEFT JOIN (
+    SELECT 
+        sva_id,
+        GROUP_CONCAT(DISTINCT type_value ORDER BY type_value SEPARATOR ',') as types
+    FROM `tx_dbxref`
+    GROUP BY sva_id
+) transcript_types ON sva.sva_id = transcript_types.sva_id
+ORDER BY s.name, sv.version_name, a.assembly_name, sf.file_path;
+
+CREATE OR REPLACE VIEW `source_type_counts_view` AS
+SELECT 
+    -- Source and assembly identification
+    sva.sva_id,
+    
+    -- Feature type and counts
+    'transcript' as feature_type,
+    COALESCE(txd.type_value, 'unknown') as type_value,
+    COUNT(DISTINCT t.tid) as count
+    
+FROM `source_version_assembly` sva
+LEFT JOIN `tx_dbxref` txd ON sva.sva_id = txd.sva_id
+LEFT JOIN `transcript` t ON txd.tid = t.tid
+
+WHERE txd.sva_id IS NOT NULL  -- Only include sources that have transcripts
+  AND sva.load_status = 'complete'
+
+GROUP BY 
+    sva.sva_id,
+    txd.type_value
+
+UNION ALL
+
+SELECT 
+    -- Source and assembly identification  
+    sva.sva_id,
+    
+    -- Feature type and counts
+    'gene' as feature_type,
+    COALESCE(g.type_value, 'unknown') as type_value,
+    COUNT(DISTINCT g.gid) as count
+    
+FROM `source_version_assembly` sva
+LEFT JOIN `gene` g ON sva.sva_id = g.sva_id
+
+WHERE g.sva_id IS NOT NULL  -- Only include sources that have genes
+  AND sva.load_status = 'complete'
+
+GROUP BY 
+    sva.sva_id,
+    g.type_value
+
+ORDER BY 
+    sva_id,
+    feature_type,
+    type_value;
@@ -0,0 +1,195 @@
+-- Adds a bulk-load mode to the per-row triggers on transcript, tx_dbxref and tx_attribute.
+-- While the session variable @chess_bulk_load is set (annotation ingestion), the triggers do nothing and
+-- BulkLoadReconciler in CHESSApp_back/db/methods/BulkLoadReconciler.py applies coordinate validation,
+-- transcript start/end widening and last_updated bumps once per batch.
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS `transcript_checkCoordinates_BEFORE_INSERT` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `transcript_checkCoordinates_BEFORE_INSERT` BEFORE INSERT ON `transcript` FOR EACH ROW
+BEGIN
+	-- Verifies validity of coordinates
+    -- Check that sequenceID is valid for the given assembly
+    -- Checks that coordinates are within bounds for that sequence
+    -- Checks that start < end
+    DECLARE sequence_count INT;
+    DECLARE sequence_length INT;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        SELECT COUNT(*) INTO sequence_count
+        FROM sequence_id
+        WHERE sequence_id = NEW.sequence_id;
+    
+        IF sequence_count = 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
+        END IF;
+    
+        IF sequence_count > 0 THEN
+            SELECT length INTO sequence_length
+            FROM sequence_id
+            WHERE sequence_id = NEW.sequence_id;
+        
+            IF NEW.start >= NEW.end THEN
+    			SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'start >= end';
+    		END IF;
+        
+            IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
+                SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            END IF;
+        END IF;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_ai_sources_last_updated` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_ai_sources_last_updated` AFTER INSERT ON `transcript` FOR EACH ROW
+BEGIN
+	-- 'propagates lastUpdated to the Source through dbxref'
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `transcript_checkCoordinates_BEFORE_UPDATE` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `transcript_checkCoordinates_BEFORE_UPDATE` BEFORE UPDATE ON `transcript` FOR EACH ROW
+BEGIN
+	-- Verifies validity of coordinates
+    -- Check that sequence_id is valid for the given assembly
+    -- Checks that coordinates are within bounds for that sequence
+    -- Checks that start < end
+    DECLARE sequence_count INT;
+    DECLARE sequence_length INT;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        SELECT COUNT(*) INTO sequence_count
+        FROM sequence_id
+        WHERE sequence_id = NEW.sequence_id;
+    
+        IF sequence_count = 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'sequence_id does not exist for the specified assembly';
+        END IF;
+    
+        IF sequence_count > 0 THEN
+            SELECT length INTO sequence_length
+            FROM sequence_id
+            WHERE sequence_id = NEW.sequence_id;
+        
+            IF NEW.start >= NEW.end THEN
+    			SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'start >= end';
+    		END IF;
+        
+            IF NEW.start < 1 OR NEW.start > sequence_length OR NEW.end > sequence_length THEN
+                SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'Start and/or end coordinates are out of bounds for the specified sequence';
+            END IF;
+        END IF;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `update_sources_last_updated_after_update_in_Transcript` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `update_sources_last_updated_after_update_in_Transcript` AFTER UPDATE ON `transcript` FOR EACH ROW
+BEGIN
+	-- 'propagates lastUpdated to the Source through dbxref'
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sv_id IN (SELECT sv_id FROM tx_dbxref WHERE tid = NEW.tid);
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_dbxref_setEnds_AFTER_INSERT` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_dbxref_setEnds_AFTER_INSERT` AFTER INSERT ON `tx_dbxref` FOR EACH ROW
+BEGIN
+	-- updates record for the tid in Transcripts to extend towards the farthest 3' and 5' ends
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE transcript
+        SET start = LEAST(NEW.start, (SELECT * FROM (SELECT start FROM transcript WHERE tid = NEW.tid) as transcript_start)),
+            end = GREATEST(NEW.end, (SELECT * FROM (SELECT end FROM transcript WHERE tid = NEW.tid) as transcript_end))
+        WHERE tid = NEW.tid;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_dbxref_update_source_version_assembly_AFTER_INSERT` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_dbxref_update_source_version_assembly_AFTER_INSERT` 
+AFTER INSERT ON `tx_dbxref` FOR EACH ROW
+BEGIN
+    -- Force update to trigger the cascade to parent source
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version_assembly
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sva_id = NEW.sva_id;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_dbxref_setEnds_AFTER_UPDATE` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_dbxref_setEnds_AFTER_UPDATE` AFTER UPDATE ON `tx_dbxref` FOR EACH ROW
+BEGIN
+	-- updates record for the tid in Transcripts to extend towards the farthest 3' and 5' ends
+    DECLARE min_start INT;
+    DECLARE max_end INT;
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+
+        SELECT MAX(end) INTO max_end
+        FROM tx_dbxref
+        WHERE tid = NEW.tid;
+    
+        SELECT MIN(start) INTO min_start
+        FROM tx_dbxref
+        WHERE tid = NEW.tid;
+
+        UPDATE transcript
+        SET end = max_end
+        WHERE tid = NEW.tid;
+    
+        UPDATE transcript
+        SET start = min_start
+        WHERE tid = NEW.tid;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_dbxref_update_source_version_assembly_AFTER_UPDATE` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_dbxref_update_source_version_assembly_AFTER_UPDATE` AFTER UPDATE ON `tx_dbxref` FOR EACH ROW
+BEGIN
+    -- Force update to trigger the cascade to parent source
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE source_version_assembly
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE sva_id = NEW.sva_id;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_attribute_AI` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_attribute_AI` AFTER INSERT ON `tx_attribute` FOR EACH ROW
+BEGIN
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+    	UPDATE transcript
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE tid = NEW.tid;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `tx_attribute_AU` $$
+CREATE DEFINER = CURRENT_USER TRIGGER `tx_attribute_AU` AFTER UPDATE ON `tx_attribute` FOR EACH ROW
+BEGIN
+    -- skipped in bulk-load mode
+    IF @chess_bulk_load IS NULL THEN
+        UPDATE transcript
+        SET last_updated = CURRENT_TIMESTAMP
+        WHERE tid = NEW.tid;
+    END IF;
+END$$
+
+DELIMITER ;
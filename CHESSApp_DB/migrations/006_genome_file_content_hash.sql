@@ -0,0 +1,11 @@
+-- Stores FASTA files by content: identical genomes registered under different assemblies or
+-- nomenclatures share one file, so file_path is no longer unique. Files are removed from disk
+-- once no genome_file record references them.
+
+ALTER TABLE `genome_file`
+  DROP INDEX `file_path_UNIQUE`,
+  MODIFY COLUMN `file_path` VARCHAR(512) NOT NULL COMMENT 'FASTA files are stored by content (<sha256>.fasta), so several records may share a file',
+  ADD COLUMN `content_hash` CHAR(64) NULL COMMENT 'SHA-256 of the FASTA file' AFTER `file_path`,
+  ADD COLUMN `file_size` BIGINT UNSIGNED NULL AFTER `content_hash`,
+  ADD INDEX `file_path_idx` (`file_path` ASC),
+  ADD INDEX `content_hash_idx` (`content_hash` ASC);
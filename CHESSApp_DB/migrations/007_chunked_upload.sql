@@ -0,0 +1,17 @@
+-- Adds the chunked_upload table backing resumable uploads of large FASTA and annotation files
+-- (POST /api/admin/uploads and the routes below it).
+
+CREATE TABLE IF NOT EXISTS `chunked_upload` (
+  `upload_id` CHAR(32) NOT NULL,
+  `file_name` VARCHAR(255) NOT NULL,
+  `file_path` VARCHAR(512) NOT NULL COMMENT 'Chunks are written in place into this file',
+  `total_size` BIGINT UNSIGNED NOT NULL,
+  `received_bytes` BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Length of the contiguous prefix written so far; the next chunk starts here',
+  `expected_sha256` CHAR(64) NULL COMMENT 'SHA-256 of the whole file announced by the client, checked when the upload is finalized',
+  `status` ENUM('uploading', 'complete', 'aborted') NOT NULL DEFAULT 'uploading',
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`upload_id`),
+  INDEX `status_idx` (`status` ASC, `last_updated` ASC) VISIBLE)
+ENGINE = InnoDB
+COMMENT = 'Resumable uploads of large FASTA and annotation files sent in chunks to the admin API.';
@@ -0,0 +1,7 @@
+-- Nomenclatures added from a TSV mapping no longer get a renamed copy of the genome. Their
+-- genome_file record points at the FASTA of the source nomenclature and file_nomenclature names
+-- the nomenclature used by the sequence headers in that file. Indexes and sequence lookups are
+-- translated through sequence_id_map.
+
+ALTER TABLE `genome_file`
+  ADD COLUMN `file_nomenclature` VARCHAR(45) NULL COMMENT 'Nomenclature of the sequence names inside the file when it is shared with that nomenclature (virtual nomenclature); NULL if the file uses the names of this nomenclature' AFTER `file_size`;
@@ -0,0 +1,6 @@
+-- Source files of an annotation are only built at ingest for the nomenclature it was uploaded in.
+-- Records of the other nomenclatures name that nomenclature in built_from; their files are
+-- generated from it on first request and kept in a size-bounded cache (see SourceFileCache).
+
+ALTER TABLE `source_file`
+  ADD COLUMN `built_from` VARCHAR(45) NULL COMMENT 'Nomenclature of the files this one is generated from on first request (see SourceFileCache); NULL for files built at ingest' AFTER `description`;
@@ -0,0 +1,15 @@
+-- Values of numeric data types (TPM, counts, ...) are also stored as numbers in transcript_data.value_num,
+-- so datasets can be filtered, sorted and summarized in SQL (top transcripts, value ranges, quantiles)
+-- and genes can be searched by their values. data keeps the value as it was uploaded.
+
+ALTER TABLE `data_type`
+  ADD COLUMN `is_numeric` TINYINT(1) NOT NULL DEFAULT 0 COMMENT 'Values of datasets of this type are numbers and are stored in transcript_data.value_num' AFTER `description`;
+
+ALTER TABLE `transcript_data`
+  ADD COLUMN `value_num` DOUBLE NULL COMMENT 'data as a number for datasets of numeric data types, NULL otherwise' AFTER `data`,
+  ADD INDEX `dataset_value_idx` (`dataset_id` ASC, `value_num` ASC);
+
+-- existing values that are numbers
+UPDATE `transcript_data`
+  SET `value_num` = CAST(TRIM(`data`) AS DOUBLE)
+  WHERE TRIM(`data`) REGEXP '^[-+]?([0-9]+\\.?[0-9]*|\\.[0-9]+)([eE][-+]?[0-9]+)?$';
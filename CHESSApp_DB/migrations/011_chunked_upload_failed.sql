@@ -0,0 +1,7 @@
+-- Uploads whose file could not be processed when they were finalized are marked failed: the file
+-- has been handed over and removed, so the upload cannot be finalized again.
+-- file_path is stored relative to the data directory from now on; existing absolute paths still resolve.
+
+ALTER TABLE `chunked_upload`
+  MODIFY COLUMN `file_path` VARCHAR(512) NOT NULL COMMENT 'Chunks are written in place into this file (relative to the data directory)',
+  MODIFY COLUMN `status` ENUM('uploading', 'complete', 'aborted', 'failed') NOT NULL DEFAULT 'uploading';
@@ -0,0 +1,5 @@
+-- Cached transcript sequences are versioned by a counter incremented every time an annotation is
+-- loaded, instead of last_updated, which only has one-second resolution.
+
+ALTER TABLE `source_version_assembly`
+  ADD COLUMN `sequence_version` INT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Incremented every time the annotation is loaded; versions the cached transcript sequences' AFTER `load_status`;
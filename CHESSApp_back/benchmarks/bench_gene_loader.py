@@ -0,0 +1,138 @@
+"""
+Benchmark of the gene detail loader behind /gene/<gid>.
+
+Compares the previous per-transcript path (get_exon_chain for exons and again
+for CDS, get_transcript_data_by_dataset per transcript) with the batched
+get_full_gene_data on the genes with the most transcripts, reporting the
+number of SQL statements and the latency of each. Both must return the same JSON.
+
+Needs the database configured through the CHESSDB_* environment variables.
+
+Usage (from CHESSApp_back):
+    python benchmarks/bench_gene_loader.py --genes 10
+    python benchmarks/bench_gene_loader.py --gid 12345 --gid 67890 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text, event
+from config import Config
+from db.db import db
+from db.methods.data.utils import cut
+from db.methods.data.queries import get_full_gene_data, get_exon_chain, get_transcript_data_by_dataset
+
+class QueryCounter:
+    """Counts the statements sent to the database while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+def legacy_full_gene_data(gid):
+    """The loader before batching: five queries per transcript"""
+    gene = db.session.execute(text("""
+        SELECT g.gid, g.sva_id, g.gene_id, g.name, g.type_value as gene_type
+        FROM gene g WHERE g.gid = :gid
+    """), {"gid": gid}).fetchone()
+    if not gene:
+        return {"success": False, "message": "Gene not found"}
+
+    transcripts = db.session.execute(text("""
+        SELECT DISTINCT t.tid, txd.transcript_id, txd.type_value as transcript_type, t.sequence_id, t.strand,
+               txd.start as transcript_start, txd.end as transcript_end, txd.cds_start, txd.cds_end
+        FROM tx_dbxref txd
+        JOIN transcript t ON txd.tid = t.tid
+        WHERE txd.gid = :gid AND txd.sva_id = :sva_id
+        ORDER BY txd.transcript_id
+    """), {"gid": gid, "sva_id": gene.sva_id}).fetchall()
+
+    gene_data = {"gid": gene.gid, "sva_id": gene.sva_id, "gene_id": gene.gene_id, "name": gene.name,
+                 "gene_type": gene.gene_type, "transcripts": []}
+    for transcript in transcripts:
+        transcript_data = {
+            "tid": transcript.tid,
+            "transcript_id": transcript.transcript_id,
+            "transcript_type": transcript.transcript_type,
+            "sequence_id": transcript.sequence_id,
+            "strand": bool(transcript.strand) if transcript.strand is not None else None,
+            "coordinates": {"start": transcript.transcript_start, "end": transcript.transcript_end}
+        }
+        transcript_data["exons"] = cut(get_exon_chain(transcript.tid), transcript.transcript_start, transcript.transcript_end)
+        if transcript.cds_start is not None and transcript.cds_end is not None:
+            transcript_data["cds"] = cut(get_exon_chain(transcript.tid), transcript.cds_start, transcript.cds_end)
+        else:
+            transcript_data["cds"] = []
+        transcript_data["datasets"] = get_transcript_data_by_dataset(transcript.tid)
+        gene_data["transcripts"].append(transcript_data)
+    return {"success": True, "data": gene_data}
+
+def largest_genes(limit):
+    """gids of the genes with the most transcripts"""
+    rows = db.session.execute(text("""
+        SELECT gid, COUNT(DISTINCT tid) AS transcript_count
+        FROM tx_dbxref
+        WHERE gid IS NOT NULL
+        GROUP BY sva_id, gid
+        ORDER BY transcript_count DESC
+        LIMIT :limit
+    """), {"limit": limit}).fetchall()
+    return [row.gid for row in rows]
+
+def run(loader, gid, counter, repeat):
+    """Best latency over repeat calls, and the statements issued by one call"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with counter:
+            start = time.perf_counter()
+            result = loader(gid)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, counter.count, best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the gene detail loader")
+    parser.add_argument("--genes", type=int, default=10, help="Benchmark the N genes with the most transcripts (default: 10)")
+    parser.add_argument("--gid", type=int, action="append", help="Benchmark this gene (may be repeated)")
+    parser.add_argument("--repeat", type=int, default=3, help="Calls per gene and loader, the best time is reported (default: 3)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        gids = args.gid or largest_genes(args.genes)
+        counter = QueryCounter(db.engine)
+
+        print(f"{'gid':>10} {'transcripts':>11} {'legacy queries':>15} {'legacy ms':>10} {'batched queries':>16} {'batched ms':>11} {'speedup':>8}")
+        legacy_total = batched_total = 0.0
+        for gid in gids:
+            legacy, legacy_queries, legacy_time = run(legacy_full_gene_data, gid, counter, args.repeat)
+            batched, batched_queries, batched_time = run(get_full_gene_data, gid, counter, args.repeat)
+            assert json.dumps(legacy, sort_keys=True, default=str) == json.dumps(batched, sort_keys=True, default=str), f"Results differ for gene {gid}"
+
+            transcripts = len(batched["data"]["transcripts"]) if batched["success"] else 0
+            legacy_total += legacy_time
+            batched_total += batched_time
+            print(f"{gid:>10} {transcripts:>11} {legacy_queries:>15} {legacy_time * 1000:>10.1f} {batched_queries:>16} {batched_time * 1000:>11.1f} {legacy_time / batched_time:>7.1f}x")
+
+        if gids:
+            print(f"Total: legacy {legacy_total * 1000:.1f} ms, batched {batched_total * 1000:.1f} ms ({legacy_total / batched_total:.1f}x)")
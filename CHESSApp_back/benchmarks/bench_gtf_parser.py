@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of GTF parsing for annotation ingestion.
+
+Compares the previous path (read_gffread_gtf + TX.from_strlist) with
+db.methods.GTFParser.read_transcripts on a synthetic gffread -T style file.
+
+Usage (from CHESSApp_back):
+    python benchmarks/bench_gtf_parser.py --transcripts 250000
+    python benchmarks/bench_gtf_parser.py --gtf /path/to/normalized.gtf
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.methods.TX import TX
+from db.methods.utils import read_gffread_gtf
+from db.methods.GTFParser import read_transcripts, parse_attributes
+
+def write_synthetic_gtf(fname, num_transcripts, seed=42):
+    """Write num_transcripts transcripts (1-12 exons, half coding) grouped by chromosome"""
+    rng = random.Random(seed)
+    chromosomes = [f"chr{i}" for i in range(1, 23)]
+    per_chromosome = num_transcripts // len(chromosomes) + 1
+    written = 0
+    with open(fname, "w") as outFP:
+        for seqid in chromosomes:
+            pos = 10000
+            for _ in range(per_chromosome):
+                if written >= num_transcripts:
+                    return
+                tid = f"TX{written:08d}"
+                gid = f"GENE{written // 3:08d}"
+                strand = rng.choice("+-")
+                exons = []
+                start = pos + rng.randint(100, 5000)
+                for _ in range(rng.randint(1, 12)):
+                    end = start + rng.randint(50, 400)
+                    exons.append((start, end))
+                    start = end + rng.randint(80, 3000)
+                pos = exons[0][0]
+
+                attrs = f'transcript_id "{tid}"; gene_id "{gid}"; gene_name "G{written // 3}"; gene_type "protein_coding"; transcript_type "protein_coding"; level "2";'
+                outFP.write("\t".join([seqid, "bench", "transcript", str(exons[0][0]), str(exons[-1][1]), ".", strand, ".", attrs]) + "\n")
+                exon_attrs = f'transcript_id "{tid}"; gene_id "{gid}";'
+                for exon in exons:
+                    outFP.write("\t".join([seqid, "bench", "exon", str(exon[0]), str(exon[1]), ".", strand, ".", exon_attrs]) + "\n")
+                if written % 2 == 0:
+                    for exon in exons:
+                        outFP.write("\t".join([seqid, "bench", "CDS", str(exon[0]), str(exon[1]), ".", strand, "0", exon_attrs]) + "\n")
+                written += 1
+
+def legacy_transcripts(fname):
+    for transcript_lines in read_gffread_gtf(fname):
+        transcript = TX()
+        transcript.from_strlist(transcript_lines)
+        yield transcript
+
+def run(label, transcripts):
+    start = time.perf_counter()
+    count = 0
+    exons = 0
+    for transcript in transcripts:
+        count += 1
+        exons += len(transcript.exons)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {count:>9} transcripts {exons:>10} exons {elapsed:8.2f}s {count / elapsed:>10.0f} tx/s")
+    return elapsed
+
+def check_equivalence(fname, limit=1000):
+    """Both paths must produce the same records (the new parser keeps coordinates as ints)"""
+    for old, new in zip(legacy_transcripts(fname), read_transcripts(fname)):
+        assert old.tid == new.tid and old.seqid == new.seqid and old.strand == new.strand
+        assert int(old.start) == new.start and int(old.end) == new.end
+        assert old.exons == new.exons and list(old.introns) == list(new.introns)
+        assert (old.cds_start, old.cds_end) == (new.cds_start, new.cds_end)
+        assert old.attributes == new.attributes
+        limit -= 1
+        if limit == 0:
+            break
+
+    quoted = parse_attributes('transcript_id "T1"; note "a; b c"; gene_id "G1";')
+    assert quoted == {"transcript_id": "T1", "note": "a; b c", "gene_id": "G1"}, quoted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GTF transcript parsing")
+    parser.add_argument("--transcripts", type=int, default=250000, help="Number of synthetic transcripts (default: 250000)")
+    parser.add_argument("--gtf", help="Use an existing gffread -T normalized GTF instead of a synthetic one")
+    args = parser.parse_args()
+
+    fname = args.gtf
+    tmp_fname = None
+    if fname is None:
+        fd, tmp_fname = tempfile.mkstemp(suffix=".gtf")
+        os.close(fd)
+        print(f"Writing {args.transcripts} synthetic transcripts to {tmp_fname}")
+        write_synthetic_gtf(tmp_fname, args.transcripts)
+        fname = tmp_fname
+
+    try:
+        check_equivalence(fname)
+        legacy = run("read_gffread_gtf+from_strlist", legacy_transcripts(fname))
+        new = run("GTFParser.read_transcripts", read_transcripts(fname))
+        print(f"Speedup: {legacy / new:.2f}x")
+    finally:
+        if tmp_fname is not None:
+            os.remove(tmp_fname)
@@ -30,8 +30,60 @@ class Config:
     else:
         SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{CHESSDB_USER}:{CHESSDB_PASS}@{CHESSDB_HOST}/{CHESSDB_NAME}"
 
+    # Bulk ingestion settings
+    BULK_INSERT_BATCH_SIZE = int(os.getenv("CHESS_BULK_BATCH_SIZE", "5000"))
+    # LOAD DATA LOCAL INFILE fast path (requires local_infile=1 on the MySQL server)
+    BULK_LOAD_DATA_INFILE = os.getenv("CHESS_LOAD_DATA_INFILE", "0") == "1"
+
+    # Commit annotation loads every N transcripts and record a resumable checkpoint (0 = single transaction)
+    INGEST_COMMIT_EVERY = int(os.getenv("CHESS_INGEST_COMMIT_EVERY", "0"))
+
+    # Pipelined ingestion: parse in a separate process and write on a background thread (experimental, off by default)
+    INGEST_PIPELINE = os.getenv("CHESS_INGEST_PIPELINE", "0") == "1"
+    # Batches that may wait between pipeline stages before the producer blocks
+    INGEST_QUEUE_SIZE = int(os.getenv("CHESS_INGEST_QUEUE_SIZE", "4"))
+
+    # Turn per-row triggers off during annotation loads and apply their changes per batch (off by default, requires migration 005)
+    INGEST_BULK_LOAD_MODE = os.getenv("CHESS_INGEST_BULK_LOAD_MODE", "0") == "1"
+
+    # Size limit of the cache of normalized annotations keyed by upload hash (least recently used entries are evicted)
+    UPLOAD_CACHE_MAX_BYTES = int(os.getenv("CHESS_UPLOAD_CACHE_MAX_BYTES", str(20 * 1024**3)))
+
+    # Build source files (GTF/GFF/tabix) of other nomenclatures on first request instead of at ingest (off by default,
+    # requires migration 009 and INSERT on the job table for the public database user, which queues the builds)
+    SOURCE_FILES_LAZY = os.getenv("CHESS_SOURCE_FILES_LAZY", "0") == "1"
+    # Size limit of source files built on request (least recently used ones are removed and rebuilt when needed)
+    SOURCE_FILE_CACHE_MAX_BYTES = int(os.getenv("CHESS_SOURCE_FILE_CACHE_MAX_BYTES", str(50 * 1024**3)))
+
+    # How uploaded genomes are stored: "plain" FASTA or "bgzf" (BGZF compressed, indexed with .fai and .gzi)
+    GENOME_STORAGE_FORMAT = os.getenv("CHESS_GENOME_STORAGE_FORMAT", "plain")
+
+    # Open genome FASTA readers kept per process for sequence extraction (least recently used ones are closed)
+    FASTA_HANDLE_POOL_SIZE = int(os.getenv("CHESS_FASTA_HANDLE_POOL_SIZE", "16"))
+    # Reader of uncompressed genomes: "pyfaidx" or "pysam" (BGZF compressed genomes are always read with pysam)
+    FASTA_READER_BACKEND = os.getenv("CHESS_FASTA_READER_BACKEND", "pyfaidx")
+
+    # Compressed transcript sequences (nucleotide, CDS, protein) kept in memory per process
+    SEQUENCE_CACHE_MAX_BYTES = int(os.getenv("CHESS_SEQUENCE_CACHE_MAX_BYTES", str(256 * 1024**2)))
+    # Also keep them under <data dir>/sequence_cache, shared between processes and restarts
+    SEQUENCE_CACHE_DISK = os.getenv("CHESS_SEQUENCE_CACHE_DISK", "0") == "1"
+    # Size limit of the sequences kept on disk (least recently used ones are removed)
+    SEQUENCE_CACHE_DISK_MAX_BYTES = int(os.getenv("CHESS_SEQUENCE_CACHE_DISK_MAX_BYTES", str(10 * 1024**3)))
+
+    # Largest chunk accepted by PUT /api/admin/uploads/<upload_id>; chunks are held in memory until their checksum is verified
+    UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("CHESS_UPLOAD_CHUNK_MAX_BYTES", str(64 * 1024**2)))
+    # Chunked uploads without activity for this many hours are removed
+    UPLOAD_EXPIRE_HOURS = int(os.getenv("CHESS_UPLOAD_EXPIRE_HOURS", "48"))
+
+    # Worker processes for loading an annotation, each handling a shard of chromosomes (1 = single process)
+    INGEST_SHARDS = int(os.getenv("CHESS_INGEST_SHARDS", "1"))
+
+    # Number of processes building source files (one per nomenclature) after an annotation is loaded
+    SOURCE_FILE_WORKERS = int(os.getenv("CHESS_SOURCE_FILE_WORKERS", "4"))
+
     # Flask-SQLAlchemy settings
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"local_infile": True}} if BULK_LOAD_DATA_INFILE else {}
 
     # CORS settings
     _cors_env = os.getenv('CORS_ALLOWED_ORIGINS', '')
@@ -1,6 +1,8 @@
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 import os
-from sqlalchemy import text
+from sqlalchemy import text, event
+from sqlalchemy.orm import Session
 
 # Initialize an instance of SQLAlchemy
 db = SQLAlchemy()
@@ -10,6 +12,9 @@ DATA_BASE_DIR = None
 FASTA_FILES_DIR = None
 SOURCE_FILES_DIR = None
 TEMP_FILES_DIR = None
+UPLOAD_CACHE_DIR = None
+DATASET_FILES_DIR = None
+SEQUENCE_CACHE_DIR = None
 
 def initialize_paths():
     """Initialize data directory paths from database configuration.
@@ -17,7 +22,7 @@ def initialize_paths():
     This function is safe to call even if the database configuration
     is not yet set up. It will simply leave paths as None.
     """
-    global DATA_BASE_DIR, FASTA_FILES_DIR, SOURCE_FILES_DIR, TEMP_FILES_DIR
+    global DATA_BASE_DIR, FASTA_FILES_DIR, SOURCE_FILES_DIR, TEMP_FILES_DIR, UPLOAD_CACHE_DIR, DATASET_FILES_DIR, SEQUENCE_CACHE_DIR
     
     try:
         res = db.session.execute(text("SELECT data_dir FROM database_configuration;")).fetchone()
@@ -35,6 +40,9 @@ def initialize_paths():
         FASTA_FILES_DIR = os.path.join(data_dir, 'fasta_files')
         SOURCE_FILES_DIR = os.path.join(data_dir, 'source_files')
         TEMP_FILES_DIR = os.path.join(data_dir, 'temp_files')
+        UPLOAD_CACHE_DIR = os.path.join(data_dir, 'upload_cache')
+        DATASET_FILES_DIR = os.path.join(data_dir, 'dataset_files')
+        SEQUENCE_CACHE_DIR = os.path.join(data_dir, 'sequence_cache')
         
         # Create directories
         ensure_data_directories()
@@ -43,6 +51,20 @@ def initialize_paths():
     except Exception as e:
         raise RuntimeError(f"Failed to load data directory configuration: {e}")
 
+def create_db_app(app_config):
+    """Create a minimal Flask app with database access for a helper process.
+
+    The process gets the database settings of the application that started it
+    (app_config) rather than building its own, and the data paths are read
+    from the database configuration like in the applications.
+    """
+    app = Flask(__name__)
+    app.config.update(app_config)
+    db.init_app(app)
+    with app.app_context():
+        initialize_paths()
+    return app
+
 def ensure_data_directories():
     """Create all data directories if they don't exist."""
     if DATA_BASE_DIR is None:
@@ -52,7 +74,10 @@ def ensure_data_directories():
         DATA_BASE_DIR,
         FASTA_FILES_DIR,
         SOURCE_FILES_DIR,
-        TEMP_FILES_DIR
+        TEMP_FILES_DIR,
+        UPLOAD_CACHE_DIR,
+        DATASET_FILES_DIR,
+        SEQUENCE_CACHE_DIR
     ]
     
     for directory in directories:
@@ -70,6 +95,18 @@ def get_temp_files_dir():
     """Get the temp files directory."""
     return TEMP_FILES_DIR
 
+def get_upload_cache_dir():
+    """Get the directory caching results derived from uploaded files."""
+    return UPLOAD_CACHE_DIR
+
+def get_dataset_files_dir():
+    """Get the directory holding reports produced while loading datasets."""
+    return DATASET_FILES_DIR
+
+def get_sequence_cache_dir():
+    """Get the directory shared by the transcript sequence caches of all processes."""
+    return SEQUENCE_CACHE_DIR
+
 def get_data_base_dir():
     """Get the base data directory."""
     return DATA_BASE_DIR
@@ -135,4 +172,37 @@ def to_absolute_path(relative_path: str) -> str:
     if os.path.isabs(relative_path):
         return relative_path
     
-    return os.path.join(DATA_BASE_DIR, relative_path)
\ No newline at end of file
+    return os.path.join(DATA_BASE_DIR, relative_path)
+
+# ============================================================================
+# FILES FOLLOWING A TRANSACTION
+# ============================================================================
+# Files created or removed together with database rows follow the outcome of
+# the transaction holding the rows, whoever commits or rolls it back (route,
+# job worker): removals wait for the commit, new files go on rollback.
+
+def remove_files_after_commit(file_paths):
+    """Remove files once the current transaction commits. They are kept if it rolls back."""
+    db.session.info.setdefault("remove_after_commit", []).extend(file_paths)
+
+def remove_files_on_rollback(file_paths):
+    """Remove files if the current transaction rolls back. They are kept once it commits."""
+    db.session.info.setdefault("remove_on_rollback", []).extend(file_paths)
+
+def _remove_files(file_paths):
+    for file_path in file_paths:
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            print(f"Warning: Could not remove file {file_path}: {str(e)}")
+
+@event.listens_for(Session, "after_commit")
+def _remove_files_after_commit(session):
+    session.info.pop("remove_on_rollback", None)
+    _remove_files(session.info.pop("remove_after_commit", []))
+
+@event.listens_for(Session, "after_rollback")
+def _remove_files_on_rollback(session):
+    session.info.pop("remove_after_commit", None)
+    _remove_files(session.info.pop("remove_on_rollback", []))
@@ -0,0 +1,92 @@
+from typing import Dict, List
+from sqlalchemy import text, bindparam
+from db.methods.BulkWriter import BulkWriter
+
+class BulkLoadReconciler:
+    """
+    Applies the work of the per-row triggers on transcript, tx_dbxref and tx_attribute once per batch.
+
+    While a BulkWriter is in bulk-load mode (see BulkWriter.begin_bulk_load) those triggers do nothing.
+    The reconciler is registered as the after_flush callback of these tables and runs set-based
+    statements on the written rows instead:
+
+    - transcript: coordinates are validated against sequence_id.length
+    - tx_dbxref: transcripts are widened to the farthest start/end of their dbxrefs (and validated again),
+      last_updated is bumped on the source version assemblies and the source versions referencing them
+    - tx_attribute: last_updated is bumped on the transcripts
+    """
+
+    def __init__(self, writer: BulkWriter):
+        self.writer = writer
+        self.stats = {"batches": 0, "statements": 0, "transcripts_widened": 0}
+
+    def _execute(self, statement, params: Dict):
+        self.stats["statements"] += 1
+        return self.writer.execute(statement, params)
+
+    def after_transcript_flush(self, rows: List[Dict], rowcount: int) -> None:
+        self.stats["batches"] += 1
+        self.validate_coordinates([row["tid"] for row in rows])
+
+    def after_dbxref_flush(self, rows: List[Dict], rowcount: int) -> None:
+        self.stats["batches"] += 1
+        tids = list(set(row["tid"] for row in rows))
+        sva_ids = list(set(row["sva_id"] for row in rows))
+
+        # same result as applying tx_dbxref_setEnds_AFTER_INSERT row by row
+        widened = self._execute(
+            text("""UPDATE transcript t
+                    JOIN (SELECT tid, MIN(start) AS start, MAX(end) AS end FROM tx_dbxref WHERE tid IN :tids GROUP BY tid) d ON d.tid = t.tid
+                    SET t.start = LEAST(t.start, d.start), t.end = GREATEST(t.end, d.end)
+                    WHERE d.start < t.start OR d.end > t.end""").bindparams(bindparam("tids", expanding=True)),
+            {"tids": tids}
+        ).rowcount
+        if widened:
+            self.stats["transcripts_widened"] += widened
+            self.validate_coordinates(tids)
+
+        self._execute(
+            text("UPDATE source_version_assembly SET last_updated = CURRENT_TIMESTAMP WHERE sva_id IN :sva_ids").bindparams(bindparam("sva_ids", expanding=True)),
+            {"sva_ids": sva_ids}
+        )
+        self._execute(
+            text("""UPDATE source_version sv
+                    JOIN (SELECT DISTINCT sva.sv_id FROM tx_dbxref d
+                          JOIN source_version_assembly sva ON sva.sva_id = d.sva_id
+                          WHERE d.tid IN :tids) x ON x.sv_id = sv.sv_id
+                    SET sv.last_updated = CURRENT_TIMESTAMP""").bindparams(bindparam("tids", expanding=True)),
+            {"tids": tids}
+        )
+
+    def after_attribute_flush(self, rows: List[Dict], rowcount: int) -> None:
+        self.stats["batches"] += 1
+        self._execute(
+            text("UPDATE transcript SET last_updated = CURRENT_TIMESTAMP WHERE tid IN :tids").bindparams(bindparam("tids", expanding=True)),
+            {"tids": list(set(row["tid"] for row in rows))}
+        )
+
+    def validate_coordinates(self, tids: List[int]) -> None:
+        """
+        Check the coordinates of transcripts the way transcript_checkCoordinates_BEFORE_INSERT does.
+
+        Raises:
+            Exception: For the first transcript that fails a check
+        """
+        invalid = self._execute(
+            text("""SELECT t.tid, t.sequence_id, t.start, t.end, s.length FROM transcript t
+                    LEFT JOIN sequence_id s ON s.sequence_id = t.sequence_id
+                    WHERE t.tid IN :tids
+                      AND (s.sequence_id IS NULL OR t.start >= t.end OR t.start < 1 OR t.start > s.length OR t.end > s.length)
+                    LIMIT 1""").bindparams(bindparam("tids", expanding=True)),
+            {"tids": tids}
+        ).fetchone()
+        if invalid is None:
+            return
+
+        if invalid.length is None:
+            message = "sequence_id does not exist for the specified assembly"
+        elif invalid.start >= invalid.end:
+            message = "start >= end"
+        else:
+            message = "Start and/or end coordinates are out of bounds for the specified sequence"
+        raise Exception(f"{message} (transcript {invalid.tid}: sequence_id {invalid.sequence_id}, {invalid.start}-{invalid.end})")
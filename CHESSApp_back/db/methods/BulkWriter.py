@@ -0,0 +1,297 @@
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+from config import Config
+from db.db import db
+from db.methods.TempFileManager import get_temp_file_manager
+
+def reserve_ids(table: str, column: str, count: int) -> int:
+    """
+    Reserve a contiguous block of primary key values for a table.
+
+    The reservation is recorded in the id_sequence table through a separate
+    autocommit connection, so concurrent ingestions never receive overlapping
+    blocks and the ingestion transaction itself does not hold a lock on the
+    counter. Reserved values that end up unused (e.g. on rollback) are simply
+    skipped, the same way AUTO_INCREMENT leaves gaps.
+
+    Every insert into gene, transcript, intron and sequence_id takes its key from
+    here (BulkWriter.next_id); these tables must not be written through
+    AUTO_INCREMENT while blocks are in use. Blocks always start past both the
+    largest committed key and the table's AUTO_INCREMENT counter, which also
+    covers keys handed out to transactions that have not committed yet.
+
+    Args:
+        table: Table the identifiers are reserved for
+        column: Primary key column of the table
+        count: Number of identifiers to reserve
+
+    Returns:
+        The first identifier of the reserved block
+    """
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # non-locking read of the current maximum keeps the counter ahead of any
+        # rows that were inserted through AUTO_INCREMENT
+        floor_id = conn.execute(text(f"SELECT COALESCE(MAX(`{column}`), 0) + 1 FROM `{table}`")).scalar()
+        # uncommitted AUTO_INCREMENT rows are not visible to MAX() but have moved the counter;
+        # information_schema caches the counter unless the stats expiry is disabled, which is
+        # restored before the pooled connection is reused
+        conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+        try:
+            auto_increment = conn.execute(
+                text("SELECT AUTO_INCREMENT FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"),
+                {"table": table}
+            ).scalar()
+        finally:
+            conn.execute(text("SET SESSION information_schema_stats_expiry = DEFAULT"))
+        floor_id = max(int(floor_id), int(auto_increment or 0))
+        conn.execute(
+            text("""INSERT INTO id_sequence (name, next_id) VALUES (:name, :floor_id)
+                    ON DUPLICATE KEY UPDATE next_id = GREATEST(next_id, VALUES(next_id))"""),
+            {"name": table, "floor_id": floor_id}
+        )
+        conn.execute(
+            text("UPDATE id_sequence SET next_id = LAST_INSERT_ID(next_id) + :count WHERE name = :name"),
+            {"name": table, "count": count}
+        )
+        return int(conn.execute(text("SELECT LAST_INSERT_ID()")).scalar())
+
+class BulkWriter:
+    """
+    Buffers rows per table and writes them to the database in large batches.
+
+    Tables are flushed in the order they were registered, so rows referencing
+    other buffered tables (e.g. tx_dbxref -> transcript) are always written after
+    their parents. All writes go through db.session and therefore stay inside the
+    caller's transaction - committing or rolling back is left to the caller.
+
+    When LOAD DATA LOCAL INFILE is enabled (Config.BULK_LOAD_DATA_INFILE), tables
+    without an ON DUPLICATE KEY clause are loaded from a temporary TSV file instead
+    of multi-row INSERT statements.
+
+    In bulk-load mode (begin_bulk_load) the session variable @chess_bulk_load is set,
+    which turns the per-row triggers on transcript, tx_dbxref and tx_attribute into
+    no-ops. The variable is cleared before every commit and when the writer is closed
+    or shut down, so the pooled connection never keeps it.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, use_load_data: Optional[bool] = None, id_block_size: Optional[int] = None):
+        self.batch_size = batch_size or Config.BULK_INSERT_BATCH_SIZE
+        self.use_load_data = Config.BULK_LOAD_DATA_INFILE if use_load_data is None else use_load_data
+        self.id_block_size = id_block_size or self.batch_size
+        self._tables: Dict[str, Dict] = {}
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._id_blocks: Dict[str, List[int]] = {}
+        self._remaps: Dict[str, Dict[str, Dict]] = {}
+        self.bulk_load = False
+
+    def add_table(self, table: str, columns: List[str], on_duplicate: Optional[str] = None, casts: Optional[Dict[str, str]] = None,
+                  after_flush: Optional[Callable[[List[Dict], int], None]] = None) -> None:
+        """
+        Register a table with the writer.
+
+        Args:
+            table: Table name
+            columns: Columns provided for every row
+            on_duplicate: Optional ON DUPLICATE KEY UPDATE assignments
+            casts: Optional SQL expressions applied to columns when using LOAD DATA,
+                   with {} standing for the raw value (e.g. BIT columns)
+            after_flush: Optional callback receiving the written rows and the affected row count,
+                         called before any later table is flushed
+        """
+        column_list = ", ".join(f"`{col}`" for col in columns)
+        placeholders = ", ".join(f":{col}" for col in columns)
+        query = f"INSERT INTO `{table}` ({column_list}) VALUES ({placeholders})"
+        if on_duplicate:
+            query += f" ON DUPLICATE KEY UPDATE {on_duplicate}"
+
+        self._tables[table] = {
+            "columns": columns,
+            "statement": text(query),
+            "on_duplicate": on_duplicate,
+            "casts": casts or {},
+            "after_flush": after_flush
+        }
+        self._buffers[table] = []
+        self._stats[table] = {"rows": 0, "batches": 0, "seconds": 0.0}
+
+    def add(self, table: str, row: Dict) -> None:
+        """Queue a row for insertion, flushing all buffers once the batch is full."""
+        if table in self._remaps:
+            self._apply_remaps(table, row)
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def execute(self, statement, params=None):
+        """Run a statement in the writer's transaction (used by collaborators reading back written rows)."""
+        return db.session.execute(statement, params)
+
+    def drain(self) -> None:
+        """Wait until every flushed row has been written. Writes are synchronous here."""
+        pass
+
+    def begin_bulk_load(self) -> None:
+        """Disable the per-row triggers for this connection. Their work has to be done by the caller (see BulkLoadReconciler)."""
+        self.execute(text("SET @chess_bulk_load = 1"))
+        self.bulk_load = True
+
+    def end_bulk_load(self) -> None:
+        """Re-enable the per-row triggers for this connection."""
+        if self.bulk_load:
+            self.execute(text("SET @chess_bulk_load = NULL"))
+            self.bulk_load = False
+
+    def commit(self) -> None:
+        """Write all buffered rows and commit the transaction."""
+        self.flush()
+        self.drain()
+        bulk_load = self.bulk_load
+        self.end_bulk_load()
+        db.session.commit()
+        # the next transaction may run on another pooled connection
+        if bulk_load:
+            self.begin_bulk_load()
+
+    def shutdown(self) -> Dict:
+        """
+        Release resources without writing buffered rows (used when ingestion fails).
+
+        Returns:
+            Dictionary with success status and message
+        """
+        return self._reset_bulk_load()
+
+    def _reset_bulk_load(self) -> Dict:
+        try:
+            self.end_bulk_load()
+            return {"success": True, "message": "Bulk-load mode cleared"}
+        except Exception as e:
+            # a connection that may still skip the triggers must not go back to the pool
+            try:
+                db.session.connection().invalidate()
+            except Exception:
+                pass
+            self.bulk_load = False
+            return {"success": False, "message": f"Failed to clear bulk-load mode: {str(e)}"}
+
+    def next_id(self, table: str, column: str) -> int:
+        """Get the next reserved primary key value for a table."""
+        block = self._id_blocks.get(table)
+        if block is None or block[0] >= block[1]:
+            first_id = reserve_ids(table, column, self.id_block_size)
+            block = [first_id, first_id + self.id_block_size]
+            self._id_blocks[table] = block
+        next_id = block[0]
+        block[0] += 1
+        return next_id
+
+    def has_pending(self, table: str) -> bool:
+        """Check whether a table has rows waiting to be written."""
+        return bool(self._buffers[table])
+
+    def remap_pending(self, table: str, column: str, mapping: Dict) -> None:
+        """
+        Replace values of a column in rows that have not been written yet.
+        The mapping is kept and also applied to rows added later.
+        """
+        if not mapping:
+            return
+        self._remaps.setdefault(table, {}).setdefault(column, {}).update(mapping)
+        for row in self._buffers[table]:
+            self._apply_remaps(table, row)
+
+    def _apply_remaps(self, table: str, row: Dict) -> None:
+        for column, mapping in self._remaps[table].items():
+            value = mapping.get(row[column])
+            if value is not None:
+                row[column] = value
+
+    def flush(self) -> None:
+        """Write all buffered rows, parents first."""
+        for table in self._tables:
+            self._flush_table(table)
+
+    def _flush_table(self, table: str) -> int:
+        rows = self._buffers[table]
+        if not rows:
+            return 0
+
+        self._buffers[table] = []
+        return self._write_rows(table, rows)
+
+    def _write_rows(self, table: str, rows: List[Dict]) -> int:
+        spec = self._tables[table]
+        start = time.perf_counter()
+        if self.use_load_data and not spec["on_duplicate"]:
+            rowcount = self._load_data(table, spec, rows)
+        else:
+            rowcount = self.execute(spec["statement"], rows).rowcount
+
+        stats = self._stats[table]
+        stats["rows"] += len(rows)
+        stats["batches"] += 1
+        stats["seconds"] += time.perf_counter() - start
+        if spec["after_flush"] is not None:
+            spec["after_flush"](rows, rowcount)
+        return rowcount
+
+    def _load_data(self, table: str, spec: Dict, rows: List[Dict]) -> int:
+        """Load rows through LOAD DATA LOCAL INFILE from a temporary TSV file."""
+        temp_manager = get_temp_file_manager()
+        with temp_manager.managed_temp_file(name=f"bulk_{table}") as tsv_path:
+            try:
+                with open(tsv_path, "w") as out_fp:
+                    for row in rows:
+                        out_fp.write("\t".join(self._tsv_value(row[col]) for col in spec["columns"]) + "\n")
+
+                variables = ", ".join(f"@v{i}" for i in range(len(spec["columns"])))
+                assignments = ", ".join(
+                    f"`{col}` = {spec['casts'].get(col, '{}').format(f'@v{i}')}"
+                    for i, col in enumerate(spec["columns"])
+                )
+                result = self.execute(
+                    text(f"""LOAD DATA LOCAL INFILE :tsv_path INTO TABLE `{table}`
+                             CHARACTER SET utf8mb4
+                             FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                             LINES TERMINATED BY '\\n'
+                             ({variables}) SET {assignments}"""),
+                    {"tsv_path": tsv_path}
+                )
+                return result.rowcount
+            finally:
+                temp_manager.cleanup_file(tsv_path)
+
+    @staticmethod
+    def _tsv_value(value) -> str:
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+    @property
+    def rows_written(self) -> int:
+        """Total number of rows written so far across all tables."""
+        return sum(table_stats["rows"] for table_stats in self._stats.values())
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-table write statistics including rows/sec."""
+        stats = {}
+        for table, table_stats in self._stats.items():
+            seconds = table_stats["seconds"]
+            stats[table] = {
+                "rows": table_stats["rows"],
+                "batches": table_stats["batches"],
+                "seconds": round(seconds, 3),
+                "rows_per_sec": round(table_stats["rows"] / seconds, 1) if seconds > 0 else None
+            }
+        return stats
+
+    def close(self) -> Dict[str, Dict]:
+        """Flush remaining rows and return the per-table throughput (see get_stats)."""
+        self.flush()
+        self.end_bulk_load()
+        return self.get_stats()
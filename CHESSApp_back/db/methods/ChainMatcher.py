@@ -0,0 +1,130 @@
+import hashlib
+from typing import Callable, Dict, List, Optional, Set
+from intervaltree import IntervalTree
+from sqlalchemy import text
+from db.db import db
+
+# minimum overlap between two single-exon transcripts, as a fraction of the longer one
+SINGLE_EXON_MIN_OVERLAP = 0.8
+# number of ambiguous matches listed in the ingestion statistics
+MAX_REPORTED_AMBIGUOUS = 100
+
+def intron_chain_signature(sequence_id: int, strand, introns: List) -> str:
+    """
+    Compute the intron-chain signature stored in transcript.chain_hash.
+
+    The signature is the MD5 of "sequence_id|strand|start-end,start-end,..." with introns
+    in ascending order. Single-exon transcripts have an empty intron list and therefore share
+    one signature per sequence and strand. The same value is computed in SQL by
+    CHESSApp_DB/migrations/003_transcript_chain_hash.sql.
+
+    Args:
+        sequence_id: Sequence ID
+        strand: Strand (1 for +, 0 for -)
+        introns: List of (start, end) intron coordinates
+
+    Returns:
+        Hex encoded MD5 digest
+    """
+    chain = ",".join(f"{start}-{end}" for start, end in sorted((int(s), int(e)) for s, e in introns))
+    return hashlib.md5(f"{int(sequence_id)}|{int(strand)}|{chain}".encode()).hexdigest()
+
+class IntronChainMatcher:
+    """
+    Finds transcripts already in the database with the same intron chain as a new transcript.
+
+    Multi-exon transcripts match when sequence, strand and the full intron chain are identical
+    (gffcompare class "="). Single-exon transcripts match when they are on the same sequence and
+    strand and overlap by at least SINGLE_EXON_MIN_OVERLAP of the longer transcript.
+
+    Transcripts are preloaded one chromosome at a time. Only transcripts that existed before the
+    current ingestion are considered, so duplicates within one upload are kept as separate records.
+    When several existing transcripts match, the record is linked to one of them only: the lowest
+    tid for an intron chain, the largest overlap (then the lowest tid) for a single exon. Such
+    ambiguous matches are counted in stats["multi_matched"] and the first MAX_REPORTED_AMBIGUOUS
+    are listed in stats["ambiguous"].
+    """
+
+    def __init__(self, execute: Optional[Callable] = None):
+        # statements run through the ingestion's writer when given, so reads share its connection
+        self._execute = execute or db.session.execute
+        self._sequence_id = None
+        self._chains: Dict[str, List[int]] = {}
+        self._single_exon: Dict[int, IntervalTree] = {}
+        self._new_tids: Set[int] = set()
+        self.stats = {"matched": 0, "multi_matched": 0, "single_exon_matched": 0, "unmatched": 0, "ambiguous": []}
+
+    def match(self, sequence_id: int, strand, start: int, end: int, introns: List, transcript_id: Optional[str] = None) -> Optional[int]:
+        """
+        Get the tid of the existing transcript matching a transcript.
+
+        Args:
+            sequence_id: Sequence ID
+            strand: Strand (1 for +, 0 for -)
+            start: Transcript start
+            end: Transcript end
+            introns: List of (start, end) intron coordinates
+            transcript_id: Optional transcript ID of the record, reported for ambiguous matches
+
+        Returns:
+            The matching tid, or None if the transcript is new
+        """
+        if sequence_id != self._sequence_id:
+            self._load(sequence_id)
+
+        if introns:
+            tids = sorted(self._chains.get(intron_chain_signature(sequence_id, strand, introns), []))
+        else:
+            tids = self._match_single_exon(int(strand), int(start), int(end))
+
+        if not tids:
+            self.stats["unmatched"] += 1
+            return None
+
+        self.stats["matched"] += 1
+        if len(tids) > 1:
+            self.stats["multi_matched"] += 1
+            if len(self.stats["ambiguous"]) < MAX_REPORTED_AMBIGUOUS:
+                self.stats["ambiguous"].append({"transcript_id": transcript_id, "tids": tids, "linked_tid": tids[0]})
+        if not introns:
+            self.stats["single_exon_matched"] += 1
+        return tids[0]
+
+    def register_new(self, tid: int) -> None:
+        """Record a transcript created by the current ingestion so it is never matched."""
+        self._new_tids.add(tid)
+
+    def _match_single_exon(self, strand: int, start: int, end: int) -> List[int]:
+        """tids of the matching single-exon transcripts, largest overlap first"""
+        tree = self._single_exon.get(strand)
+        if tree is None:
+            return []
+
+        matches = []
+        for interval in tree.overlap(start, end + 1):
+            overlap = min(end, interval.end - 1) - max(start, interval.begin) + 1
+            longest = max(end - start + 1, interval.end - interval.begin)
+            if overlap >= SINGLE_EXON_MIN_OVERLAP * longest:
+                matches.append((-overlap, interval.data))
+        return [tid for _, tid in sorted(matches)]
+
+    def _load(self, sequence_id: int) -> None:
+        """Replace the in-memory signatures with those of another chromosome."""
+        single_exon_hashes = {intron_chain_signature(sequence_id, strand, []): strand for strand in (0, 1)}
+
+        rows = self._execute(
+            text("SELECT tid, chain_hash, start, end FROM transcript WHERE sequence_id = :sequence_id AND chain_hash IS NOT NULL"),
+            {"sequence_id": sequence_id}
+        )
+        self._chains = {}
+        self._single_exon = {0: IntervalTree(), 1: IntervalTree()}
+        for row in rows:
+            if row.tid in self._new_tids:
+                continue
+            strand = single_exon_hashes.get(row.chain_hash)
+            if strand is not None:
+                self._single_exon[strand].addi(row.start, row.end + 1, row.tid)
+            else:
+                self._chains.setdefault(row.chain_hash, []).append(row.tid)
+
+        self._sequence_id = sequence_id
@@ -0,0 +1,220 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import pysam
+from pyfaidx import Fasta
+
+from config import Config
+
+class ReaderClosed(Exception):
+    """Raised by FastaReader.fetch when the pool closed the reader after handing it out."""
+
+class FastaReader:
+    """
+    An open indexed genome FASTA file.
+
+    fetch() takes 1-based inclusive coordinates, like the database. Reads are serialized per file
+    since pysam.FastaFile handles must not be used by several threads at once. BGZF compressed
+    genomes (.fasta.gz) are always read with pysam, through their .fai and .gzi indexes.
+    A reader closed by its pool is never reopened; a new one is obtained from the pool.
+    """
+
+    def __init__(self, file_path: str, backend: str = "pyfaidx"):
+        self.file_path = file_path
+        self.backend = "pysam" if file_path.endswith(".gz") else backend
+        stat = os.stat(file_path)
+        # identifies the file that was opened; a replaced or rewritten file gets a new reader
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.lock = threading.Lock()
+        self.handle = self._open()
+
+    def _open(self):
+        if self.backend == "pysam":
+            return pysam.FastaFile(self.file_path)
+        return Fasta(self.file_path, rebuild=False)
+
+    def fetch(self, sequence_name: str, start: int, end: int) -> str:
+        with self.lock:
+            if self.handle is None:
+                # evicted or invalidated by the pool while a request still held it
+                raise ReaderClosed(f"Reader of {self.file_path} was closed")
+            if self.backend == "pysam":
+                return self.handle.fetch(sequence_name, start - 1, end)
+            return str(self.handle[sequence_name][start - 1:end])
+
+    def close(self) -> None:
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+class FastaHandlePool:
+    """
+    Process-wide pool of open genome FASTA readers keyed by (assembly_id, nomenclature).
+
+    Opening a genome parses its .fai, which for assemblies with thousands of sequences costs more
+    than the sequence lookups of a request, so readers are kept open and shared between threads.
+    At most max_handles readers are kept; the least recently used one is closed when another is opened.
+
+    A reader is reopened when the genome_file record of its key points to another file or the file
+    changed on disk (e.g. after compress_genome_files), so processes that did not make the change see
+    it too. invalidate() drops readers right away after changes made in this process only: readers of
+    other processes (web workers, job workers) are checked when they are next requested, and until then
+    keep the replaced file open, so its disk space is only freed once every process has moved on.
+    Forked processes start with an empty pool.
+
+    Readers are handed out by get() and read through fetch(), which gets a new reader from the
+    pool when the one it holds is closed meanwhile; every open file is owned by the pool.
+    """
+
+    def __init__(self, max_handles: Optional[int] = None, backend: Optional[str] = None):
+        self.max_handles = max_handles or Config.FASTA_HANDLE_POOL_SIZE
+        self.backend = backend or Config.FASTA_READER_BACKEND
+        self._readers: "OrderedDict[Tuple[int, str], FastaReader]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_fork(self) -> None:
+        # handles inherited from the parent process share its file offsets and must not be used
+        if self._pid != os.getpid():
+            self._readers = OrderedDict()
+            self._pid = os.getpid()
+
+    def get(self, assembly_id: int, nomenclature: str, file_path: str) -> FastaReader:
+        """
+        Get the reader of a genome, opening it if needed.
+
+        Args:
+            assembly_id: Assembly of the genome
+            nomenclature: Nomenclature whose genome_file record gave file_path
+            file_path: Absolute path of the FASTA file currently recorded for the key
+        """
+        key = (assembly_id, nomenclature)
+        stale = None
+        with self._lock:
+            self._check_fork()
+            reader = self._readers.get(key)
+            if reader is not None:
+                if reader.file_path == file_path and reader.signature == self._signature(file_path):
+                    self._readers.move_to_end(key)
+                    self.hits += 1
+                    return reader
+                stale = self._readers.pop(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        if stale is not None:
+            stale.close()
+
+        # opened outside the pool lock, parsing a large .fai must not block lookups of other genomes
+        reader = FastaReader(file_path, self.backend)
+
+        evicted = []
+        with self._lock:
+            existing = self._readers.get(key)
+            if existing is not None and existing.file_path == file_path and existing.signature == reader.signature:
+                # another thread opened the same file meanwhile
+                self._readers.move_to_end(key)
+                evicted.append(reader)
+                reader = existing
+            else:
+                if existing is not None:
+                    evicted.append(existing)
+                self._readers[key] = reader
+                self._readers.move_to_end(key)
+                while len(self._readers) > self.max_handles:
+                    _, oldest = self._readers.popitem(last=False)
+                    evicted.append(oldest)
+                    self.evictions += 1
+
+        for old_reader in evicted:
+            old_reader.close()
+        return reader
+
+    def fetch(self, assembly_id: int, nomenclature: str, file_path: str, sequence_name: str,
+              regions: List[Tuple[int, int]]) -> List[str]:
+        """
+        Read regions of a sequence (1-based inclusive coordinates) from the reader of a genome.
+
+        Args:
+            assembly_id: Assembly of the genome
+            nomenclature: Nomenclature whose genome_file record gave file_path
+            file_path: Absolute path of the FASTA file currently recorded for the key
+            sequence_name: Sequence to read from
+            regions: (start, end) pairs
+
+        Returns:
+            The sequence of each region
+        """
+        reader = self.get(assembly_id, nomenclature, file_path)
+        sequences = []
+        for start, end in regions:
+            try:
+                sequences.append(reader.fetch(sequence_name, start, end))
+            except ReaderClosed:
+                # closed by another thread after it was handed out; the pool opens or shares a new one
+                reader = self.get(assembly_id, nomenclature, file_path)
+                sequences.append(reader.fetch(sequence_name, start, end))
+        return sequences
+
+    @staticmethod
+    def _signature(file_path: str):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def invalidate(self, assembly_id: Optional[int] = None, nomenclature: Optional[str] = None) -> int:
+        """
+        Close the readers of an assembly (all nomenclatures unless one is given), or all readers.
+
+        Returns:
+            Number of readers closed
+        """
+        with self._lock:
+            self._check_fork()
+            keys = [
+                key for key in self._readers
+                if (assembly_id is None or key[0] == assembly_id) and (nomenclature is None or key[1] == nomenclature)
+            ]
+            readers = [self._readers.pop(key) for key in keys]
+            self.invalidations += len(readers)
+
+        for reader in readers:
+            reader.close()
+        return len(readers)
+
+    def get_stats(self, include_open: bool = True) -> Dict:
+        """Hit, miss, eviction and invalidation counters of this process's pool, with the open files unless include_open is False."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "pid": os.getpid(),
+                "backend": self.backend,
+                "open_handles": len(self._readers),
+                "max_handles": self.max_handles,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+            if include_open:
+                stats["open"] = [
+                    {"assembly_id": key[0], "nomenclature": key[1], "file_path": reader.file_path, "backend": reader.backend}
+                    for key, reader in self._readers.items()
+                ]
+            return stats
+
+# Global instance
+fasta_handle_pool = FastaHandlePool()
+
+def get_fasta_handle_pool() -> FastaHandlePool:
+    """Get the global FASTA reader pool of this process."""
+    return fasta_handle_pool
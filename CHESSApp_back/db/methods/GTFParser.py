@@ -0,0 +1,118 @@
+import os
+from typing import Iterator, List
+
+from db.methods.TX import TX
+# the attribute tokenizer lives in utils so that TX and the upload analysis share it
+from db.methods.utils import parse_attributes
+
+def _new_transcript(lcs: List[str], transcript_type_key: str, gene_type_key: str, gene_name_key: str) -> TX:
+    """Build a transcript from its "transcript" record. Exons and CDS are added by the caller."""
+    transcript = TX()
+    transcript.transcript_type_key = transcript_type_key
+    transcript.gene_type_key = gene_type_key
+    transcript.gene_name_key = gene_name_key
+
+    # quotes are escaped the same way as in TX.from_strlist
+    attributes = {k: v.replace("'", "\\'").replace("\"", "\\\"") for k, v in parse_attributes(lcs[8]).items()}
+    transcript.attributes = attributes
+    transcript.set_required_attributes(attributes)
+
+    transcript.seqid = lcs[0]
+    transcript.strand = 1 if lcs[6] == "+" else 0
+    transcript.start = int(lcs[3])
+    transcript.end = int(lcs[4])
+    transcript.score = 0 if lcs[5] == "." else lcs[5]
+
+    transcript.tid = attributes["transcript_id"]
+    transcript.gene_id = attributes["gene_id"]
+    transcript.transcript_type_value = attributes[transcript_type_key]
+    transcript.gene_type_value = attributes[gene_type_key]
+    transcript.gene_name_value = attributes[gene_name_key]
+    return transcript
+
+def _finish_transcript(transcript: TX) -> TX:
+    """Derive the intron chain once all exons of a transcript have been read."""
+    exons = transcript.exons
+    transcript.introns = [(exons[i - 1][1], exons[i][0]) for i in range(1, len(exons))]
+    return transcript
+
+def read_transcripts(infname: str,
+                     transcript_type_key: str = "transcript_type",
+                     gene_type_key: str = "gene_type",
+                     gene_name_key: str = "gene_name") -> Iterator[TX]:
+    """
+    Stream transcripts from a GTF file normalized by gffread (-T output).
+
+    Produces the same records as read_gffread_gtf followed by TX.from_strlist, but parses
+    each line once, builds exon and CDS coordinates as integers while reading and does not
+    keep or copy the raw lines of a transcript.
+
+    Args:
+        infname: Path to the normalized GTF file
+        transcript_type_key: Attribute holding the transcript type
+        gene_type_key: Attribute holding the gene type
+        gene_name_key: Attribute holding the gene name
+
+    Yields:
+        One TX per transcript, in file order
+    """
+    assert os.path.exists(infname), "input file does not exist: " + infname
+
+    transcript = None
+    tid_tag = None
+    with open(infname) as inFP:
+        for line in inFP:
+            if line[0] == "#":
+                continue
+            lcs = line.rstrip().split("\t")
+            if len(lcs) != 9:
+                continue
+
+            feature = lcs[2]
+            if feature == "transcript":
+                if transcript is not None:
+                    yield _finish_transcript(transcript)
+                transcript = _new_transcript(lcs, transcript_type_key, gene_type_key, gene_name_key)
+                tid_tag = "transcript_id \"" + transcript.tid + "\""
+                continue
+
+            # child records must follow their transcript; a substring test avoids parsing their attributes
+            if tid_tag is None or tid_tag not in lcs[8]:
+                raise AssertionError("records out of order: " + str(transcript.tid if transcript else None) + " > " + lcs[8])
+
+            if feature == "exon":
+                transcript.exons.append((int(lcs[3]), int(lcs[4])))
+            elif feature == "CDS":
+                start, end = int(lcs[3]), int(lcs[4])
+                if transcript.cds_start is None:
+                    transcript.cds_start, transcript.cds_end = start, end
+                else:
+                    if start < transcript.cds_start:
+                        transcript.cds_start = start
+                    if end > transcript.cds_end:
+                        transcript.cds_end = end
+
+    if transcript is not None:
+        yield _finish_transcript(transcript)
+
+def iter_transcript_batches(infname: str, batch_size: int, **keys) -> Iterator[List[TX]]:
+    """
+    Stream transcripts in lists of up to batch_size records.
+
+    Args:
+        infname: Path to the normalized GTF file
+        batch_size: Number of transcripts per batch
+        **keys: transcript_type_key, gene_type_key and gene_name_key, passed to read_transcripts
+
+    Yields:
+        Lists of TX
+    """
+    assert batch_size > 0, "batch_size must be positive"
+    batch = []
+    for transcript in read_transcripts(infname, **keys):
+        batch.append(transcript)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
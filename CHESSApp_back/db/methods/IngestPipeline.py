@@ -0,0 +1,207 @@
+import time
+import queue
+import threading
+import multiprocessing
+from typing import Dict, Iterator, List, Optional
+
+from db.db import db
+from db.methods.BulkWriter import BulkWriter
+from db.methods.GTFParser import iter_transcript_batches
+from db.methods.TX import TX
+
+def _produce_transcripts(infname: str, batch_size: int, keys: Dict, out_queue) -> None:
+    """Parse process: put batches of transcripts on the queue, then a final marker."""
+    try:
+        for batch in iter_transcript_batches(infname, batch_size, **keys):
+            out_queue.put(("batch", batch))
+        out_queue.put(("done", None))
+    except BaseException as e:
+        out_queue.put(("error", f"{type(e).__name__}: {str(e)}"))
+
+class TranscriptProducer:
+    """
+    Parses a normalized GTF in a separate process.
+
+    Transcripts are passed back in batches through a bounded queue, so the parser runs at most
+    queue_size batches ahead of ingestion and memory use stays bounded.
+    """
+
+    def __init__(self, infname: str, batch_size: int = 1000, queue_size: int = 8, **keys):
+        self.infname = infname
+        self.batch_size = batch_size
+        self.keys = keys
+        # spawn keeps the parser free of the parent's database connections and threads
+        context = multiprocessing.get_context("spawn")
+        self._queue = context.Queue(maxsize=queue_size)
+        self._process = context.Process(target=_produce_transcripts, args=(infname, batch_size, keys, self._queue), daemon=True)
+        self.stats = {"transcripts": 0, "batches": 0, "wait_seconds": 0.0, "max_queue_depth": 0}
+
+    def __iter__(self) -> Iterator[TX]:
+        self._process.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                kind, payload = self._get()
+                self.stats["wait_seconds"] += time.perf_counter() - start
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise Exception(f"Failed to parse annotation: {payload}")
+
+                self.stats["batches"] += 1
+                self.stats["transcripts"] += len(payload)
+                self._sample_depth()
+                yield from payload
+        finally:
+            self.close()
+
+    def _get(self):
+        while True:
+            try:
+                return self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise Exception(f"Annotation parser exited unexpectedly (exit code {self._process.exitcode})")
+
+    def _sample_depth(self) -> None:
+        try:
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+        except NotImplementedError:
+            pass
+
+    def close(self) -> None:
+        """Stop the parser process."""
+        if self._process.is_alive():
+            self._process.terminate()
+        if self._process.pid is not None:
+            self._process.join()
+
+class PipelinedBulkWriter(BulkWriter):
+    """
+    BulkWriter that writes batches on a background thread.
+
+    flush() hands the buffered rows to the writer thread through a bounded queue and returns,
+    so ID resolution for the next batch overlaps with the database write of the previous one.
+    When queue_size batches are waiting, flush() blocks until the writer catches up.
+
+    The writer thread uses the connection of the caller's session, so all rows are still written
+    in the caller's transaction. Every statement on that connection, from either thread, runs
+    under one lock; commit() waits for outstanding writes before committing.
+    """
+
+    def __init__(self, queue_size: int = 2, **kwargs):
+        super().__init__(**kwargs)
+        self._connection = db.session.connection()
+        self._lock = threading.RLock()
+        self._buffer_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._pipeline_stats = {"flushes": 0, "backpressure_seconds": 0.0, "busy_seconds": 0.0, "max_queue_depth": 0}
+        self._thread = threading.Thread(target=self._run, name="bulk-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, table: str, row: Dict) -> None:
+        with self._buffer_lock:
+            if table in self._remaps:
+                self._apply_remaps(table, row)
+            buffer = self._buffers[table]
+            buffer.append(row)
+            full = len(buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def execute(self, statement, params=None):
+        with self._lock:
+            return self._connection.execute(statement, params)
+
+    def has_pending(self, table: str) -> bool:
+        return bool(self._buffers[table])
+
+    def remap_pending(self, table: str, column: str, mapping: Dict) -> None:
+        # called on the writer thread; rows of the batch being written are remapped by _run
+        with self._buffer_lock:
+            super().remap_pending(table, column, mapping)
+
+    def flush(self) -> None:
+        """Hand all buffered rows to the writer thread, parents first."""
+        self._raise_error()
+        with self._buffer_lock:
+            batch = [(table, self._buffers[table]) for table in self._tables if self._buffers[table]]
+            for table in self._tables:
+                self._buffers[table] = []
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        self._queue.put(batch)
+        self._pipeline_stats["backpressure_seconds"] += time.perf_counter() - start
+        self._pipeline_stats["flushes"] += 1
+        self._pipeline_stats["max_queue_depth"] = max(self._pipeline_stats["max_queue_depth"], self._queue.qsize())
+
+    def drain(self) -> None:
+        """Wait until the writer thread has written every flushed batch."""
+        self._queue.join()
+        self._raise_error()
+
+    def commit(self) -> None:
+        self.flush()
+        self.drain()
+        with self._lock:
+            bulk_load = self.bulk_load
+            self.end_bulk_load()
+            db.session.commit()
+            # the session hands out a new connection for the next transaction
+            self._connection = db.session.connection()
+            if bulk_load:
+                self.begin_bulk_load()
+
+    def shutdown(self) -> Dict:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        return self._reset_bulk_load()
+
+    def close(self) -> Dict[str, Dict]:
+        self.flush()
+        self.drain()
+        shutdown_result = self.shutdown()
+        if not shutdown_result["success"]:
+            raise Exception(shutdown_result["message"])
+        return super().close()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is not None:
+                    continue
+                start = time.perf_counter()
+                with self._lock:
+                    for table, rows in batch:
+                        # apply remaps recorded by earlier tables of this batch (e.g. skipped introns)
+                        if table in self._remaps:
+                            with self._buffer_lock:
+                                for row in rows:
+                                    self._apply_remaps(table, row)
+                        self._write_rows(table, rows)
+                self._pipeline_stats["busy_seconds"] += time.perf_counter() - start
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise Exception(f"Bulk write failed: {str(self._error)}")
+
+    def get_pipeline_stats(self) -> Dict:
+        """Writer stage counters: batches handed over, time spent writing and waiting on backpressure."""
+        return {
+            "flushes": self._pipeline_stats["flushes"],
+            "busy_seconds": round(self._pipeline_stats["busy_seconds"], 3),
+            "backpressure_seconds": round(self._pipeline_stats["backpressure_seconds"], 3),
+            "max_queue_depth": self._pipeline_stats["max_queue_depth"],
+            "queue_depth": self._queue.qsize()
+        }
@@ -0,0 +1,104 @@
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import text, bindparam
+from db.methods.BulkWriter import BulkWriter
+
+class IntronAllocator:
+    """
+    Resolves intron coordinates to intron.iid without a database round trip per intron.
+
+    The (strand, start, end) -> iid map is preloaded for one chromosome (sequence_id)
+    at a time. Known introns are resolved in memory; new introns get an iid reserved in
+    bulk and are queued on the BulkWriter as INSERT ... ON DUPLICATE KEY UPDATE rows, so only
+    duplicate coordinates are skipped while any other error still fails the load. Input is
+    expected to be grouped by chromosome (as produced by gffread), but revisiting a chromosome
+    is handled by flushing pending rows before its map is reloaded.
+
+    If a concurrent ingestion inserts the same intron first, the skipped row is detected
+    after the flush and pending and future transcript_intron links are remapped to the existing iid.
+    """
+
+    def __init__(self, writer: BulkWriter):
+        self.writer = writer
+        self.writer.add_table("intron", ["iid", "sequence_id", "strand", "start", "end"],
+                              on_duplicate="iid = iid", after_flush=self._after_flush)
+        self._sequence_id = None
+        self._introns: Dict[Tuple[str, int, int], int] = {}
+        self._pending_sequences: Set[int] = set()
+        self.stats = {"chromosomes_loaded": 0, "existing": 0, "new": 0, "conflicts": 0}
+
+    def get_iid(self, sequence_id: int, strand, start: int, end: int) -> int:
+        """
+        Get the iid of an intron, queueing a new intron record if it does not exist yet.
+
+        Args:
+            sequence_id: Sequence ID
+            strand: Strand as stored in the intron table
+            start: Start position
+            end: End position
+
+        Returns:
+            The intron ID
+        """
+        if sequence_id != self._sequence_id:
+            self._load(sequence_id)
+
+        key = (str(strand), int(start), int(end))
+        iid = self._introns.get(key)
+        if iid is not None:
+            self.stats["existing"] += 1
+            return iid
+
+        iid = self.writer.next_id("intron", "iid")
+        self.writer.add("intron", {
+            "iid": iid,
+            "sequence_id": sequence_id,
+            "strand": key[0],
+            "start": key[1],
+            "end": key[2]
+        })
+        self._introns[key] = iid
+        self._pending_sequences.add(sequence_id)
+        self.stats["new"] += 1
+        return iid
+
+    def _load(self, sequence_id: int) -> None:
+        """Replace the in-memory map with the introns of another chromosome."""
+        if sequence_id in self._pending_sequences:
+            self.writer.flush()
+            self.writer.drain()
+            self._pending_sequences.clear()
+
+        rows = self.writer.execute(
+            text("SELECT iid, strand, start, end FROM intron WHERE sequence_id = :sequence_id"),
+            {"sequence_id": sequence_id}
+        )
+        self._introns = {(row.strand, row.start, row.end): row.iid for row in rows}
+        self._sequence_id = sequence_id
+        self.stats["chromosomes_loaded"] += 1
+
+    def _after_flush(self, rows: List[Dict], rowcount: int) -> None:
+        """Remap introns that were skipped because another ingestion inserted them first."""
+        # the affected row count cannot tell skipped rows apart (the MySQL dialect reports found rows),
+        # so the reserved iids are looked up
+        reserved_iids = [row["iid"] for row in rows]
+        written = self.writer.execute(
+            text("SELECT iid FROM intron WHERE iid IN :iids").bindparams(bindparam("iids", expanding=True)),
+            {"iids": reserved_iids}
+        )
+        written = {row.iid for row in written}
+
+        mapping = {}
+        for row in rows:
+            if row["iid"] in written:
+                continue
+            existing_iid = self.writer.execute(
+                text("SELECT iid FROM intron WHERE sequence_id = :sequence_id AND strand = :strand AND start = :start AND end = :end"),
+                row
+            ).scalar()
+            if existing_iid is None:
+                raise Exception(f"Could not resolve intron {row['strand']}:{row['start']}-{row['end']} on sequence {row['sequence_id']}")
+            mapping[row["iid"]] = existing_iid
+
+        # the writer keeps the mapping for transcript_intron rows added later with the reserved iid
+        self.stats["conflicts"] += len(mapping)
+        self.writer.remap_pending("transcript_intron", "iid", mapping)
@@ -0,0 +1,68 @@
+import time
+from typing import Optional
+from sqlalchemy import text
+from db.db import db
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a running job once cancellation has been requested.
+    Derives from BaseException so the generic error handling of the admin
+    functions does not turn a cancellation into a regular failure.
+    """
+    pass
+
+class JobProgress:
+    """
+    Reports the progress of a background job to the job table.
+
+    Updates are written through a separate autocommit connection so they are
+    visible to pollers while the job's own transaction is still open. Each write
+    also checks the cancel flag and raises JobCancelled when it is set.
+
+    Without a job_id (synchronous requests) the reporter only prints stage changes.
+    """
+
+    def __init__(self, job_id: Optional[int] = None, min_interval: float = 2.0):
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self.stage = None
+        self.percent = 0.0
+        self.rows_written = 0
+        self._last_write = 0.0
+
+    def set_stage(self, stage: str, percent: Optional[float] = None) -> None:
+        """Start a new stage, optionally moving the overall percent-complete."""
+        self.stage = stage
+        if percent is not None:
+            self.percent = percent
+        print(f"[job {self.job_id}] {stage}" if self.job_id else stage)
+        self._write(force=True)
+
+    def update(self, percent: Optional[float] = None, rows_written: Optional[int] = None) -> None:
+        """Update percent-complete and rows written; throttled to one write per min_interval."""
+        if percent is not None:
+            self.percent = min(percent, 100.0)
+        if rows_written is not None:
+            self.rows_written = rows_written
+        self._write(force=False)
+
+    def _write(self, force: bool) -> None:
+        if self.job_id is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(
+                text("""UPDATE job SET stage = :stage, percent_complete = :percent, rows_written = :rows_written
+                        WHERE job_id = :job_id"""),
+                {"stage": self.stage, "percent": round(self.percent, 2), "rows_written": self.rows_written, "job_id": self.job_id}
+            )
+            cancel_requested = conn.execute(
+                text("SELECT cancel_requested FROM job WHERE job_id = :job_id"),
+                {"job_id": self.job_id}
+            ).scalar()
+        if cancel_requested:
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
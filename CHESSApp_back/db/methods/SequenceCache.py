@@ -0,0 +1,241 @@
+import os
+import json
+import zlib
+import fcntl
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import Config
+from db.db import get_sequence_cache_dir
+
+# key: (tid, transcript_id, sva_id, nomenclature)
+SequenceKey = Tuple[int, str, int, str]
+
+class SequenceCache:
+    """
+    Bounded cache of the sequences computed for a transcript: nucleotide, CDS and amino acid.
+
+    Values are kept zlib compressed in a per-process LRU limited to max_bytes of compressed data.
+    With Config.SEQUENCE_CACHE_DISK they are also written under <data dir>/sequence_cache/<sva_id>/,
+    shared by all processes and kept across restarts. The files are limited to disk_max_bytes: each
+    process checks the total after writing a twentieth of it and removes the least recently used ones.
+
+    Each value records a version, the sequence_version of its source version assembly, which is
+    incremented every time the annotation is loaded. A value with another version is treated as a
+    miss, so processes that did not load the annotation never serve stale sequences.
+    invalidate_sva() drops the values of an annotation right away (memory and disk).
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, use_disk: Optional[bool] = None, disk_max_bytes: Optional[int] = None):
+        self.max_bytes = Config.SEQUENCE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.use_disk = Config.SEQUENCE_CACHE_DISK if use_disk is None else use_disk
+        self.disk_max_bytes = Config.SEQUENCE_CACHE_DISK_MAX_BYTES if disk_max_bytes is None else disk_max_bytes
+        self._entries: "OrderedDict[SequenceKey, Tuple[str, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._disk_written = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def _pack(version: str, value: Dict) -> bytes:
+        return zlib.compress(json.dumps([version, value["nt"], value["cds"], value["aa"]]).encode())
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Tuple[str, Dict]:
+        version, nt, cds, aa = json.loads(zlib.decompress(blob))
+        return version, {"nt": nt, "cds": cds, "aa": aa}
+
+    def _sva_dir(self, sva_id: int) -> Optional[str]:
+        cache_dir = get_sequence_cache_dir()
+        if cache_dir is None:
+            return None
+        return os.path.join(cache_dir, str(sva_id))
+
+    def _disk_path(self, key: SequenceKey) -> Optional[str]:
+        sva_dir = self._sva_dir(key[2])
+        if sva_dir is None:
+            return None
+        name = hashlib.sha1("\t".join(str(part) for part in key).encode()).hexdigest()
+        return os.path.join(sva_dir, name[:2], name + ".z")
+
+    def get(self, key: SequenceKey, version: str) -> Optional[Dict]:
+        """
+        Get the cached sequences of a transcript.
+
+        Returns:
+            Dictionary with nt, cds and aa, or None if the transcript is not cached for this version
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._unpack(entry[1])[1]
+                self._remove(key)
+
+        if self.use_disk:
+            disk_path = self._disk_path(key)
+            if disk_path and os.path.exists(disk_path):
+                try:
+                    with open(disk_path, "rb") as inFP:
+                        blob = inFP.read()
+                    disk_version, value = self._unpack(blob)
+                except (OSError, ValueError, zlib.error):
+                    disk_version, value = None, None
+                if disk_version == version:
+                    try:
+                        # record the use for eviction
+                        os.utime(disk_path)
+                    except OSError:
+                        pass
+                    with self._lock:
+                        self.disk_hits += 1
+                        self._store(key, version, blob)
+                    return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: SequenceKey, version: str, value: Dict) -> None:
+        """
+        Cache the sequences of a transcript (a dictionary with nt, cds and aa).
+        """
+        blob = self._pack(version, value)
+        with self._lock:
+            self._store(key, version, blob)
+
+        if self.use_disk:
+            disk_path = self._disk_path(key)
+            if disk_path:
+                try:
+                    os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                    partial_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.partial"
+                    with open(partial_path, "wb") as outFP:
+                        outFP.write(blob)
+                    os.replace(partial_path, disk_path)
+                except OSError as e:
+                    print(f"Warning: Could not write sequence cache file {disk_path}: {str(e)}")
+                    return
+
+                with self._lock:
+                    self._disk_written += len(blob)
+                    check = self._disk_written >= self.disk_max_bytes // 20
+                    if check:
+                        self._disk_written = 0
+                if check:
+                    self.evict_disk()
+
+    def _store(self, key: SequenceKey, version: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (version, blob)
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: SequenceKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def evict_disk(self) -> int:
+        """
+        Remove the least recently used sequence files until they fit in disk_max_bytes.
+        Only one process evicts at a time; the others skip the check.
+
+        Returns:
+            Number of files removed
+        """
+        cache_dir = get_sequence_cache_dir()
+        if cache_dir is None or not os.path.isdir(cache_dir):
+            return 0
+
+        with open(os.path.join(cache_dir, ".evict.lock"), "a") as lockFP:
+            try:
+                fcntl.flock(lockFP, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            entries = []
+            total_bytes = 0
+            for dir_path, _, file_names in os.walk(cache_dir):
+                for file_name in file_names:
+                    if not file_name.endswith(".z"):
+                        continue
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, path, stat.st_size))
+                    total_bytes += stat.st_size
+
+            removed = 0
+            for _, path, size in sorted(entries):
+                if total_bytes <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_bytes -= size
+                removed += 1
+
+        with self._lock:
+            self.disk_evictions += removed
+        return removed
+
+    def invalidate_sva(self, sva_id: int) -> int:
+        """
+        Drop the cached sequences of a source version assembly, in memory and on disk.
+
+        Returns:
+            Number of values removed from memory
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[2] == sva_id]
+            for key in keys:
+                self._remove(key)
+
+        sva_dir = self._sva_dir(sva_id)
+        if sva_dir and os.path.isdir(sva_dir):
+            shutil.rmtree(sva_dir, ignore_errors=True)
+        return len(keys)
+
+    def get_stats(self) -> Dict:
+        """Size and hit rate of this process's cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "pid": os.getpid(),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": self.use_disk,
+                "disk_max_bytes": self.disk_max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions
+            }
+
+# Global instance
+sequence_cache = SequenceCache()
+
+def get_sequence_cache() -> SequenceCache:
+    """Get the global transcript sequence cache of this process."""
+    return sequence_cache
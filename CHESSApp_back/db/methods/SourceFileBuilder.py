@@ -0,0 +1,233 @@
+import os
+import gzip
+import time
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pysam
+
+from config import Config
+from db.methods.GTFParser import parse_attributes
+
+# number of GFF records sorted in memory before a sorted run is spilled to disk
+SORT_BUFFER_RECORDS = 500000
+
+# characters with a reserved meaning in GFF3 attribute values
+GFF_ESCAPES = str.maketrans({";": "%3B", "=": "%3D", "\t": "%09"})
+
+def gtf_to_gff_record(lcs: List[str]) -> str:
+    """
+    Convert a split record of a gffread-normalized GTF into a GFF3 line.
+
+    Mirrors "gffread -F --keep-exon-attrs": transcripts get ID and geneID, child features get
+    Parent, and all remaining attributes are kept.
+
+    Args:
+        lcs: The 9 columns of a GTF record
+
+    Returns:
+        GFF3 line without trailing newline
+    """
+    attributes = parse_attributes(lcs[8])
+    transcript_id = attributes.pop("transcript_id", None)
+    gene_id = attributes.pop("gene_id", None)
+
+    if lcs[2] == "transcript":
+        gff_attributes = [f"ID={transcript_id}"]
+        if gene_id is not None:
+            gff_attributes.append(f"geneID={gene_id}")
+    else:
+        gff_attributes = [f"Parent={transcript_id}"]
+    gff_attributes.extend(f"{k}={v.translate(GFF_ESCAPES)}" for k, v in attributes.items())
+
+    return "\t".join(lcs[:8] + [";".join(gff_attributes)])
+
+def _sort_key(line: str):
+    lcs = line.split("\t", 4)
+    return (lcs[0], int(lcs[3]))
+
+def _spill_run(records: List[str], run_path: str) -> None:
+    records.sort(key=_sort_key)
+    with open(run_path, "w") as outFP:
+        outFP.writelines(records)
+    records.clear()
+
+def _read_run(run_path: str) -> Iterator[str]:
+    with open(run_path) as inFP:
+        yield from inFP
+
+def source_file_descriptions(source_file_base_name: str) -> Dict:
+    """
+    Describe the files generated for a source annotation.
+
+    Args:
+        source_file_base_name: Output path prefix
+
+    Returns:
+        Dictionary with file_type, file_path and description of each file
+    """
+    return {
+        "gtf_file": {
+            "file_type": "gtf",
+            "file_path": source_file_base_name + ".gtf.gz",
+            "description": "GTF file for source version assembly " + source_file_base_name
+        },
+        "gff_file": {
+            "file_type": "gff",
+            "file_path": source_file_base_name + ".gff.gz",
+            "description": "GFF file for source version assembly " + source_file_base_name
+        },
+        "sorted_gff_file_bgz": {
+            "file_type": "sorted_gff_bgz",
+            "file_path": source_file_base_name + ".sorted.gff.gz",
+            "description": "Sorted GFF file for source version assembly " + source_file_base_name
+        },
+        "sorted_gff_file_bgz_tbi": {
+            "file_type": "sorted_gff_bgz_tbi",
+            "file_path": source_file_base_name + ".sorted.gff.gz.tbi",
+            "description": "Tabix index for sorted GFF file for source version assembly " + source_file_base_name
+        }
+    }
+
+def remove_source_files(source_files: Dict) -> None:
+    """Remove generated source files that exist on disk."""
+    for file_data in source_files.values():
+        if os.path.exists(file_data["file_path"]):
+            os.remove(file_data["file_path"])
+
+def prepare_source_files_from_gtf(input_gtf_file: str, source_file_base_name: str,
+                                  seqid_map: Optional[Dict[str, str]] = None,
+                                  timings: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Generates all files to represent the source annotation in the database.
+
+    The input is read once. Each record is renamed (if seqid_map is given), converted to GFF
+    and written to the .gtf.gz and .gff.gz outputs while the GFF records are collected for
+    sorting. Sorting is done in memory, spilling sorted runs to disk for large annotations,
+    and the merged output is written as BGZF and indexed with tabix through pysam.
+
+    Args:
+        input_gtf_file: Path to input GTF file (plain or gzip compressed)
+        source_file_base_name: Output path prefix
+        seqid_map: Optional mapping of sequence names to rename while writing; names not in the map are kept
+        timings: Optional dictionary that receives the duration of each stage in seconds
+
+    Returns:
+        Dictionary describing the generated files
+    """
+    result = source_file_descriptions(source_file_base_name)
+
+    assert os.path.exists(input_gtf_file), "GTF file does not exist: " + input_gtf_file
+    timings = timings if timings is not None else {}
+    seqid_map = seqid_map or {}
+
+    run_paths = []
+    records = []
+    try:
+        # single pass: rename, write the GTF, convert to GFF and buffer the GFF records for sorting
+        start = time.perf_counter()
+        sort_seconds = 0.0
+        open_input = gzip.open if input_gtf_file.endswith(".gz") else open
+        with open_input(input_gtf_file, "rt") as inFP, \
+             gzip.open(result["gtf_file"]["file_path"], "wt", compresslevel=6) as gtfFP, \
+             gzip.open(result["gff_file"]["file_path"], "wt", compresslevel=6) as gffFP:
+            gffFP.write("##gff-version 3\n")
+            for line in inFP:
+                if line.startswith("#"):
+                    gtfFP.write(line)
+                    continue
+                lcs = line.rstrip("\n").split("\t")
+                if len(lcs) != 9:
+                    continue
+                lcs[0] = seqid_map.get(lcs[0], lcs[0])
+                gtfFP.write("\t".join(lcs) + "\n")
+
+                gff_line = gtf_to_gff_record(lcs) + "\n"
+                gffFP.write(gff_line)
+                records.append(gff_line)
+                if len(records) >= SORT_BUFFER_RECORDS:
+                    sort_start = time.perf_counter()
+                    run_paths.append(f"{source_file_base_name}.sort{len(run_paths)}.tmp")
+                    _spill_run(records, run_paths[-1])
+                    sort_seconds += time.perf_counter() - sort_start
+        timings["convert"] = time.perf_counter() - start - sort_seconds
+
+        # sort the remaining records and merge them with the spilled runs into a BGZF file
+        start = time.perf_counter()
+        records.sort(key=_sort_key)
+        merged = heapq.merge(*[_read_run(run_path) for run_path in run_paths], records, key=_sort_key) if run_paths else records
+        with pysam.BGZFile(result["sorted_gff_file_bgz"]["file_path"], "wb") as bgzFP:
+            bgzFP.write(b"##gff-version 3\n")
+            chunk = []
+            for gff_line in merged:
+                chunk.append(gff_line)
+                if len(chunk) >= 10000:
+                    bgzFP.write("".join(chunk).encode())
+                    chunk = []
+            bgzFP.write("".join(chunk).encode())
+        timings["sort_bgzf"] = sort_seconds + time.perf_counter() - start
+
+        start = time.perf_counter()
+        pysam.tabix_index(result["sorted_gff_file_bgz"]["file_path"], preset="gff", force=True)
+        timings["index"] = time.perf_counter() - start
+
+    except Exception:
+        remove_source_files(result)
+        raise
+
+    finally:
+        for run_path in run_paths:
+            if os.path.exists(run_path):
+                os.remove(run_path)
+
+    print(f"Source files for {os.path.basename(source_file_base_name)}: " +
+          ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    return result
+
+def prepare_source_files_parallel(input_gtf_file: str, targets: Dict[str, Tuple[str, Dict[str, str]]],
+                                  max_workers: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Generate the source files of several nomenclatures concurrently.
+
+    Each nomenclature is built by prepare_source_files_from_gtf in its own process. If any of
+    them fails, the remaining ones are cancelled, every file generated so far is removed and
+    the error is raised, so callers only record files once all of them exist.
+
+    Args:
+        input_gtf_file: Path to input GTF file (plain or gzip compressed)
+        targets: Nomenclature -> (output path prefix, seqid_map)
+        max_workers: Process limit (defaults to Config.SOURCE_FILE_WORKERS)
+
+    Returns:
+        Nomenclature -> dictionary describing the generated files
+    """
+    max_workers = max(1, min(max_workers or Config.SOURCE_FILE_WORKERS, len(targets)))
+    results = {}
+    try:
+        if max_workers == 1:
+            for nomenclature, (source_file_base_name, seqid_map) in targets.items():
+                results[nomenclature] = prepare_source_files_from_gtf(input_gtf_file, source_file_base_name, seqid_map=seqid_map)
+            return results
+
+        # spawn keeps the workers free of the parent's database connections and threads
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(prepare_source_files_from_gtf, input_gtf_file, source_file_base_name, seqid_map): nomenclature
+                for nomenclature, (source_file_base_name, seqid_map) in targets.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+
+    except Exception as e:
+        # the executor has waited for running workers, so nothing is still writing
+        for source_file_base_name, _ in targets.values():
+            remove_source_files(source_file_descriptions(source_file_base_name))
+        raise Exception(f"Failed to generate source files: {str(e)}")
@@ -0,0 +1,186 @@
+import os
+import fcntl
+from contextlib import contextmanager
+from typing import Dict, Optional
+from sqlalchemy import text
+
+from config import Config
+from db.db import db, to_absolute_path
+from db.methods.SourceFileBuilder import prepare_source_files_from_gtf, remove_source_files
+from db.methods.genomes.queries import get_map_between_nomenclatures
+
+# marker next to the GTF of a lazily built group; used as its lock and its last-use time
+MARKER_SUFFIX = ".lastused"
+
+def remove_source_file(file_path: str) -> None:
+    """Remove a source file and the cache marker it may have."""
+    for path in [file_path, file_path + MARKER_SUFFIX]:
+        if os.path.exists(path):
+            os.remove(path)
+
+class SourceFileCache:
+    """
+    Source files (gtf, gff, sorted gff and tabix index) of nomenclatures other than the one an
+    annotation was uploaded in, built on first request.
+
+    Their source_file records exist from the start with built_from naming the nomenclature whose
+    files they are generated from. ensure() builds the missing files of a record group under an
+    exclusive file lock, so concurrent first requests wait for one build instead of repeating it.
+    Files are built under temporary names and renamed into place, so a file that exists is complete.
+    When the built files grow beyond max_bytes, the least recently used groups are removed; their
+    records stay and the files are built again when requested. Builds run in the job worker
+    (source_file_build jobs); requests hold a shared lock on the group while its files are sent
+    (acquire), which keeps eviction away from them.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = Config.SOURCE_FILE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _group(self, sva_id: int, nomenclature: str):
+        return db.session.execute(
+            text("""SELECT file_path, filetype, built_from, assembly_id FROM source_file
+                    WHERE sva_id = :sva_id AND nomenclature = :nomenclature"""),
+            {"sva_id": sva_id, "nomenclature": nomenclature}
+        ).fetchall()
+
+    def ensure(self, sva_id: int, nomenclature: str) -> bool:
+        """
+        Make sure the source files of an annotation in a nomenclature exist.
+
+        Returns:
+            True if the files were built by this call
+        """
+        rows = self._group(sva_id, nomenclature)
+        if not rows or rows[0].built_from is None:
+            return False
+
+        paths = {row.filetype: to_absolute_path(row.file_path) for row in rows}
+        marker_path = paths["gtf"] + MARKER_SUFFIX
+        built = False
+        if not all(os.path.exists(path) for path in paths.values()):
+            with self._lock(marker_path):
+                # another process may have built the files while we waited for the lock
+                if not all(os.path.exists(path) for path in paths.values()):
+                    self._build(sva_id, rows[0].assembly_id, rows[0].built_from, nomenclature, paths)
+                    built = True
+        # record the use for eviction
+        with open(marker_path, "a"):
+            os.utime(marker_path)
+
+        if built:
+            self.evict(keep=marker_path)
+        return built
+
+    def acquire(self, sva_id: int, nomenclature: str):
+        """
+        Hold the built source files of an annotation in a nomenclature while they are served.
+
+        Takes a shared lock on the group's marker; evict() needs the exclusive lock, so it leaves
+        the files alone until the lock is released. Does not wait for a build in progress.
+
+        Returns:
+            Open lock to pass to release(), or None if the files are missing or being built
+        """
+        rows = self._group(sva_id, nomenclature)
+        if not rows or rows[0].built_from is None:
+            return None
+
+        paths = {row.filetype: to_absolute_path(row.file_path) for row in rows}
+        marker_path = paths["gtf"] + MARKER_SUFFIX
+        lockFP = open(marker_path, "a")
+        try:
+            fcntl.flock(lockFP, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lockFP.close()
+            return None
+        if not all(os.path.exists(path) for path in paths.values()):
+            lockFP.close()
+            return None
+        # record the use for eviction
+        os.utime(marker_path)
+        return lockFP
+
+    @staticmethod
+    def release(lock) -> None:
+        """Release a lock taken by acquire()."""
+        lock.close()
+
+    def _build(self, sva_id: int, assembly_id: int, built_from: str, nomenclature: str, paths: Dict[str, str]) -> None:
+        source_gtf = db.session.execute(
+            text("""SELECT file_path FROM source_file
+                    WHERE sva_id = :sva_id AND nomenclature = :nomenclature AND filetype = 'gtf'"""),
+            {"sva_id": sva_id, "nomenclature": built_from}
+        ).fetchone()
+        if not source_gtf:
+            raise Exception(f"No {built_from} GTF file to build the {nomenclature} files of source version assembly {sva_id} from")
+
+        seqid_map = get_map_between_nomenclatures(assembly_id, built_from, nomenclature)
+        if not seqid_map["success"]:
+            raise Exception(seqid_map["message"])
+
+        partial_base_name = paths["gtf"][:-len(".gtf.gz")] + f".{os.getpid()}.partial"
+        print(f"Building {nomenclature} source files for source version assembly {sva_id} from {built_from}")
+        partial_files = prepare_source_files_from_gtf(to_absolute_path(source_gtf.file_path), partial_base_name, seqid_map=seqid_map["data"])
+        try:
+            # the index goes last: a reader that finds it can rely on the indexed file being in place
+            for file_data in sorted(partial_files.values(), key=lambda file_data: file_data["file_type"].endswith("_tbi")):
+                os.replace(file_data["file_path"], paths[file_data["file_type"]])
+        finally:
+            remove_source_files(partial_files)
+
+    @contextmanager
+    def _lock(self, marker_path: str, blocking: bool = True):
+        with open(marker_path, "a") as lockFP:
+            try:
+                fcntl.flock(lockFP, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lockFP, fcntl.LOCK_UN)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove the least recently used groups of built files until they fit in max_bytes.
+        Groups being built are skipped.
+
+        Returns:
+            Number of groups removed
+        """
+        rows = db.session.execute(
+            text("SELECT sva_id, nomenclature, filetype, file_path FROM source_file WHERE built_from IS NOT NULL")
+        ).fetchall()
+
+        groups = {}
+        for row in rows:
+            groups.setdefault((row.sva_id, row.nomenclature), {})[row.filetype] = to_absolute_path(row.file_path)
+
+        entries = []
+        total_bytes = 0
+        for paths in groups.values():
+            existing = [path for path in paths.values() if os.path.exists(path)]
+            if not existing or "gtf" not in paths:
+                continue
+            marker_path = paths["gtf"] + MARKER_SUFFIX
+            size = sum(os.path.getsize(path) for path in existing)
+            last_used = os.path.getmtime(marker_path) if os.path.exists(marker_path) else max(os.path.getmtime(path) for path in existing)
+            entries.append((last_used, marker_path, existing, size))
+            total_bytes += size
+
+        removed = 0
+        for _, marker_path, existing, size in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if marker_path == keep:
+                continue
+            with self._lock(marker_path, blocking=False) as locked:
+                if not locked:
+                    continue
+                for path in existing:
+                    if os.path.exists(path):
+                        os.remove(path)
+            total_bytes -= size
+            removed += 1
+        return removed
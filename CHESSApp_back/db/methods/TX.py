@@ -3,7 +3,11 @@ import sys
 from .utils import *
 
 # declares a transcript class used for parsing data into the database
+# slots keep per-transcript memory low when large annotations are streamed into the database
 class TX:
+    __slots__ = ("seqid","strand","start","end","tid","gene_id","exons","introns","cds_start","cds_end","attributes","score",
+                 "transcript_type_key","gene_type_key","gene_name_key","transcript_type_value","gene_type_value","gene_name_value")
+
     def __init__(self,transcript_lines:list=None):
         self.seqid = None
         self.strand = None
@@ -55,7 +59,7 @@ class TX:
         tx_lcs = transcript_lines[0].rstrip().split("\t")
         assert tx_lcs[2]=="transcript","wrong record type found when parsing normalized input GTF. Expected type transcript, found type "+tx_lcs[2]+" for record: "+"\n".join(transcript)
         
-        self.attributes = extract_attributes(tx_lcs[8],gff=False)
+        self.attributes = parse_attributes(tx_lcs[8],gff=False)
         self.attributes = {k:v.replace("'","\\'").replace("\"","\\\"") for k,v in self.attributes.items()}
         self.set_required_attributes(self.attributes)
 
@@ -99,7 +103,25 @@ class TX:
         Returns:
         str: A GTF record for this transcript.
         """
-        gtf = "\t".join([self.seqid,"db","transcript",str(self.start),str(self.end),str(self.score),self.strand,".","transcript_id \""+str(self.tid)+"\";"])
+        attributes = "transcript_id \""+str(self.tid)+"\";"
+        if self.gene_id is not None:
+            attributes += " gene_id \""+str(self.gene_id)+"\";"
+        gtf = "\t".join([self.seqid,"db","transcript",str(self.start),str(self.end),str(self.score),self.strand,".",attributes])
+        for exon in self.exons:
+            gtf += "\n"+"\t".join([self.seqid,"db","exon",str(exon[0]),str(exon[1]),str(self.score),self.strand,".",attributes])
+        return gtf
+
+    def to_gff(self):
+        """
+        This function returns a GFF3 record for this transcript.
+
+        Returns:
+        str: A GFF3 record for this transcript.
+        """
+        attributes = "ID="+str(self.tid)
+        if self.gene_id is not None:
+            attributes += ";geneID="+str(self.gene_id)
+        gff = "\t".join([self.seqid,"db","transcript",str(self.start),str(self.end),str(self.score),self.strand,".",attributes])
         for exon in self.exons:
-            gtf += "\n"+"\t".join([self.seqid,"db","exon",str(exon[0]),str(exon[1]),str(self.score),self.strand,".","transcript_id \""+str(self.tid)+"\";"])
-        return gtf
\ No newline at end of file
+            gff += "\n"+"\t".join([self.seqid,"db","exon",str(exon[0]),str(exon[1]),str(self.score),self.strand,".","Parent="+str(self.tid)])
+        return gff
\ No newline at end of file
@@ -102,6 +102,38 @@ class TempFileManager:
             print(f"Warning: Could not delete temp file {file_path}: {str(e)}")
             return False
     
+    def resolve_temp_file(self, file_path: str) -> Optional[str]:
+        """
+        Resolve a temp file path received from a client or a job.
+        
+        Args:
+            file_path: Path to the temp file
+            
+        Returns:
+            The resolved path, or None if it is not a file in the temp files directory
+        """
+        temp_dir = get_temp_files_dir()
+        if not file_path or temp_dir is None:
+            return None
+        real_path = os.path.realpath(file_path)
+        if os.path.dirname(real_path) != os.path.realpath(temp_dir):
+            return None
+        return real_path
+    
+    def release_file(self, file_path: str) -> None:
+        """
+        Stop tracking a temp file without deleting it.
+        Used when the file has to outlive the current operation.
+        
+        Args:
+            file_path: Path to the temp file
+        """
+        with self._lock:
+            self._temp_files.discard(file_path)
+            for name, path in list(self._temp_names.items()):
+                if path == file_path:
+                    del self._temp_names[name]
+    
     def cleanup_all(self) -> int:
         """
         Clean up all tracked temp files.
@@ -0,0 +1,132 @@
+import os
+import shutil
+import hashlib
+from typing import Dict, Optional, Tuple
+from config import Config
+from db.db import get_upload_cache_dir
+from db.methods.utils import file_sha256
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def save_stream_hashed(stream, destination: str) -> Tuple[str, int]:
+    """
+    Write a binary stream to disk, computing its SHA-256 and size on the way.
+
+    Returns:
+        Tuple of the hex digest and the number of bytes written
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(destination, "wb") as outFP:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            outFP.write(chunk)
+    return digest.hexdigest(), size
+
+def save_upload(file, destination: str) -> Dict:
+    """
+    Save an uploaded file and identify its content.
+
+    Request uploads (werkzeug FileStorage) are hashed while they are written. Uploads already
+    stored on the server (StoredUpload) are hashed after they have been moved, so the key never
+    depends on a hash handed over with the upload.
+
+    Args:
+        file: FileStorage or StoredUpload
+        destination: Path to save the file to
+
+    Returns:
+        Dictionary with sha256 and size
+    """
+    if hasattr(file, "stream"):
+        sha256, size = save_stream_hashed(file.stream, destination)
+        return {"sha256": sha256, "size": size}
+
+    file.save(destination)
+    return {"sha256": file_sha256(destination), "size": os.path.getsize(destination)}
+
+def upload_key(upload: Dict) -> str:
+    """Cache key of an upload identified by save_upload."""
+    return f"{upload['sha256']}_{upload['size']}"
+
+def link_or_copy(source_path: str, destination: str) -> None:
+    """Hard link a file where possible (same file system), copy it otherwise."""
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source_path, destination)
+    except OSError:
+        shutil.copyfile(source_path, destination)
+
+class UploadCache:
+    """
+    Files derived from uploads (e.g. normalized annotations and their analysis), keyed by upload content.
+
+    Entries are directories under upload_cache/<kind>/<key>. Files are hard linked in and out of
+    the cache, so callers may move or delete their copies freely. When the cache grows beyond
+    max_bytes the least recently used entries are removed.
+    """
+
+    def __init__(self, kind: str, max_bytes: Optional[int] = None):
+        self.kind = kind
+        self.max_bytes = Config.UPLOAD_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(get_upload_cache_dir(), self.kind, key)
+
+    def get(self, key: str, name: str) -> Optional[str]:
+        """Path of a cached file, or None. A hit marks the entry as recently used."""
+        entry_dir = self._entry_dir(key)
+        path = os.path.join(entry_dir, name)
+        if not os.path.exists(path):
+            return None
+        os.utime(entry_dir)
+        return path
+
+    def put(self, key: str, name: str, source_path: str) -> str:
+        """
+        Add a file to an entry.
+
+        Returns:
+            Path of the cached file
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        path = os.path.join(entry_dir, name)
+        # concurrent uploads of the same content replace each other atomically
+        partial_path = f"{path}.{os.getpid()}.partial"
+        link_or_copy(source_path, partial_path)
+        os.replace(partial_path, path)
+        self.evict(keep=key)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        kind_dir = os.path.join(get_upload_cache_dir(), self.kind)
+        if not os.path.isdir(kind_dir):
+            return 0
+
+        entries = []
+        total_bytes = 0
+        for key in os.listdir(kind_dir):
+            entry_dir = os.path.join(kind_dir, key)
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            entries.append((os.path.getmtime(entry_dir), key, entry_dir, size))
+            total_bytes += size
+
+        removed = 0
+        for _, key, entry_dir, size in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= size
+            removed += 1
+        return removed
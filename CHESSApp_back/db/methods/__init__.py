@@ -4,4 +4,6 @@ from .sources import *
 from .utils import *
 from .configurations import *
 from .datasets import *
-from .data import *
\ No newline at end of file
+from .data import *
+from .jobs import *
+from .uploads import *
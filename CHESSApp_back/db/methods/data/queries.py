@@ -1,10 +1,19 @@
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from db.db import db, to_absolute_path
 from db.methods.utils import *
 from db.methods.data.utils import *
 from db.methods.genomes.queries import get_fasta_file, sequence_id_to_name
+from db.methods.SequenceCache import get_sequence_cache
 
-def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per_page=25, sort_by='name', sort_order='asc'):
+def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per_page=25, sort_by='name', sort_order='asc',
+                           dataset_id=None, min_value=None, max_value=None):
+    """
+    Search the genes of a source version assembly with pagination.
+
+    With dataset_id (a dataset of a numeric data type), each gene gets dataset_value, the sum of
+    the values of its transcripts, which can be sorted by (sort_by='dataset_value') and
+    filtered with min_value / max_value.
+    """
     try:
         # Validate sort parameters
         valid_sorts = {
@@ -16,6 +25,9 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
             'end': 'gene_end',
             'sequence_id': 'sequence_id'
         }
+        if dataset_id is not None:
+            valid_sorts['dataset_value'] = 'dataset_value'
+
         sort_column = valid_sorts.get(sort_by, 'g.name')
         order = 'DESC' if sort_order.lower() == 'desc' else 'ASC'
         
@@ -39,13 +51,47 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
             params["gene_type"] = gene_type
         
         where_clause = "WHERE " + " AND ".join(where_conditions)
+
+        # Dataset values of the transcripts
+        dataset_join = ""
+        dataset_column = ""
+        having_clause = ""
+        if dataset_id is not None:
+            dataset_join = """
+            LEFT JOIN transcript_data td ON td.dataset_id = :dataset_id
+                AND td.tid = txd.tid AND td.sva_id = txd.sva_id AND td.transcript_id = txd.transcript_id"""
+            dataset_column = ",\n                SUM(td.value_num) as dataset_value"
+            params["dataset_id"] = dataset_id
+
+            having_conditions = []
+            if min_value is not None:
+                having_conditions.append("SUM(td.value_num) >= :min_value")
+                params["min_value"] = min_value
+            if max_value is not None:
+                having_conditions.append("SUM(td.value_num) <= :max_value")
+                params["max_value"] = max_value
+            if having_conditions:
+                having_clause = "HAVING " + " AND ".join(having_conditions)
         
         # Count query for pagination info
-        count_query = f"""
-            SELECT COUNT(DISTINCT g.gid) as total_count
-            FROM gene g
-            {where_clause}
-        """
+        if having_clause:
+            count_query = f"""
+                SELECT COUNT(*) as total_count FROM (
+                    SELECT g.gid
+                    FROM gene g
+                    LEFT JOIN tx_dbxref txd ON g.sva_id = txd.sva_id AND g.gid = txd.gid
+                    {dataset_join}
+                    {where_clause}
+                    GROUP BY g.gid
+                    {having_clause}
+                ) filtered_genes
+            """
+        else:
+            count_query = f"""
+                SELECT COUNT(DISTINCT g.gid) as total_count
+                FROM gene g
+                {where_clause}
+            """
         
         # Main query with coordinates
         main_query = f"""
@@ -62,12 +108,13 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
                 MAX(t.end) as gene_end,
                 -- Include sequence_id and strand from the first transcript
                 MIN(t.sequence_id) as sequence_id,
-                MIN(t.strand) as strand
+                MIN(t.strand) as strand{dataset_column}
             FROM gene g
             LEFT JOIN tx_dbxref txd ON g.sva_id = txd.sva_id AND g.gid = txd.gid
-            LEFT JOIN transcript t ON txd.tid = t.tid
+            LEFT JOIN transcript t ON txd.tid = t.tid{dataset_join}
             {where_clause}
             GROUP BY g.gid, g.sva_id, g.name, g.type_key, g.type_value, g.gene_id
+            {having_clause}
             ORDER BY {sort_column} {order}, g.gid
             LIMIT :per_page OFFSET :offset
         """
@@ -100,6 +147,8 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
                     "strand": bool(row.strand) if row.strand is not None else None
                 }
             }
+            if dataset_id is not None:
+                gene_data["dataset_value"] = row.dataset_value
             genes.append(gene_data)
         
         # Calculate pagination metadata
@@ -121,7 +170,10 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
                 "sva_id": sva_id,
                 "gene_type": gene_type,
                 "sort_by": sort_by,
-                "sort_order": sort_order
+                "sort_order": sort_order,
+                "dataset_id": dataset_id,
+                "min_value": min_value,
+                "max_value": max_value
             }
         }
         
@@ -131,6 +183,8 @@ def search_genes_paginated(sva_id, search_term=None, gene_type=None, page=1, per
 def get_full_gene_data(gid):
     """
     Fetch complete gene data including all transcripts with exons, CDS, and transcript data
+    Introns and dataset entries of all transcripts are fetched together, so the number of
+    queries does not depend on the number of transcripts.
     """
     try:
         # First, get the gene information
@@ -158,6 +212,8 @@ def get_full_gene_data(gid):
                 txd.type_value as transcript_type,
                 t.sequence_id,
                 t.strand,
+                t.start,
+                t.end,
                 txd.start as transcript_start,
                 txd.end as transcript_end,
                 txd.cds_start,
@@ -173,6 +229,11 @@ def get_full_gene_data(gid):
             "sva_id": gene_result.sva_id
         }).fetchall()
         
+        # Introns and dataset entries of all transcripts at once, one query each
+        tids = list({transcript.tid for transcript in transcripts_result})
+        introns_by_tid = get_introns_by_tid(tids)
+        datasets_by_tid = get_transcript_data_by_datasets(tids)
+        
         # Build the response
         gene_data = {
             "gid": gene_result.gid,
@@ -198,21 +259,17 @@ def get_full_gene_data(gid):
             }
             
             # Get exon coordinates for this transcript
-            exon_coords = get_exon_chain(transcript.tid)
-            exon_coords = cut(exon_coords, transcript.transcript_start, transcript.transcript_end)
-            transcript_data["exons"] = exon_coords
+            exon_chain = build_exon_chain(transcript.start, transcript.end, introns_by_tid.get(transcript.tid, []))
+            transcript_data["exons"] = cut(exon_chain, transcript.transcript_start, transcript.transcript_end)
             
             # Get CDS coordinates for this transcript (if it has CDS)
             if transcript.cds_start is not None and transcript.cds_end is not None:
-                cds_coords = get_exon_chain(transcript.tid)
-                cds_coords = cut(cds_coords, transcript.cds_start, transcript.cds_end)
-                transcript_data["cds"] = cds_coords
+                transcript_data["cds"] = cut(exon_chain, transcript.cds_start, transcript.cds_end)
             else:
                 transcript_data["cds"] = []
             
             # Get transcript data organized by dataset
-            transcript_datasets = get_transcript_data_by_dataset(transcript.tid)
-            transcript_data["datasets"] = transcript_datasets
+            transcript_data["datasets"] = datasets_by_tid.get(transcript.tid, [])
             
             gene_data["transcripts"].append(transcript_data)
         
@@ -236,9 +293,6 @@ def get_exon_chain(tid):
         if not transcript:
             return {"success": False, "message": "Transcript not found"}
 
-        start = transcript.start
-        end = transcript.end
-
         introns_query = """
             SELECT start, end
             FROM intron
@@ -248,23 +302,55 @@ def get_exon_chain(tid):
         """
         introns = db.session.execute(text(introns_query), {"tid": tid}).fetchall()
 
-        coords = [[start, None]]
+        return build_exon_chain(transcript.start, transcript.end, [(intron.start, intron.end) for intron in introns])
 
-        if introns:
-            for intron in introns:
-                intron_start = intron.start
-                intron_end = intron.end
+    except Exception as e:
+        print(f"Error calculating coordinate chain for tid {tid}: {e}")
+        return []
 
-                coords[-1][1] = intron_start
-                coords.append([intron_end, None])
+def get_introns_by_tid(tids):
+    """
+    Get the introns of several transcripts with one query.
+    Returns: {tid: [(start, end), ...], ...} with the introns of each transcript sorted by start
+    """
+    if not tids:
+        return {}
 
-        coords[-1][1] = end
+    introns_query = text("""
+        SELECT ti.tid, intron.start, intron.end
+        FROM intron
+        JOIN transcript_intron ti ON intron.iid = ti.iid
+        WHERE ti.tid IN :tids
+        ORDER BY ti.tid, intron.start
+    """).bindparams(bindparam("tids", expanding=True))
 
-        return coords
+    introns_by_tid = {}
+    for row in db.session.execute(introns_query, {"tids": list(tids)}):
+        introns_by_tid.setdefault(row.tid, []).append((row.start, row.end))
+    return introns_by_tid
 
-    except Exception as e:
-        print(f"Error calculating coordinate chain for tid {tid}: {e}")
-        return []
+def organize_transcript_datasets(data_rows):
+    """
+    Group transcript_data rows of one transcript by dataset
+    """
+    datasets = {}
+    for row in data_rows:
+        if row.dataset_id not in datasets:
+            datasets[row.dataset_id] = {
+                "dataset_id": row.dataset_id,
+                "dataset_name": row.dataset_name,
+                "dataset_description": row.dataset_description,
+                "data_type": row.data_type,
+                "data_entries": []
+            }
+        
+        datasets[row.dataset_id]["data_entries"].append({
+            "td_id": row.td_id,
+            "data": row.data
+        })
+    
+    # Convert to list format
+    return list(datasets.values())
 
 def get_transcript_data_by_dataset(tid):
     """
@@ -282,34 +368,44 @@ def get_transcript_data_by_dataset(tid):
             FROM transcript_data td
             JOIN dataset d ON td.dataset_id = d.dataset_id
             WHERE td.tid = :tid
-            ORDER BY d.name
+            ORDER BY d.name, td.td_id
         """
         
         data_results = db.session.execute(text(transcript_data_query), {"tid": tid}).fetchall()
-        
-        datasets = {}
-        for row in data_results:
-            if row.dataset_id not in datasets:
-                datasets[row.dataset_id] = {
-                    "dataset_id": row.dataset_id,
-                    "dataset_name": row.dataset_name,
-                    "dataset_description": row.dataset_description,
-                    "data_type": row.data_type,
-                    "data_entries": []
-                }
-            
-            datasets[row.dataset_id]["data_entries"].append({
-                "td_id": row.td_id,
-                "data": row.data
-            })
-        
-        # Convert to list format
-        return list(datasets.values())
+        return organize_transcript_datasets(data_results)
         
     except Exception as e:
         print(f"Error fetching transcript data for tid {tid}: {e}")
         return []
 
+def get_transcript_data_by_datasets(tids):
+    """
+    Get the transcript data of several transcripts organized by dataset, with one query.
+    Returns: {tid: [dataset, ...], ...} in the format of get_transcript_data_by_dataset
+    """
+    if not tids:
+        return {}
+
+    transcript_data_query = text("""
+        SELECT 
+            td.tid,
+            td.td_id,
+            td.dataset_id,
+            td.data,
+            d.name as dataset_name,
+            d.description as dataset_description,
+            d.data_type
+        FROM transcript_data td
+        JOIN dataset d ON td.dataset_id = d.dataset_id
+        WHERE td.tid IN :tids
+        ORDER BY td.tid, d.name, td.td_id
+    """).bindparams(bindparam("tids", expanding=True))
+
+    rows_by_tid = {}
+    for row in db.session.execute(transcript_data_query, {"tids": list(tids)}):
+        rows_by_tid.setdefault(row.tid, []).append(row)
+    return {tid: organize_transcript_datasets(rows) for tid, rows in rows_by_tid.items()}
+
 def get_pdb_file(td_id):
     """
     Get the pdb file for a specific transcript data entry
@@ -347,20 +443,20 @@ def get_full_transcript_data(tid, transcript_id, sva_id, assembly_id, nomenclatu
         # Get transcript cross-reference
         tx_dbxref = db.session.execute(text("""
             SELECT txd.transcript_id, txd.start, txd.end, txd.type_value as transcript_type,
-                   txd.cds_start, txd.cds_end, txd.score, txd.sva_id
+                   txd.cds_start, txd.cds_end, txd.score, txd.sva_id, sva.sequence_version
             FROM tx_dbxref txd
+            JOIN source_version_assembly sva ON sva.sva_id = txd.sva_id
             WHERE txd.tid = :tid AND txd.transcript_id = :transcript_id AND txd.sva_id = :sva_id
         """), {"tid": tid, "transcript_id": transcript_id, "sva_id": sva_id}).fetchone()
         if not tx_dbxref:
             return {"success": False, "message": "Transcript ID not found for this transcript"}
 
         # Use unified coordinate chain
-        exon_chain = get_exon_chain(tid)
-        exon_chain = cut(exon_chain, tx_dbxref.start, tx_dbxref.end)
+        full_chain = get_exon_chain(tid)
+        exon_chain = cut(full_chain, tx_dbxref.start, tx_dbxref.end)
         cds_chain = []
         if tx_dbxref.cds_start and tx_dbxref.cds_end:
-            cds_chain = get_exon_chain(tid)
-            cds_chain = cut(cds_chain, tx_dbxref.cds_start, tx_dbxref.cds_end)
+            cds_chain = cut(full_chain, tx_dbxref.cds_start, tx_dbxref.cds_end)
 
         # Get attributes
         attributes_rows = db.session.execute(text("""
@@ -402,25 +498,71 @@ def get_full_transcript_data(tid, transcript_id, sva_id, assembly_id, nomenclatu
                 'data': row.data
             })
 
+        # sequences only change when the annotation is loaded again, which increments its sequence_version
+        sequence_cache = get_sequence_cache()
+        sequence_key = (tid, transcript_id, tx_dbxref.sva_id, nomenclature)
+        sequence_version = str(tx_dbxref.sequence_version)
+        sequences = sequence_cache.get(sequence_key, sequence_version)
+        if sequences is None:
+            sequences = get_transcript_sequences(assembly_id, nomenclature, transcript_base, exon_chain, cds_chain)
+            if not sequences["success"]:
+                return sequences
+            sequences = sequences["data"]
+            # extraction and translation failures are reported in place of the sequence and are not cached;
+            # only transcripts without a CDS have no protein sequence
+            if (isinstance(sequences["nt"], str) and isinstance(sequences["cds"], str)
+                    and (isinstance(sequences["aa"], str) or not sequences["cds"])):
+                sequence_cache.put(sequence_key, sequence_version, sequences)
+
+        return {
+            "success": True,
+            "data": {
+                'tid': tid,
+                'transcript_id': transcript_id,
+                'transcript_type': tx_dbxref.transcript_type,
+                'sequence_id': transcript_base.sequence_id,
+                'strand': bool(transcript_base.strand),
+                'coordinates': {'start': tx_dbxref.start, 'end': tx_dbxref.end},
+                'exons': exon_chain,
+                'cds': cds_chain,
+                'nt_sequence': sequences["nt"],
+                'cds_sequence': sequences["cds"],
+                'cds_aa_sequence': sequences["aa"],
+                'datasets': list(datasets.values()),
+                'attributes': attributes
+            }
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to fetch transcript data: {str(e)}"}
+
+def get_transcript_sequences(assembly_id, nomenclature, transcript_base, exon_chain, cds_chain):
+    """
+    Extract the nucleotide and CDS sequences of a transcript from the genome and translate the CDS.
+    Returns: {"success": True, "data": {"nt": ..., "cds": ..., "aa": ...}}
+    """
+    try:
         # get fasta file path
-        fasta_file_path = get_fasta_file(assembly_id, nomenclature)
-        if not fasta_file_path:
+        fasta_file = get_fasta_file(assembly_id, nomenclature)
+        if not fasta_file:
             return {"success": False, "message": "Failed to get fasta file"}
-        fasta_file_path = fasta_file_path['file_path'] + "/" + fasta_file_path['file_name']
+        fasta_file_path = fasta_file['file_path'] + "/" + fasta_file['file_name']
 
-        # get sequence id for given assembly and nomenclature
-        sequence_name = sequence_id_to_name(assembly_id, nomenclature, transcript_base.sequence_id)
+        # get the sequence name used inside the fasta file (virtual nomenclatures share the file of another one)
+        sequence_name = sequence_id_to_name(assembly_id, fasta_file['file_nomenclature'], transcript_base.sequence_id)
         if not sequence_name:
             return {"success": False, "message": "Failed to get sequence id"}
 
         # Get nucleotide sequence
         try:
-            nt_sequence = extract_transcript_sequence(fasta_file_path, sequence_name, exon_chain, bool(transcript_base.strand))
+            nt_sequence = extract_transcript_sequence(fasta_file_path, sequence_name, exon_chain, bool(transcript_base.strand),
+                                                      assembly_id, fasta_file['file_nomenclature'])
         except Exception as e:
             return {"success": False, "message": f"Failed to get nucleotide sequence: {str(e)}"}
 
         try:
-            cds_sequence = extract_transcript_sequence(fasta_file_path, sequence_name, cds_chain, bool(transcript_base.strand))
+            cds_sequence = extract_transcript_sequence(fasta_file_path, sequence_name, cds_chain, bool(transcript_base.strand),
+                                                      assembly_id, fasta_file['file_nomenclature'])
         except Exception as e:
             return {"success": False, "message": f"Failed to get CDS sequence: {str(e)}"}
 
@@ -428,22 +570,8 @@ def get_full_transcript_data(tid, transcript_id, sva_id, assembly_id, nomenclatu
 
         return {
             "success": True,
-            "data": {
-                'tid': tid,
-                'transcript_id': transcript_id,
-                'transcript_type': tx_dbxref.transcript_type,
-                'sequence_id': transcript_base.sequence_id,
-                'strand': bool(transcript_base.strand),
-                'coordinates': {'start': tx_dbxref.start, 'end': tx_dbxref.end},
-                'exons': exon_chain,
-                'cds': cds_chain,
-                'nt_sequence': nt_sequence,
-                'cds_sequence': cds_sequence,
-                'cds_aa_sequence': cds_aa_sequence,
-                'datasets': list(datasets.values()),
-                'attributes': attributes
-            }
+            "data": {"nt": nt_sequence, "cds": cds_sequence, "aa": cds_aa_sequence}
         }
 
     except Exception as e:
-        return {"success": False, "message": f"Failed to fetch transcript data: {str(e)}"}
+        return {"success": False, "message": f"Failed to get transcript sequences: {str(e)}"}
@@ -2,8 +2,9 @@ import os
 import subprocess
 from db.db import db
 from sqlalchemy import text
-from pyfaidx import Fasta, Sequence
+from pyfaidx import Sequence
 from Bio.Seq import Seq
+from db.methods.FastaHandlePool import get_fasta_handle_pool
 
 def extract_pdb_metadata(pdb_content):
     """Extract basic metadata from PDB file content"""
@@ -36,7 +37,7 @@ def get_fasta_file_for_tid(tid):
         result = db.session.execute(text("""
             SELECT 
                 gf.file_path,
-                gf.nomenclature,
+                COALESCE(gf.file_nomenclature, gf.nomenclature) AS nomenclature,
                 a.assembly_name,
                 a.assembly_id,
                 t.sequence_id
@@ -91,34 +92,27 @@ def get_fasta_file_for_tid(tid):
     except Exception as e:
         return {"success": False, "message": f"Failed to get fasta file: {str(e)}"}
 
-def extract_transcript_sequence(fasta_file_path, sequence_name, exons, strand):
+def extract_transcript_sequence(fasta_file_path, sequence_name, exons, strand, assembly_id=None, nomenclature=None):
     """
-    Extract the nucleotide sequence for a transcript from the genome fasta file using pyfaidx.
+    Extract the nucleotide sequence for a transcript from the genome fasta file.
+    The file is read through the process-wide pool of open readers (see FastaHandlePool),
+    keyed by the assembly and the nomenclature of the genome_file record the path comes from.
+    BGZF compressed genomes (.fasta.gz) are read with pysam through their .fai and .gzi indexes.
     """
     try:
         if not os.path.exists(fasta_file_path):
             return {"success": False, "message": "FASTA file not accessible"}
         
-        # Open the FASTA file with pyfaidx
-        fasta = Fasta(fasta_file_path,rebuild=False) # dpuiu 2026-05-16
-            
-        transcript_seq = ""
-        for exon_start, exon_end in exons:
-            try:
-                # pyfaidx uses 1-based coordinates by default, which matches your database
-                # But we need to be careful about the end coordinate (inclusive vs exclusive)
-                exon_seq = fasta[sequence_name][exon_start-1:exon_end]  # +1 because pyfaidx end is exclusive
-                transcript_seq += str(exon_seq)
-            except Exception as e:
-                return {"success": False, "message": f"Failed to get nucleotide sequence: {str(e)}"}
+        try:
+            exon_seqs = get_fasta_handle_pool().fetch(assembly_id, nomenclature, fasta_file_path, sequence_name, exons)
+        except Exception as e:
+            return {"success": False, "message": f"Failed to get nucleotide sequence: {str(e)}"}
+        transcript_seq = "".join(exon_seqs)
 
         # Apply reverse complement if on negative strand
         if strand == 0:  # negative strand
             # Use pyfaidx's built-in reverse complement
             transcript_seq = str(Sequence(transcript_seq).reverse.complement)
-
-        # Close the fasta file to free resources
-        fasta.close()
         
         return transcript_seq.upper()
         
@@ -135,6 +129,25 @@ def translate_sequence(sequence):
     except Exception as e:
         return None
 
+def build_exon_chain(start: int, end: int, introns: list) -> list:
+    """
+    This function builds the exon chain of a transcript from its span and introns.
+    
+    Parameters:
+    start (int): Start of the transcript.
+    end (int): End of the transcript.
+    introns (list): Introns of the transcript [(start1, end1), ...], sorted by start.
+    
+    Returns:
+    list: Exon segments [[start1, end1], [start2, end2], ...].
+    """
+    coords = [[start, None]]
+    for intron_start, intron_end in introns:
+        coords[-1][1] = intron_start
+        coords.append([intron_end, None])
+    coords[-1][1] = end
+    return coords
+
 def cut(chain: list, start: int, end: int) -> list:
     """
     This function cuts a chain of intervals to a specified start and end position.
@@ -1,11 +1,15 @@
+import os
 from sqlalchemy import text
-from db.db import db
+from db.db import db, remove_files_on_rollback, remove_files_after_commit
 from .queries import *
 from .utils import *
+from db.methods.JobProgress import JobProgress
+from db.methods.BulkWriter import BulkWriter
 
-def add_data_type(data_type, description):
+def add_data_type(data_type, description, is_numeric=False):
     """
     Add a new data type.
+    Values of datasets of numeric data types are also stored as numbers (transcript_data.value_num).
     """
     try:
         if data_type_exists(data_type):
@@ -15,12 +19,13 @@ def add_data_type(data_type, description):
             }
         
         query = text("""
-            INSERT INTO data_type (data_type, description)
-            VALUES (:data_type, :description)
+            INSERT INTO data_type (data_type, description, is_numeric)
+            VALUES (:data_type, :description, :is_numeric)
         """)
         result = db.session.execute(query, {
             'data_type': data_type,
-            'description': description
+            'description': description,
+            'is_numeric': bool(is_numeric)
         })
         return {
             "success": True,
@@ -88,7 +93,7 @@ def delete_data_type(data_type):
             "message": f"Failed to delete data type: {str(e)}"
         }
 
-def create_dataset(data):
+def create_dataset(data, progress=None):
     """
     Create a new dataset
     
@@ -99,7 +104,9 @@ def create_dataset(data):
             - data_type: Type of data in the dataset
             - sva_id: Source version assembly ID
             - file: TSV file with transcript data
+        progress: Optional JobProgress reporter when running as a background job
     """
+    progress = progress or JobProgress()
     try:
         # Insert the new dataset
         query = text("""
@@ -129,7 +136,8 @@ def create_dataset(data):
             dataset_id, 
             data['sva_id'], 
             data['data_type'], 
-            data['file']
+            data['file'],
+            progress
         )
         if not transcript_result['success']:
             return transcript_result
@@ -137,7 +145,9 @@ def create_dataset(data):
         return {
             "success": True,
             "dataset_id": dataset_id,
-            "message": "Dataset created successfully"
+            "processed_count": transcript_result["processed_count"],
+            "rejected_count": transcript_result["rejected_count"],
+            "message": f"Dataset created successfully. {transcript_result['message']}"
         }
         
     except Exception as e:
@@ -201,6 +211,9 @@ def delete_dataset(dataset_id):
         """)
         
         result = db.session.execute(query, {'dataset_id': dataset_id})
+
+        # the report goes with the dataset once the delete commits
+        remove_files_after_commit([dataset_rejects_path(dataset_id)])
         
         return {
             "success": True,
@@ -213,26 +226,27 @@ def delete_dataset(dataset_id):
             "message": f"Failed to delete dataset: {str(e)}"
         }
 
-def process_transcript_data(dataset_id, sva_id, data_type, file):
+def process_transcript_data(dataset_id, sva_id, data_type, file, progress=None):
     """
     Process transcript data from TSV file and insert into database
     
+    The file is read line by line and rows are written in batches through BulkWriter,
+    so the size of the file does not matter. Lines whose transcript ID is not part of the
+    source version assembly are skipped and listed in a rejects report (see dataset_rejects_path).
+    For numeric data types the values are also stored as numbers in value_num; lines whose
+    value is not a number are rejected.
+    
     Args:
         dataset_id: ID of the dataset
         sva_id: Source version assembly ID
         data_type: Type of data
-        file: TSV file object
+        file: TSV file object (FileStorage or StoredUpload)
+        progress: Optional JobProgress reporter
     """
+    progress = progress or JobProgress()
+    rejects_path = dataset_rejects_path(dataset_id)
+    rejected_count = 0
     try:
-        # Read the TSV file
-        content = file.read().decode('utf-8')
-        
-        if not content.strip():
-            return {
-                "success": False,
-                "message": "TSV file is empty"
-            }
-        
         # Get transcript IDs from tx_dbxref for the given SVA
         query = text("""
             SELECT tid, transcript_id 
@@ -243,57 +257,82 @@ def process_transcript_data(dataset_id, sva_id, data_type, file):
         result = db.session.execute(query, {'sva_id': sva_id})
         transcript_map = {row.transcript_id: row.tid for row in result}
         
-        # Process each line in the TSV file
-        lines = content.strip().split('\n')
+        writer = BulkWriter()
+        writer.add_table("transcript_data", ["tid", "sva_id", "transcript_id", "dataset_id", "data", "value_num"])
+        is_numeric = data_type_is_numeric(data_type)
+        
+        total_bytes = upload_size(file)
         processed_count = 0
+        progress.set_stage("Loading dataset values", 0)
         
-        for line in lines:
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
-            
-            # Split by tab
-            lcs = line.split('\t')
-            if len(lcs) < 2:
-                raise ValueError(f"Invalid line format: {line}")
-            
-            transcript_id = lcs[0].strip()
-            data_value = lcs[1].strip()
-            
-            # Skip if transcript_id is not found in tx_dbxref
-            if transcript_id not in transcript_map:
-                print(f"Warning: Transcript ID not found: {transcript_id}. Skipping.")
-                continue
+        # the report belongs to the dataset row: it is removed if the transaction creating the row rolls back
+        remove_files_on_rollback([rejects_path])
+        with open(rejects_path, 'w') as rejectsFP:
+            rejectsFP.write("line\ttranscript_id\treason\n")
+            for line_number, bytes_read, line in iter_upload_lines(file):
+                if line_number % 10000 == 0:
+                    progress.update(percent=100 * bytes_read / total_bytes if total_bytes else None, rows_written=processed_count)
 
-            tid = transcript_map[transcript_id]
-            
-            # Insert transcript data
-            insert_query = text("""
-                INSERT INTO transcript_data (
-                    tid, sva_id, transcript_id, dataset_id, data
-                ) VALUES (
-                    :tid, :sva_id, :transcript_id, :dataset_id, :data
-                )
-            """)
-            
-            result = db.session.execute(insert_query, {
-                'tid': tid,
-                'sva_id': sva_id,
-                'transcript_id': transcript_id,
-                'dataset_id': dataset_id,
-                'data': data_value
-            })
-            if result.rowcount == 0:
-                raise ValueError(f"Failed to insert transcript data for transcript_id: {transcript_id}")
-            processed_count += 1
+                line = line.strip()
+                if not line:  # Skip empty lines
+                    continue
+                
+                # Split by tab
+                lcs = line.split('\t')
+                if len(lcs) < 2:
+                    raise ValueError(f"Invalid line format at line {line_number}: {line}")
+                
+                transcript_id = lcs[0].strip()
+                data_value = lcs[1].strip()
+                
+                # Skip if transcript_id is not found in tx_dbxref
+                if transcript_id not in transcript_map:
+                    rejectsFP.write(f"{line_number}\t{transcript_id}\ttranscript ID not found in source version assembly {sva_id}\n")
+                    rejected_count += 1
+                    continue
+
+                value_num = None
+                if is_numeric:
+                    value_num = parse_numeric_value(data_value)
+                    if value_num is None:
+                        rejectsFP.write(f"{line_number}\t{transcript_id}\tvalue '{data_value}' is not a number\n")
+                        rejected_count += 1
+                        continue
+                
+                writer.add("transcript_data", {
+                    'tid': transcript_map[transcript_id],
+                    'sva_id': sva_id,
+                    'transcript_id': transcript_id,
+                    'dataset_id': dataset_id,
+                    'data': data_value,
+                    'value_num': value_num
+                })
+                processed_count += 1
+        
+        writer.close()
+        
+        if processed_count == 0 and rejected_count == 0:
+            raise ValueError("TSV file is empty")
+        # a dataset without values belongs to no annotation and could never be shown
+        if processed_count == 0:
+            raise ValueError(f"All {rejected_count} lines were rejected, no values match the annotation")
+        
+        if rejected_count == 0:
+            os.remove(rejects_path)
+        else:
+            print(f"{rejected_count} lines of dataset {dataset_id} were rejected, see {rejects_path}")
         
         return {
             "success": True,
-            "message": f"Transcript data processed successfully. {processed_count} entries inserted."
+            "processed_count": processed_count,
+            "rejected_count": rejected_count,
+            "message": f"Transcript data processed successfully. {processed_count} entries inserted, {rejected_count} lines rejected."
         }
         
     except Exception as e:
+        if os.path.exists(rejects_path):
+            os.remove(rejects_path)
         return {
             "success": False,
             "message": f"Failed to process transcript data: {str(e)}"
-        }
\ No newline at end of file
+        }
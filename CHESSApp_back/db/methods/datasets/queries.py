@@ -1,5 +1,7 @@
-from sqlalchemy import text
+import os
+from sqlalchemy import text, bindparam
 from db.db import db
+from .utils import *
 
 def get_all_datasets():
     """
@@ -80,6 +82,23 @@ def dataset_exists_by_id(dataset_id: int):
     except Exception as e:
         return False
 
+def is_dataset_public(dataset_id: int) -> bool:
+    """
+    Check that a dataset is shown on the public site: it exists and the source version assembly
+    its values belong to has completed loading (see sources.queries.is_sva_public).
+    A dataset's values all belong to the source version assembly it was created for.
+    """
+    try:
+        result = db.session.execute(text("""
+            SELECT COUNT(*) FROM dataset d
+            JOIN source_version_assembly sva
+              ON sva.sva_id = (SELECT td.sva_id FROM transcript_data td WHERE td.dataset_id = d.dataset_id LIMIT 1)
+            WHERE d.dataset_id = :dataset_id AND sva.load_status = 'complete'
+        """), {"dataset_id": dataset_id}).fetchone()
+        return result[0] > 0
+    except Exception as e:
+        return False
+
 def data_type_exists(data_type: str):
     try:
         result = db.session.execute(text("""
@@ -89,10 +108,19 @@ def data_type_exists(data_type: str):
     except Exception as e:
         return False
 
+def data_type_is_numeric(data_type: str):
+    try:
+        result = db.session.execute(text("""
+            SELECT is_numeric FROM data_type WHERE data_type = :data_type
+        """), {"data_type": data_type}).fetchone()
+        return bool(result and result.is_numeric)
+    except Exception as e:
+        return False
+
 def get_all_data_types():
     try:
         query = text("""
-            SELECT data_type, description
+            SELECT data_type, description, is_numeric
             FROM data_type
             ORDER BY data_type
         """)
@@ -103,7 +131,8 @@ def get_all_data_types():
         for row in result:
             data_types.append({
                 "data_type": row.data_type,
-                "description": row.description
+                "description": row.description,
+                "is_numeric": bool(row.is_numeric)
             })
         
         return {
@@ -115,4 +144,165 @@ def get_all_data_types():
         return {
             "success": False,
             "message": f"Failed to get data types: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+def get_dataset_rejects_file(dataset_id):
+    """
+    Get the report of TSV lines that were not loaded into a dataset
+    """
+    file_path = dataset_rejects_path(dataset_id)
+    if not os.path.exists(file_path):
+        return {
+            "success": False,
+            "message": "No rejected lines were recorded for this dataset"
+        }
+
+    return {
+        "success": True,
+        "file_path": os.path.dirname(file_path),
+        "file_name": os.path.basename(file_path),
+        "friendly_file_name": f"dataset_{dataset_id}_rejects.tsv"
+    }
+
+# ============================================================================
+# NUMERIC DATASET VALUES
+# ============================================================================
+# Datasets of numeric data types have their values in transcript_data.value_num.
+# The (dataset_id, value_num) index serves the ordering, range and quantile
+# queries below without reading the rest of the table.
+
+def get_dataset_top_transcripts(dataset_id, limit=10, order='desc'):
+    """
+    Get the transcripts of a numeric dataset with the highest (or lowest) values
+    """
+    try:
+        direction = 'ASC' if order.lower() == 'asc' else 'DESC'
+        result = db.session.execute(text(f"""
+            SELECT td_id, tid, sva_id, transcript_id, value_num
+            FROM transcript_data
+            WHERE dataset_id = :dataset_id AND value_num IS NOT NULL
+            ORDER BY value_num {direction}, td_id
+            LIMIT :limit
+        """), {"dataset_id": dataset_id, "limit": limit})
+
+        return {
+            "success": True,
+            "data": [organize_value_row(row) for row in result]
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Failed to get top transcripts: {str(e)}"
+        }
+
+def get_dataset_values_in_range(dataset_id, min_value=None, max_value=None, page=1, per_page=100):
+    """
+    Get the transcripts of a numeric dataset whose value lies within [min_value, max_value],
+    ordered by value. Either bound may be omitted.
+    """
+    try:
+        conditions = ["dataset_id = :dataset_id", "value_num IS NOT NULL"]
+        params = {"dataset_id": dataset_id}
+        if min_value is not None:
+            conditions.append("value_num >= :min_value")
+            params["min_value"] = min_value
+        if max_value is not None:
+            conditions.append("value_num <= :max_value")
+            params["max_value"] = max_value
+        where_clause = "WHERE " + " AND ".join(conditions)
+
+        total_count = db.session.execute(text(f"""
+            SELECT COUNT(*) FROM transcript_data {where_clause}
+        """), params).scalar() or 0
+
+        params.update({"per_page": per_page, "offset": (page - 1) * per_page})
+        result = db.session.execute(text(f"""
+            SELECT td_id, tid, sva_id, transcript_id, value_num
+            FROM transcript_data
+            {where_clause}
+            ORDER BY value_num, td_id
+            LIMIT :per_page OFFSET :offset
+        """), params)
+
+        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
+        return {
+            "success": True,
+            "data": [organize_value_row(row) for row in result],
+            "pagination": {
+                "current_page": page,
+                "per_page": per_page,
+                "total_count": total_count,
+                "total_pages": total_pages,
+                "has_next": page < total_pages,
+                "has_prev": page > 1
+            }
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Failed to get dataset values: {str(e)}"
+        }
+
+def get_dataset_quantiles(dataset_id, quantiles=(0.0, 0.25, 0.5, 0.75, 1.0)):
+    """
+    Get quantiles of the values of a numeric dataset.
+    Each quantile is interpolated linearly between the two closest ranks. The values at
+    all the ranks needed are read in one ordered pass along the (dataset_id, value_num) index.
+    """
+    try:
+        for quantile in quantiles:
+            if not 0 <= quantile <= 1:
+                return {
+                    "success": False,
+                    "message": f"Quantile {quantile} is not between 0 and 1"
+                }
+
+        count = db.session.execute(text("""
+            SELECT COUNT(*) FROM transcript_data
+            WHERE dataset_id = :dataset_id AND value_num IS NOT NULL
+        """), {"dataset_id": dataset_id}).scalar() or 0
+        if count == 0:
+            return {
+                "success": False,
+                "message": "Dataset has no numeric values"
+            }
+
+        positions = {quantile: quantile * (count - 1) for quantile in quantiles}
+        ranks = set()
+        for position in positions.values():
+            ranks.add(int(position))
+            ranks.add(min(int(position) + 1, count - 1))
+
+        result = db.session.execute(text("""
+            SELECT value_rank, value_num FROM (
+                SELECT value_num, ROW_NUMBER() OVER (ORDER BY value_num) - 1 AS value_rank
+                FROM transcript_data
+                WHERE dataset_id = :dataset_id AND value_num IS NOT NULL
+            ) ranked
+            WHERE value_rank IN :ranks
+        """).bindparams(bindparam("ranks", expanding=True)), {"dataset_id": dataset_id, "ranks": sorted(ranks)})
+        rank_values = {int(row.value_rank): row.value_num for row in result}
+
+        values = {}
+        for quantile, position in positions.items():
+            offset = int(position)
+            value = rank_values[offset]
+            if offset + 1 < count:
+                value += (rank_values[offset + 1] - value) * (position - offset)
+            values[str(quantile)] = value
+
+        return {
+            "success": True,
+            "data": {
+                "count": count,
+                "quantiles": values
+            }
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Failed to get dataset quantiles: {str(e)}"
+        }
@@ -1,5 +1,66 @@
-from sqlalchemy import text
-from db.db import db
-from db.methods.datasets.admin import *
-from db.methods.datasets.queries import *
-from db.methods.datasets.utils import *
\ No newline at end of file
+import os
+import math
+from contextlib import contextmanager
+from db.db import get_dataset_files_dir
+
+def dataset_rejects_path(dataset_id):
+    """
+    Path of the report listing the lines of a dataset TSV that could not be loaded.
+    """
+    return os.path.join(get_dataset_files_dir(), f"{dataset_id}_rejects.tsv")
+
+def upload_size(file):
+    """
+    Size in bytes of an uploaded file if it is known, None otherwise.
+    """
+    size = getattr(file, "size", None)
+    if size is None and getattr(file, "file_path", None):
+        size = os.path.getsize(file.file_path)
+    if size is None:
+        size = getattr(file, "content_length", None) or None
+    return size
+
+@contextmanager
+def open_upload(file):
+    """
+    Opens an upload for reading in binary mode: the request stream of a FileStorage,
+    or the file saved on disk for a StoredUpload.
+    """
+    if getattr(file, "file_path", None):
+        with open(file.file_path, "rb") as inFP:
+            yield inFP
+    else:
+        yield file.stream
+
+def iter_upload_lines(file):
+    """
+    Yields (line number, bytes read so far, line) for each line of an uploaded text file
+    without loading the whole file into memory.
+    """
+    bytes_read = 0
+    with open_upload(file) as inFP:
+        for line_number, raw_line in enumerate(inFP, start=1):
+            bytes_read += len(raw_line)
+            yield line_number, bytes_read, raw_line.decode('utf-8')
+
+def parse_numeric_value(value):
+    """
+    Parses the value of a numeric dataset. Returns None if it is not a finite number.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+def organize_value_row(row):
+    """
+    Convert a transcript_data row of a numeric dataset into a dictionary
+    """
+    return {
+        "td_id": row.td_id,
+        "tid": row.tid,
+        "sva_id": row.sva_id,
+        "transcript_id": row.transcript_id,
+        "value": row.value_num
+    }
@@ -4,12 +4,19 @@ import tempfile
 from sqlalchemy import text
 from werkzeug.utils import secure_filename
 
+from config import Config
 from db.db import db
 from .queries import *
 from db.methods.utils import *
 from .utils import *
 from ..TempFileManager import get_temp_file_manager
-from db.db import get_fasta_files_dir, get_source_files_dir, to_relative_path, to_absolute_path
+from ..JobProgress import JobProgress
+from ..SourceFileBuilder import prepare_source_files_from_gtf, source_file_descriptions
+from ..SourceFileCache import SourceFileCache, MARKER_SUFFIX
+from ..UploadCache import save_upload
+from ..BulkWriter import BulkWriter
+from ..FastaHandlePool import get_fasta_handle_pool
+from db.db import get_fasta_files_dir, get_source_files_dir, to_relative_path, to_absolute_path, remove_files_on_rollback, remove_files_after_commit
 
 # ============================================================================
 # ORGANISM
@@ -138,42 +145,56 @@ def delete_assembly(assembly_id):
         if not assembly or len(assembly) == 0:
             return {"success": False, "message": "Assembly not found"}
 
+        genome_file_paths = [row.file_path for row in db.session.execute(text("""
+            SELECT file_path FROM genome_file WHERE assembly_id = :assembly_id
+        """), {"assembly_id": assembly_id})]
+
         # Delete assembly
         db.session.execute(text("""
             DELETE FROM assembly WHERE assembly_id = :assembly_id
         """), {"assembly_id": assembly_id})
+        remove_unreferenced_genome_files(genome_file_paths)
+        get_fasta_handle_pool().invalidate(assembly_id)
         
         return {"success": True, "message": "Assembly deleted successfully"}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
-def process_fasta_file(assembly_id, nomenclature, file):
+def process_fasta_file(assembly_id, nomenclature, file, progress=None):
     """
     Processes a FASTA file upload for an assembly.
     Optimized for large files with better error handling.
     """
-    
+    progress = progress or JobProgress()
+    temp_fasta_path = None
+    absolute_file_path = None
+    created = False
     try:
         assembly = get_assembly(assembly_id)
         if not assembly or len(assembly) == 0:
             return {"success": False, "message": "Assembly not found"}
         
-        safe_filename = f"{assembly.taxonomy_id}_{assembly_id}_{nomenclature}.fasta"
-        absolute_file_path = os.path.join(get_fasta_files_dir(), safe_filename)
-        file.save(absolute_file_path)
+        progress.set_stage("Saving FASTA file", 0)
+        temp_manager = get_temp_file_manager()
+        with temp_manager.managed_temp_file(name='fasta_upload') as temp_fasta_path:
+            upload = save_upload(file, temp_fasta_path)
         
         try:
-            fasta_index = validate_and_index_fasta(absolute_file_path)
-            
-            if not fasta_index:
-                raise Exception("No valid sequences found in FASTA file")
+            # files are stored by content - an identical genome that is already stored is reused with its index
+            progress.set_stage("Indexing FASTA file", 30)
+            absolute_file_path, created = store_genome_fasta(temp_fasta_path, upload["sha256"])
             
+            # sequences are registered as they are read from the index
+            progress.set_stage("Registering sequences", 70)
             nomenclature_result = insert_nomenclature(nomenclature, assembly_id)
-            sequence_count = create_sequence_entries(assembly_id, fasta_index, nomenclature)
+            sequence_count = create_sequence_entries(assembly_id, iter_fasta_index(absolute_file_path), nomenclature)
+            if sequence_count == 0:
+                raise Exception("No valid sequences found in FASTA file")
+            progress.update(rows_written=2 * sequence_count)
             
             # Store relative path in database for backup portability
             relative_file_path = to_relative_path(absolute_file_path)
-            file_record_id = insert_genome_file(assembly_id, relative_file_path, nomenclature)
+            file_record_id = insert_genome_file(assembly_id, relative_file_path, nomenclature, upload["sha256"], upload["size"])
             
             print(f"Successfully processed {sequence_count} sequences")
             
@@ -182,7 +203,9 @@ def process_fasta_file(assembly_id, nomenclature, file):
                 "message": f"FASTA file processed successfully. {sequence_count} sequences added.",
                 "file_id": file_record_id,
                 "nomenclature": nomenclature_result,
-                "sequence_count": sequence_count
+                "sequence_count": sequence_count,
+                "content_hash": upload["sha256"],
+                "reused_existing_file": not created
             }
             
         except Exception as e:
@@ -190,10 +213,133 @@ def process_fasta_file(assembly_id, nomenclature, file):
             raise e
             
     except Exception as e:
-        if 'absolute_file_path' in locals() and os.path.exists(absolute_file_path):
-            os.remove(absolute_file_path)
+        # a file shared with other genome records is kept
+        if created:
+            remove_fasta_files(absolute_file_path)
+        if temp_fasta_path is not None:
+            get_temp_file_manager().cleanup_file(temp_fasta_path)
         return {"success": False, "message": str(e)}
 
+def store_genome_fasta(fasta_path, sha256):
+    """
+    Moves a FASTA file to its content-addressed location and indexes it.
+    If a file with the same content is already stored, the new copy is discarded and the stored one is used.
+
+    Compressed uploads are kept compressed: BGZF files are stored as they are and indexed with
+    .fai and .gzi, plain gzip files are recompressed to BGZF first so they can be read randomly.
+    With Config.GENOME_STORAGE_FORMAT set to "bgzf", uncompressed uploads are compressed as well.
+    
+    Returns:
+        Tuple of the stored path and whether the file was newly stored
+    """
+    compression = detect_compression(fasta_path)
+    compress = compression is not None or Config.GENOME_STORAGE_FORMAT == "bgzf"
+    stored_path = content_addressed_fasta_path(get_fasta_files_dir(), sha256, compressed=compress)
+    if os.path.exists(stored_path) and all(os.path.exists(index_path) for index_path in fasta_index_paths(stored_path)):
+        os.remove(fasta_path)
+        return stored_path, False
+    
+    if compress and compression != "bgzf":
+        bgzip_file(fasta_path, stored_path, compressed=compression == "gzip")
+        os.remove(fasta_path)
+    else:
+        os.replace(fasta_path, stored_path)
+    index_fasta(stored_path)
+    return stored_path, True
+
+def remove_fasta_files(fasta_path):
+    """
+    Removes a FASTA file and its indexes from disk.
+    """
+    for file_path in [fasta_path] + fasta_index_paths(fasta_path):
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                print(f"Warning: Could not delete file {file_path}: {str(e)}")
+
+def remove_unreferenced_genome_files(relative_file_paths):
+    """
+    Removes FASTA files that are no longer referenced by any genome_file record, once the
+    current transaction commits. Content-addressed files may be shared by several assemblies
+    and nomenclatures.
+    """
+    for relative_file_path in set(relative_file_paths):
+        references = db.session.execute(text("""
+            SELECT COUNT(*) FROM genome_file WHERE file_path = :file_path
+        """), {"file_path": relative_file_path}).scalar()
+        if references == 0:
+            fasta_path = to_absolute_path(relative_file_path)
+            remove_files_after_commit([fasta_path] + fasta_index_paths(fasta_path))
+
+def compress_genome_files(assembly_id=None, progress=None):
+    """
+    Converts stored uncompressed genomes to BGZF with .fai and .gzi indexes.
+
+    Each file is compressed next to the original, checked against the original index and then
+    swapped in for every genome_file record using it. The change is committed per file before
+    the uncompressed copy is removed, so an interrupted conversion can simply be run again.
+
+    Args:
+        assembly_id: Optional assembly to limit the conversion to
+        progress: Optional JobProgress
+
+    Returns:
+        Dictionary with success status and the number of files converted
+    """
+    progress = progress or JobProgress()
+    try:
+        query = "SELECT file_path, MAX(content_hash) AS content_hash FROM genome_file"
+        params = {}
+        if assembly_id is not None:
+            query += " WHERE assembly_id = :assembly_id"
+            params["assembly_id"] = assembly_id
+        query += " GROUP BY file_path"
+        rows = [row for row in db.session.execute(text(query), params) if not row.file_path.endswith('.gz')]
+
+        converted = 0
+        saved_bytes = 0
+        for i, row in enumerate(rows):
+            progress.set_stage(f"Compressing genome {i + 1} of {len(rows)}", 100.0 * i / max(len(rows), 1))
+            fasta_path = to_absolute_path(row.file_path)
+            if not os.path.exists(fasta_path):
+                print(f"Warning: Genome file not found, skipping: {fasta_path}")
+                continue
+
+            sha256 = row.content_hash or file_sha256(fasta_path)
+            stored_path = content_addressed_fasta_path(get_fasta_files_dir(), sha256, compressed=True)
+            if not (os.path.exists(stored_path) and all(os.path.exists(index_path) for index_path in fasta_index_paths(stored_path))):
+                partial_path = stored_path + '.partial'
+                bgzip_file(fasta_path, partial_path, compressed=False)
+                os.replace(partial_path, stored_path)
+                if validate_and_index_fasta(stored_path) != read_fasta_index(fasta_path):
+                    remove_fasta_files(stored_path)
+                    raise Exception(f"Compressed genome does not match the index of {fasta_path}")
+
+            db.session.execute(text("""
+                UPDATE genome_file SET file_path = :new_file_path, content_hash = COALESCE(content_hash, :content_hash)
+                WHERE file_path = :file_path
+            """), {"new_file_path": to_relative_path(stored_path), "content_hash": sha256, "file_path": row.file_path})
+            db.session.commit()
+
+            saved_bytes += os.path.getsize(fasta_path) - os.path.getsize(stored_path)
+            remove_fasta_files(fasta_path)
+            converted += 1
+
+        # open readers of this process still point at the removed files
+        get_fasta_handle_pool().invalidate(assembly_id)
+
+        return {
+            "success": True,
+            "message": f"Compressed {converted} genome files ({saved_bytes / 1024**3:.2f} GB saved)",
+            "converted": converted,
+            "saved_bytes": saved_bytes
+        }
+
+    except Exception as e:
+        db.session.rollback()
+        return {"success": False, "message": f"Failed to compress genome files: {str(e)}"}
+
 def insert_nomenclature(nomenclature, assembly_id):
     """
     Inserts nomenclature into the nomenclature table.
@@ -220,48 +366,102 @@ def insert_nomenclature(nomenclature, assembly_id):
 def create_sequence_entries(assembly_id, sequences, nomenclature):
     """
     Creates entries in sequence_id and sequence_id_map tables using bulk operations.
-    Optimized for large datasets by processing in chunks.
+    The sequence IDs are reserved as one block up front and both tables are written in
+    multi-row batches, so assemblies with hundreds of thousands of scaffolds are registered
+    with a few statements per batch instead of two per sequence.
+
+    sequences is a dictionary of sequence name -> length or an iterable of (name, length) pairs
+    such as iter_fasta_index(). Returns the number of sequences registered.
     """
     try:
-        for sequence_name, sequence_length in sequences.items():
-            result = db.session.execute(text("""
-                INSERT INTO sequence_id (assembly_id, length)
-                VALUES (:assembly_id, :length)
-            """), {
+        id_block_size = None
+        if isinstance(sequences, dict):
+            id_block_size = len(sequences) or None
+            sequences = sequences.items()
+
+        writer = BulkWriter(id_block_size=id_block_size)
+        # parents first: sequence_id_map rows reference sequence_id
+        writer.add_table("sequence_id", ["sequence_id", "assembly_id", "length"])
+        writer.add_table("sequence_id_map", ["assembly_id", "sequence_id", "nomenclature", "sequence_name"])
+
+        sequence_count = 0
+        for sequence_name, sequence_length in sequences:
+            sequence_id = writer.next_id("sequence_id", "sequence_id")
+            writer.add("sequence_id", {
+                "sequence_id": sequence_id,
                 "assembly_id": assembly_id,
                 "length": sequence_length
             })
-            
-            # Get the auto-generated sequence_id
-            sequence_id = result.lastrowid
-
-            db.session.execute(text("""
-                INSERT INTO sequence_id_map (assembly_id, sequence_id, nomenclature, sequence_name)
-                VALUES (:assembly_id, :sequence_id, :nomenclature, :sequence_name)
-            """), {
+            writer.add("sequence_id_map", {
                 "assembly_id": assembly_id,
                 "sequence_id": sequence_id,
                 "nomenclature": nomenclature,
                 "sequence_name": sequence_name
             })
+            sequence_count += 1
+        writer.flush()
 
-        return len(sequences)
+        return sequence_count
 
     except Exception as e:
         raise Exception(f"Error creating sequence entries: {str(e)}")
 
-def insert_genome_file(assembly_id, file_path, nomenclature):
+def create_nomenclature_mappings(assembly_id, source_nomenclature, new_nomenclature, mapping_file_path):
+    """
+    Writes the sequence_id_map rows of a new nomenclature from a mapping TSV file.
+    The file is read as a stream and rows are written in batches as they are read.
+
+    Returns the names of the source nomenclature that the file leaves unmapped.
+    """
+    source_ids = get_sequence_ids(assembly_id, source_nomenclature)
+    if not source_ids["success"]:
+        raise Exception(source_ids["message"])
+    source_ids = source_ids["data"]
+
+    writer = BulkWriter()
+    writer.add_table("sequence_id_map", ["assembly_id", "sequence_id", "nomenclature", "sequence_name"])
+
+    mapped_names = set()
+    missing_ids = []
+    for line_num, source_id, new_id in iter_nomenclature_mapping(mapping_file_path):
+        if source_id in mapped_names:
+            raise Exception(f"Duplicate source ID '{source_id}' at line {line_num}")
+        if source_id not in source_ids:
+            missing_ids.append(source_id)
+            continue
+        mapped_names.add(source_id)
+        writer.add("sequence_id_map", {
+            "assembly_id": assembly_id,
+            "sequence_id": source_ids[source_id],
+            "nomenclature": new_nomenclature,
+            "sequence_name": new_id
+        })
+
+    # Validate that all source IDs in TSV exist in the source nomenclature
+    if missing_ids:
+        raise Exception(f"Source IDs not found in '{source_nomenclature}': {', '.join(missing_ids[:10])}{'...' if len(missing_ids) > 10 else ''}")
+    if not mapped_names:
+        raise Exception("No valid mappings found in TSV file")
+    writer.flush()
+
+    return set(source_ids) - mapped_names
+
+def insert_genome_file(assembly_id, file_path, nomenclature, content_hash=None, file_size=None, file_nomenclature=None):
     """
     Inserts file path into genome_file table.
+    file_nomenclature is set for virtual nomenclatures, which share the FASTA of another nomenclature.
     """
     try:
         result = db.session.execute(text("""
-            INSERT INTO genome_file (assembly_id, nomenclature, file_path)
-            VALUES (:assembly_id, :nomenclature, :file_path)
+            INSERT INTO genome_file (assembly_id, nomenclature, file_path, content_hash, file_size, file_nomenclature)
+            VALUES (:assembly_id, :nomenclature, :file_path, :content_hash, :file_size, :file_nomenclature)
         """), {
             "assembly_id": assembly_id,
             "nomenclature": nomenclature,
-            "file_path": file_path
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "file_size": file_size,
+            "file_nomenclature": file_nomenclature
         })
         
         return result.lastrowid
@@ -281,6 +481,28 @@ def remove_nomenclature_from_assembly(assembly_id, nomenclature):
         if not nomenclature_exists(nomenclature, assembly_id):
             return {"success": False, "message": "Nomenclature not found for this assembly"}
 
+        # virtual nomenclatures translate the sequence names of the shared FASTA through this one
+        dependents = [row.nomenclature for row in db.session.execute(text("""
+            SELECT nomenclature FROM genome_file
+            WHERE assembly_id = :assembly_id AND file_nomenclature = :nomenclature
+        """), {
+            "assembly_id": assembly_id,
+            "nomenclature": nomenclature
+        })]
+        if dependents:
+            return {"success": False, "message": f"Nomenclature '{nomenclature}' provides the sequence names of the genome used by: {', '.join(dependents)}. Remove those nomenclatures first"}
+
+        # source files of other nomenclatures built on request are generated from this one's
+        dependents = [row.nomenclature for row in db.session.execute(text("""
+            SELECT DISTINCT nomenclature FROM source_file
+            WHERE assembly_id = :assembly_id AND built_from = :nomenclature
+        """), {
+            "assembly_id": assembly_id,
+            "nomenclature": nomenclature
+        })]
+        if dependents:
+            return {"success": False, "message": f"Annotation files of nomenclatures {', '.join(dependents)} are generated from '{nomenclature}'. Remove those nomenclatures first"}
+
         # Get genome file info before deletion for file cleanup
         genome_fasta_file = db.session.execute(text("""
             SELECT file_path FROM genome_file 
@@ -301,30 +523,15 @@ def remove_nomenclature_from_assembly(assembly_id, nomenclature):
             "nomenclature": nomenclature
         })
         
-        # Clean up the actual file from disk
+        # Clean up the actual file from disk unless another genome record shares it
         if genome_fasta_file and genome_fasta_file.file_path:
-            # Resolve relative path to absolute path
-            genome_fasta_file_path = to_absolute_path(genome_fasta_file.file_path)
-            genome_fasta_fai_file_path = genome_fasta_file_path + ".fai"
-            if os.path.exists(genome_fasta_file_path):
-                try:
-                    os.remove(genome_fasta_file_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete file {genome_fasta_file_path}: {str(e)}")
-            if os.path.exists(genome_fasta_fai_file_path):
-                try:
-                    os.remove(genome_fasta_fai_file_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete file {genome_fasta_fai_file_path}: {str(e)}")
+            remove_unreferenced_genome_files([genome_fasta_file.file_path])
+        get_fasta_handle_pool().invalidate(assembly_id, nomenclature)
 
         for source_file in source_files["data"]:
             # Resolve relative path to absolute path
             file_path = to_absolute_path(source_file.file_path)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete file {file_path}: {str(e)}")
+            remove_files_after_commit([file_path, file_path + MARKER_SUFFIX])
         
         return {
             "success": True,
@@ -355,67 +562,33 @@ def process_nomenclature_tsv(source_file, assembly_id, source_nomenclature, new_
             source_file.save(temp_file_path)
         
         try:
-            mapping = load_nomenclature_mapping(temp_file_path)
-            if not mapping:
-                return {"success": False, "message": "No valid mappings found in TSV file"}
-            
-            # Get existing sequence mappings for source nomenclature
-            existing_nomenclatures = get_nomenclatures(assembly_id)
-            existing_names = {row["sequence_name"] for row in existing_nomenclatures["data"][assembly_id]}
-            
-            # Validate that all source IDs in TSV exist in the source nomenclature
-            missing_ids = set(mapping.keys()) - existing_names
-            if missing_ids:
-                return {"success": False, "message": f"Source IDs not found in '{source_nomenclature}': {', '.join(list(missing_ids)[:10])}{'...' if len(missing_ids) > 10 else ''}"}
-            
             # Insert new nomenclature if it doesn't exist globally
             insert_nomenclature(new_nomenclature,assembly_id)
             
             # Create new sequence mappings
-            for row in existing_nomenclatures["data"][assembly_id]:
-                if row["sequence_name"] in mapping:
-                    # Insert new nomenclature mapping
-                    db.session.execute(text("""
-                        INSERT INTO sequence_id_map (assembly_id, sequence_id, nomenclature, sequence_name)
-                        VALUES (:assembly_id, :sequence_id, :nomenclature, :sequence_name)
-                    """), {
-                        "assembly_id": assembly_id,
-                        "sequence_id": row["sequence_id"],
-                        "nomenclature": new_nomenclature,
-                        "sequence_name": mapping[row["sequence_name"]]
-                    })
-
-            # lastly we need to create a version of the fasta file with the new nomenclature names and add it to the genome_file table
-            # get the fasta file for the source nomenclature
+            # the rows are written as the TSV is read; on failure the caller rolls them back
+            unmapped = create_nomenclature_mappings(assembly_id, source_nomenclature, new_nomenclature, temp_file_path)
+
+            # lastly the new nomenclature gets the genome of the source nomenclature
+            # the file is shared, not copied: indexes and sequence lookups translate the names through sequence_id_map
             fasta_file = db.session.execute(text("""
-                SELECT file_path FROM genome_file WHERE assembly_id = :assembly_id AND nomenclature = :nomenclature
+                SELECT file_path, content_hash, file_size, COALESCE(file_nomenclature, nomenclature) AS file_nomenclature
+                FROM genome_file WHERE assembly_id = :assembly_id AND nomenclature = :nomenclature
             """), {
                 "assembly_id": assembly_id,
                 "nomenclature": source_nomenclature
             }).fetchone()
             
             if fasta_file:
-                # Create new FASTA file with new nomenclature names
                 # Resolve relative path from DB to absolute path
                 source_file_path = to_absolute_path(fasta_file.file_path)
                 if os.path.exists(source_file_path):
-                    # Create new filename for the new nomenclature
-                    new_filename = f"{assembly.taxonomy_id}_{assembly_id}_{new_nomenclature}.fasta"
-                    new_full_path = os.path.join(get_fasta_files_dir(), new_filename)
-                    
-                    translate_fasta_file(source_file_path, new_full_path, mapping)
-                    validate_and_index_fasta(new_full_path)
-                    
-                    # Store relative path in database
-                    relative_new_path = to_relative_path(new_full_path)
-                    db.session.execute(text("""
-                        INSERT INTO genome_file (assembly_id, nomenclature, file_path)
-                        VALUES (:assembly_id, :nomenclature, :file_path)
-                    """), {
-                        "assembly_id": assembly_id,
-                        "nomenclature": new_nomenclature,
-                        "file_path": relative_new_path
-                    })
+                    # every sequence of the genome needs a name in the new nomenclature
+                    if unmapped:
+                        raise Exception(f"Sequence ID {sorted(unmapped)[0]} not found in mapping")
+
+                    insert_genome_file(assembly_id, fasta_file.file_path, new_nomenclature,
+                                       fasta_file.content_hash, fasta_file.file_size, fasta_file.file_nomenclature)
                 else:
                     return {"success": False, "message": f"Source FASTA file not found: {source_file_path}"}
             else:
@@ -424,54 +597,48 @@ def process_nomenclature_tsv(source_file, assembly_id, source_nomenclature, new_
             # need to check any files that are associated with the current assembly and source nomenclature and create new versions for the new nomenclature
             # get all the files for the current assembly and source nomenclature
             source_files = get_all_source_files(assembly_id, source_nomenclature, "gtf")
+            mapping = None
             
             for source_file in source_files["data"]:
                 sva_id = source_file.sva_id
-                # Resolve relative path from DB to absolute path
-                file_path = to_absolute_path(source_file.file_path)
 
-                temp_new_nomenclature_gtf_file = temp_manager.create_temp_filename(name=f"{sva_id}_{new_nomenclature}.gtf")
                 source_file_base_name = f"{sva_id}_{new_nomenclature}"
                 source_file_base_name = os.path.join(get_source_files_dir(), source_file_base_name)
                 
-                try:
-                    try:
-                        # if the input_gtf_file is already compressed, then we need to uncompress it into a temporary file and use that instead
-                        if file_path.endswith(".gz"):
-                            temp_file_path = temp_manager.create_temp_filename(name=f"{source_file_base_name}.gtf")
-                            gunzip_cmd = f"gunzip -c {file_path} > {temp_file_path}"
-                            subprocess.run(gunzip_cmd, shell=True, check=True)
-                            file_path = temp_file_path
-                    except Exception as e:
-                        raise f"Error uncompressing gtf file: {e}"
-
-                    convert_gtf_nomenclature(file_path,temp_new_nomenclature_gtf_file,mapping)
-                    new_source_files = prepare_source_files_from_gtf(temp_new_nomenclature_gtf_file,source_file_base_name)
+                if Config.SOURCE_FILES_LAZY:
+                    # built on first request from the files the source nomenclature's files come from
+                    new_source_files = source_file_descriptions(source_file_base_name)
+                    built_from = source_file.built_from or source_nomenclature
+                else:
+                    # the source nomenclature's files may not have been requested yet
+                    SourceFileCache().ensure(sva_id, source_nomenclature)
+                    # compressed input is read directly and sequence names are converted while the files are written
+                    if mapping is None:
+                        mapping = get_map_between_nomenclatures(assembly_id, source_nomenclature, new_nomenclature)["data"]
+                    new_source_files = prepare_source_files_from_gtf(to_absolute_path(source_file.file_path),source_file_base_name,seqid_map=mapping)
+                    built_from = None
+                    # the files go if the nomenclature is not created after all
+                    remove_files_on_rollback(file_data["file_path"] for file_data in new_source_files.values())
                 
-                    for new_source_file, source_file_data in new_source_files.items():
-                        # Convert absolute path to relative path for database storage
-                        relative_file_path = to_relative_path(source_file_data["file_path"])
-                        db.session.execute(
-                            text("INSERT INTO source_file (sva_id, assembly_id, file_path, nomenclature, filetype, description) VALUES (:sva_id, :assembly_id, :file_path, :nomenclature, :filetype, :description)"),
-                            {
-                                "sva_id": sva_id,
-                                "assembly_id": assembly_id,
-                                "file_path": relative_file_path,
-                                "nomenclature": new_nomenclature,
-                                "filetype": source_file_data["file_type"],
-                                "description": source_file_data["description"]
-                            }
-                        )
-                    
-                except Exception as e:
-                    raise e
-                    
-                except Exception as e:
-                    raise e
+                for new_source_file, source_file_data in new_source_files.items():
+                    # Convert absolute path to relative path for database storage
+                    relative_file_path = to_relative_path(source_file_data["file_path"])
+                    db.session.execute(
+                        text("INSERT INTO source_file (sva_id, assembly_id, file_path, nomenclature, filetype, description, built_from) VALUES (:sva_id, :assembly_id, :file_path, :nomenclature, :filetype, :description, :built_from)"),
+                        {
+                            "sva_id": sva_id,
+                            "assembly_id": assembly_id,
+                            "file_path": relative_file_path,
+                            "nomenclature": new_nomenclature,
+                            "filetype": source_file_data["file_type"],
+                            "description": source_file_data["description"],
+                            "built_from": built_from
+                        }
+                    )
             
             return {
                 "success": True,
-                "message": f"Successfully created nomenclature '{new_nomenclature}' and new FASTA file"
+                "message": f"Successfully created nomenclature '{new_nomenclature}' sharing the FASTA file of '{source_nomenclature}'"
             }
             
         finally:
@@ -1,6 +1,7 @@
 from sqlalchemy import text
 from db.db import db, to_absolute_path, is_paths_configured
 from db.methods.utils import *
+from .utils import rename_fai
 
 def organism_exists(taxonomy_id: int):
     try:
@@ -111,7 +112,7 @@ def get_all_source_files(assembly_id: int, source_nomenclature: str, filetype: s
     try:
         # Build the base query
         base_query = """
-            SELECT file_path, sva_id, assembly_id, nomenclature, filetype, description
+            SELECT file_path, sva_id, assembly_id, nomenclature, filetype, description, built_from
             FROM source_file
             WHERE assembly_id = :assembly_id AND nomenclature = :source_nomenclature
         """
@@ -238,10 +239,27 @@ def get_map_between_nomenclatures(assembly_id: int, from_nomenclature: str, to_n
     except Exception as e:
         return {"success": False, "message": str(e)}
 
+def get_sequence_ids(assembly_id: int, nomenclature: str):
+    """
+    Get the sequence IDs of an assembly by their names in one nomenclature.
+    Returns: {sequence_name: sequence_id, ...}
+    """
+    try:
+        result = db.session.execute(text("""
+            SELECT sequence_name, sequence_id FROM sequence_id_map
+            WHERE assembly_id = :assembly_id AND nomenclature = :nomenclature
+        """), {
+            "assembly_id": assembly_id,
+            "nomenclature": nomenclature
+        })
+        return {"success": True, "data": {row.sequence_name: row.sequence_id for row in result}}
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
 def get_genome_files():
     try:
         result = db.session.execute(text("""
-            SELECT genome_file_id, assembly_id, nomenclature, file_path
+            SELECT genome_file_id, assembly_id, nomenclature, file_path, content_hash, file_nomenclature
             FROM genome_file
         """)).fetchall()
 
@@ -256,7 +274,9 @@ def get_genome_files():
                 "genome_file_id": row.genome_file_id,
                 "assembly_id": row.assembly_id,
                 "nomenclature": row.nomenclature,
-                "file_path": file_path
+                "file_path": file_path,
+                "content_hash": row.content_hash,
+                "file_nomenclature": row.file_nomenclature
             }
         
         return {"success": True, "data": genome_files}
@@ -266,12 +286,14 @@ def get_genome_files():
 def get_fasta_file(assembly_id, nomenclature):
     """
     Get the FASTA file path and assembly metadata for a specific assembly and nomenclature.
-    Returns: {"file_path": directory_path, "file_name": filename, "assembly_name": assembly_name}
+    A virtual nomenclature shares the FASTA of another one; file_nomenclature is the nomenclature
+    of the sequence names inside the file.
+    Returns: {"file_path": directory_path, "file_name": filename, "friendly_file_name": name, "file_nomenclature": nomenclature}
     """
     try:
         # Query the genome_file and assembly tables for the specific assembly and nomenclature
         result = db.session.execute(text("""
-            SELECT gf.file_path, a.assembly_name 
+            SELECT gf.file_path, gf.file_nomenclature, a.assembly_name 
             FROM genome_file gf
             JOIN assembly a ON gf.assembly_id = a.assembly_id
             WHERE gf.assembly_id = :assembly_id AND gf.nomenclature = :nomenclature
@@ -285,7 +307,7 @@ def get_fasta_file(assembly_id, nomenclature):
         
         # Resolve relative path from DB to absolute path
         file_path = to_absolute_path(result.file_path)
-        friendly_file_name = result.assembly_name + "_" + nomenclature + ".fasta"
+        friendly_file_name = result.assembly_name + "_" + nomenclature + (".fasta.gz" if file_path.endswith(".gz") else ".fasta")
         
         # Split into directory and filename
         directory_path = os.path.dirname(file_path)
@@ -298,7 +320,8 @@ def get_fasta_file(assembly_id, nomenclature):
         return {
             "file_path": directory_path,
             "file_name": file_name,
-            "friendly_file_name": friendly_file_name
+            "friendly_file_name": friendly_file_name,
+            "file_nomenclature": result.file_nomenclature or nomenclature
         }
         
     except Exception as e:
@@ -335,6 +358,82 @@ def get_fai_file(assembly_id, nomenclature):
     except Exception as e:
         raise Exception(f"Error retrieving FAI file: {str(e)}")
 
+def get_renamed_fai(assembly_id, nomenclature):
+    """
+    Build the FAI index of a virtual nomenclature from the index of the shared FASTA file.
+    Offsets are unchanged since only the names differ; sequences without a name in the
+    nomenclature are left out.
+    Returns: {"content": fai_text, "friendly_file_name": filename}
+    """
+    try:
+        fasta_info = get_fasta_file(assembly_id, nomenclature)
+        fai_file_path = os.path.join(fasta_info["file_path"], fasta_info["file_name"]) + ".fai"
+        if not os.path.exists(fai_file_path):
+            raise Exception(f"FAI index file not found at path: {fai_file_path}")
+
+        name_map = get_map_between_nomenclatures(assembly_id, fasta_info["file_nomenclature"], nomenclature)
+        if not name_map["success"]:
+            raise Exception(name_map["message"])
+
+        return {
+            "content": rename_fai(fai_file_path, name_map["data"]),
+            "friendly_file_name": fasta_info["friendly_file_name"] + ".fai"
+        }
+
+    except Exception as e:
+        raise Exception(f"Error building FAI file: {str(e)}")
+
+def get_refname_aliases(assembly_id, nomenclature):
+    """
+    Build a JBrowse refNameAliases file for an assembly: one line per sequence with its name in
+    the given nomenclature first, followed by its names in the other nomenclatures.
+    """
+    try:
+        result = db.session.execute(text("""
+            SELECT sequence_id, nomenclature, sequence_name FROM sequence_id_map
+            WHERE assembly_id = :assembly_id
+            ORDER BY sequence_id, nomenclature
+        """), {"assembly_id": assembly_id}).fetchall()
+
+        names = {}
+        for row in result:
+            names.setdefault(row.sequence_id, {})[row.nomenclature] = row.sequence_name
+
+        lines = []
+        for sequence_names in names.values():
+            if nomenclature not in sequence_names:
+                continue
+            aliases = [name for other, name in sequence_names.items() if other != nomenclature and name != sequence_names[nomenclature]]
+            lines.append("\t".join([sequence_names[nomenclature]] + aliases) + "\n")
+        return "".join(lines)
+
+    except Exception as e:
+        raise Exception(f"Error building refNameAliases: {str(e)}")
+
+def get_gzi_file(assembly_id, nomenclature):
+    """
+    Get the GZI (BGZF block index) file path for a specific assembly and nomenclature.
+    Only genomes stored BGZF compressed have one.
+    Returns: {"file_path": directory_path, "file_name": filename}
+    """
+    try:
+        fasta_info = get_fasta_file(assembly_id, nomenclature)
+        if not fasta_info["file_name"].endswith(".gz"):
+            raise Exception(f"FASTA file for assembly {assembly_id} with nomenclature '{nomenclature}' is not compressed")
+
+        gzi_file_path = os.path.join(fasta_info["file_path"], fasta_info["file_name"]) + ".gzi"
+        if not os.path.exists(gzi_file_path):
+            raise Exception(f"GZI index file not found at path: {gzi_file_path}")
+
+        return {
+            "file_path": os.path.dirname(gzi_file_path),
+            "file_name": os.path.basename(gzi_file_path),
+            "friendly_file_name": fasta_info["friendly_file_name"] + ".gzi"
+        }
+
+    except Exception as e:
+        raise Exception(f"Error retrieving GZI file: {str(e)}")
+
 def sequence_id_to_name(assembly_id, nomenclature, sequence_id):
     try:
         result = db.session.execute(text("""
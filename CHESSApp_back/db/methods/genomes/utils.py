@@ -1,5 +1,8 @@
 import os
+import gzip
+import zlib
 import subprocess
+import pysam
 
 def organize_nomenclatures(nomenclature_mappings):
     """
@@ -47,64 +50,134 @@ def organize_nomenclatures(nomenclature_mappings):
 
     return result
 
-def validate_and_index_fasta(file_path):
+def index_fasta(file_path):
     """
-    Validates and indexes a FASTA file, returning sequence information.
-    Optimized for large files by processing sequences in chunks.
+    Indexes a FASTA file with samtools faidx. BGZF compressed files get a .gzi index next to the .fai.
     """
     try:
-        # run faidx on the given file
         subprocess.run(['samtools', 'faidx', file_path])
         assert os.path.exists(file_path + '.fai'), "FAI index not created"
-        # sequence names and lengths into a dictionary
-        sequence_lengths = {}
-        with open(file_path + '.fai', 'r') as f:
-            for line in f:
-                seqid, length, _, _, _ = line.strip().split('\t')
-                assert seqid not in sequence_lengths, "Duplicate sequence ID found in FASTA file: " + seqid
-                sequence_lengths[seqid] = int(length)
-        
-        if not sequence_lengths:
-            raise Exception("No sequences found in FASTA file")
-        
-        return sequence_lengths
+        if file_path.endswith('.gz'):
+            assert os.path.exists(file_path + '.gzi'), "GZI index not created"
         
     except Exception as e:
         raise Exception(f"Error processing FASTA file: {str(e)}")
 
-def load_nomenclature_mapping(file_path):
+def validate_and_index_fasta(file_path):
+    """
+    Validates and indexes a FASTA file, returning sequence information.
+    """
+    index_fasta(file_path)
+    return read_fasta_index(file_path)
+
+def iter_fasta_index(file_path):
+    """
+    Yields (sequence name, length) pairs from the .fai index of a FASTA file without loading it.
+    """
+    with open(file_path + '.fai', 'r') as f:
+        for line in f:
+            seqid, length, _, _, _ = line.strip().split('\t')
+            yield seqid, int(length)
+
+def read_fasta_index(file_path):
     """
-    Loads a nomenclature mapping from a TSV file.
+    Reads sequence names and lengths from the .fai index of a FASTA file.
+    """
+    sequence_lengths = {}
+    for seqid, length in iter_fasta_index(file_path):
+        assert seqid not in sequence_lengths, "Duplicate sequence ID found in FASTA file: " + seqid
+        sequence_lengths[seqid] = length
+    
+    if not sequence_lengths:
+        raise Exception("No sequences found in FASTA file")
+    
+    return sequence_lengths
+
+def content_addressed_fasta_path(fasta_files_dir, sha256, compressed=False):
+    """
+    Path of a FASTA file stored by content. Identical genomes share one file and index.
+    Compressed genomes are kept as BGZF (<sha256>.fasta.gz).
+    """
+    return os.path.join(fasta_files_dir, f"{sha256}.fasta.gz" if compressed else f"{sha256}.fasta")
+
+def fasta_index_paths(file_path):
+    """
+    Index files of a stored FASTA file: .fai, plus .gzi for BGZF compressed files.
+    """
+    if file_path.endswith('.gz'):
+        return [file_path + '.fai', file_path + '.gzi']
+    return [file_path + '.fai']
+
+def bgzip_file(file_path, output_path, compressed=True):
+    """
+    Compresses a FASTA file as BGZF so it can be indexed for random access.
+    Gzip input (compressed=True) is recompressed as a stream, the uncompressed content is never written to disk.
+    """
+    open_input = gzip.open if compressed else open
+    with open_input(file_path, 'rb') as inFP, pysam.BGZFile(output_path, 'wb') as outFP:
+        for chunk in iter(lambda: inFP.read(1024 * 1024), b''):
+            outFP.write(chunk)
+
+def rename_fai(fai_file_path, name_map):
+    """
+    Returns the content of a FAI index with sequence names replaced through name_map.
+    Sequences missing from name_map are left out.
+    """
+    lines = []
+    with open(fai_file_path, 'r') as f:
+        for line in f:
+            seqid, rest = line.split('\t', 1)
+            if seqid in name_map:
+                lines.append(name_map[seqid] + '\t' + rest)
+    return "".join(lines)
+
+def stream_renamed_fasta(file_path, name_map, chunk_size=1024 * 1024):
+    """
+    Yields the content of a FASTA file with its header lines renamed through name_map.
+    Sequences missing from name_map are left out. BGZF input is served gzip compressed.
+    """
+    compressed = file_path.endswith('.gz')
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compressed else None
+    open_input = gzip.open if compressed else open
+    buffer = []
+    buffered = 0
+    keep = True
+    with open_input(file_path, 'rb') as inFP:
+        for line in inFP:
+            if line.startswith(b'>'):
+                seqid = line[1:].split()[0].decode()
+                keep = seqid in name_map
+                if keep:
+                    line = f">{name_map[seqid]}\n".encode()
+            if not keep:
+                continue
+            buffer.append(line)
+            buffered += len(line)
+            if buffered >= chunk_size:
+                data = b"".join(buffer)
+                buffer, buffered = [], 0
+                yield compressor.compress(data) if compressor else data
+    data = b"".join(buffer)
+    if compressor:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
+
+def iter_nomenclature_mapping(file_path):
+    """
+    Yields (line number, source_id, new_id) from a nomenclature mapping TSV file as it is read.
+    Raises an exception on malformed lines.
     """
-    mapping = {}
     with open(file_path, 'r') as f:
         for line_num, line in enumerate(f):
             line = line.strip()
 
             parts = line.split('\t')
             if len(parts) != 2:
-                return {"success": False, "message": f"Invalid TSV format at line {line_num}. Expected 2 columns, got {len(parts)}"}
+                raise Exception(f"Invalid TSV format at line {line_num}. Expected 2 columns, got {len(parts)}")
             
             source_id, new_id = parts[0].strip(), parts[1].strip()
             if not source_id or not new_id:
-                return {"success": False, "message": f"Empty values at line {line_num}"}
-            
-            if source_id in mapping:
-                return {"success": False, "message": f"Duplicate source ID '{source_id}' at line {line_num}"}
+                raise Exception(f"Empty values at line {line_num}")
             
-            mapping[source_id] = new_id
-
-    return mapping
-
-def translate_fasta_file(source_file_path, new_full_path, mapping):
-    with open(source_file_path, 'r') as source_file, open(new_full_path, 'w') as new_file:
-        for line in source_file:
-            if line.startswith('>'):
-                seqid = line.strip()[1:].split(" ")[0]
-                if seqid in mapping:
-                    new_seqid = mapping[seqid]
-                    new_file.write(f">{new_seqid}\n")
-                else:
-                    raise Exception(f"Sequence ID {seqid} not found in mapping")
-            else:
-                new_file.write(line)
\ No newline at end of file
+            yield line_num, source_id, new_id
@@ -0,0 +1,3 @@
+from .admin import *
+from .queries import * 
+from .utils import *
\ No newline at end of file
@@ -0,0 +1,258 @@
+import os
+import json
+from typing import Dict
+from sqlalchemy import text
+from db.db import db
+from db.methods.JobProgress import JobProgress
+from db.methods.TempFileManager import get_temp_file_manager
+from db.methods.utils import gtf_analysis_path
+from db.methods.sources import admin as source_admin
+from db.methods.genomes import admin as genome_admin
+from db.methods.datasets import admin as dataset_admin
+from db.methods.SourceFileCache import SourceFileCache
+
+from .queries import *
+from .utils import *
+
+def run_annotation_upload_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Normalizes an uploaded GTF/GFF file and detects nomenclatures and attributes.
+    The normalized files are kept for the confirm-annotation job.
+    """
+    data = dict(parameters)
+    data["file"] = upload = stored_upload(parameters)
+    try:
+        result = source_admin.verify_annotation_file_upload_data(data, progress=progress)
+    finally:
+        if os.path.exists(upload.file_path):
+            os.remove(upload.file_path)
+
+    if result["success"]:
+        # keep the normalized files around for the confirmation step
+        temp_manager = get_temp_file_manager()
+        temp_manager.release_file(result["temp_file_path"])
+        temp_manager.release_file(result["norm_gtf_path"])
+        temp_manager.release_file(gtf_analysis_path(result["norm_gtf_path"]))
+    return result
+
+def run_annotation_confirm_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Loads a verified annotation file into the database.
+    The files of the upload step are removed afterwards; only files in the temp files directory are accepted.
+    """
+    temp_manager = get_temp_file_manager()
+    data = dict(parameters)
+    for key in ["temp_file_path", "norm_gtf_path"]:
+        data[key] = temp_manager.resolve_temp_file(parameters.get(key))
+        if data[key] is None:
+            return {"success": False, "message": f"{key} is not a file of the upload step"}
+
+    try:
+        return source_admin.confirm_and_process_annotation_file(data, progress=progress)
+    finally:
+        for path in [data["temp_file_path"], data["norm_gtf_path"], gtf_analysis_path(data["norm_gtf_path"])]:
+            temp_manager.cleanup_file(path)
+
+def run_annotation_resume_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Resumes a chunked annotation load from its last checkpoint.
+    """
+    return source_admin.resume_annotation_load(int(parameters["sva_id"]), progress=progress)
+
+def run_fasta_upload_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Stores and indexes an uploaded FASTA file for an assembly.
+    """
+    upload = stored_upload(parameters)
+    try:
+        return genome_admin.process_fasta_file(
+            parameters["assembly_id"],
+            parameters["nomenclature"],
+            upload,
+            progress=progress
+        )
+    finally:
+        if os.path.exists(upload.file_path):
+            os.remove(upload.file_path)
+
+def run_genome_compress_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Converts stored uncompressed genomes to BGZF.
+    """
+    assembly_id = parameters.get("assembly_id")
+    return genome_admin.compress_genome_files(int(assembly_id) if assembly_id is not None else None, progress=progress)
+
+def run_dataset_create_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Creates a dataset and loads its TSV file.
+    """
+    data = dict(parameters)
+    data["file"] = upload = stored_upload(parameters)
+    try:
+        return dataset_admin.create_dataset(data, progress=progress)
+    finally:
+        if os.path.exists(upload.file_path):
+            os.remove(upload.file_path)
+
+def run_source_file_build_job(parameters: Dict, progress: JobProgress) -> Dict:
+    """
+    Builds the source files of an annotation in a nomenclature other than the uploaded one.
+    """
+    built = SourceFileCache().ensure(int(parameters["sva_id"]), parameters["nomenclature"])
+    return {"success": True, "built": built, "message": "Source files built" if built else "Source files already available"}
+
+JOB_HANDLERS = {
+    "annotation_upload": run_annotation_upload_job,
+    "annotation_confirm": run_annotation_confirm_job,
+    "annotation_resume": run_annotation_resume_job,
+    "fasta_upload": run_fasta_upload_job,
+    "genome_compress": run_genome_compress_job,
+    "dataset_create": run_dataset_create_job,
+    "source_file_build": run_source_file_build_job
+}
+
+# job types that take nothing but plain parameters and may be submitted through POST /jobs;
+# the others work on uploads or files of an earlier step and are queued by their own routes
+PARAMETER_JOB_TYPES = ["annotation_resume", "genome_compress"]
+
+def submit_job(job_type: str, parameters: Dict) -> Dict:
+    """
+    Adds a job to the queue.
+
+    Args:
+        job_type: One of JOB_HANDLERS
+        parameters: JSON serializable job parameters
+
+    Returns:
+        Dictionary with success status and job_id
+    """
+    try:
+        if job_type not in JOB_HANDLERS:
+            return {"success": False, "message": f"Unknown job type: {job_type}"}
+
+        result = db.session.execute(
+            text("INSERT INTO job (job_type, parameters) VALUES (:job_type, :parameters)"),
+            {"job_type": job_type, "parameters": json.dumps(parameters)}
+        )
+
+        return {
+            "success": True,
+            "job_id": result.lastrowid,
+            "message": f"Job queued ({job_type})"
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to submit job: {str(e)}"}
+
+def queue_source_file_build(sva_id: int, nomenclature: str) -> Dict:
+    """
+    Queues the build of the source files of an annotation in a nomenclature (see SourceFileCache),
+    unless a build of the same files is already queued or running.
+
+    Returns:
+        Dictionary with success status and job_id
+    """
+    try:
+        row = db.session.execute(
+            text("""SELECT job_id FROM job
+                    WHERE job_type = 'source_file_build' AND status IN ('queued', 'running')
+                    AND JSON_EXTRACT(parameters, '$.sva_id') = :sva_id
+                    AND JSON_UNQUOTE(JSON_EXTRACT(parameters, '$.nomenclature')) = :nomenclature
+                    ORDER BY job_id LIMIT 1"""),
+            {"sva_id": sva_id, "nomenclature": nomenclature}
+        ).fetchone()
+        if row:
+            return {"success": True, "job_id": row.job_id, "message": "Build already queued"}
+        return submit_job("source_file_build", {"sva_id": sva_id, "nomenclature": nomenclature})
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to queue source file build: {str(e)}"}
+
+def cancel_job(job_id: int) -> Dict:
+    """
+    Cancels a job. Queued jobs are cancelled right away, running jobs
+    stop at their next progress update.
+    """
+    try:
+        job = get_job(job_id)
+        if not job["success"]:
+            return job
+
+        status = job["data"]["status"]
+        if status == "queued":
+            db.session.execute(
+                text("UPDATE job SET status = 'cancelled', finished_at = NOW(), message = 'Cancelled before start' WHERE job_id = :job_id AND status = 'queued'"),
+                {"job_id": job_id}
+            )
+            return {"success": True, "message": "Job cancelled"}
+        if status == "running":
+            db.session.execute(
+                text("UPDATE job SET cancel_requested = 1 WHERE job_id = :job_id"),
+                {"job_id": job_id}
+            )
+            return {"success": True, "message": "Cancellation requested"}
+
+        return {"success": False, "message": f"Job is already {status}"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to cancel job: {str(e)}"}
+
+def claim_next_job(worker_name: str) -> Dict:
+    """
+    Marks the oldest queued job as running and returns it.
+    SKIP LOCKED lets several workers poll the queue concurrently.
+
+    Returns:
+        Dictionary with success status and the claimed job (None if the queue is empty)
+    """
+    try:
+        row = db.session.execute(
+            text("SELECT job_id FROM job WHERE status = 'queued' ORDER BY job_id LIMIT 1 FOR UPDATE SKIP LOCKED")
+        ).fetchone()
+        if not row:
+            return {"success": True, "data": None}
+
+        db.session.execute(
+            text("UPDATE job SET status = 'running', started_at = NOW(), worker = :worker WHERE job_id = :job_id"),
+            {"worker": worker_name, "job_id": row.job_id}
+        )
+        return get_job(row.job_id)
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to claim job: {str(e)}"}
+
+def finish_job(job_id: int, status: str, message: str, result: Dict = None) -> Dict:
+    """
+    Records the final state of a job.
+    """
+    try:
+        db.session.execute(
+            text("""UPDATE job SET status = :status, message = :message, result = :result, finished_at = NOW(),
+                        percent_complete = IF(:status = 'completed', 100, percent_complete)
+                    WHERE job_id = :job_id"""),
+            {
+                "status": status,
+                "message": message,
+                "result": json.dumps(result, default=str) if result is not None else None,
+                "job_id": job_id
+            }
+        )
+        return {"success": True, "message": f"Job {job_id} {status}"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to update job: {str(e)}"}
+
+def fail_stale_jobs(worker_name: str) -> Dict:
+    """
+    Marks jobs left running by a previous instance of this worker as failed.
+    """
+    try:
+        result = db.session.execute(
+            text("""UPDATE job SET status = 'failed', finished_at = NOW(), message = 'Worker restarted while job was running'
+                    WHERE status = 'running' AND worker = :worker"""),
+            {"worker": worker_name}
+        )
+        return {"success": True, "count": result.rowcount}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to reset stale jobs: {str(e)}"}
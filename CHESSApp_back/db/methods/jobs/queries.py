@@ -0,0 +1,54 @@
+from sqlalchemy import text
+from db.db import db
+from .utils import *
+
+JOB_COLUMNS = """
+    job_id, job_type, status, stage, percent_complete, rows_written,
+    parameters, result, message, cancel_requested, worker,
+    created_at, started_at, finished_at,
+    TIMESTAMPDIFF(SECOND, started_at, COALESCE(finished_at, NOW())) AS elapsed_seconds
+"""
+
+def job_exists_by_id(job_id: int):
+    try:
+        result = db.session.execute(text("""
+            SELECT COUNT(*) FROM job WHERE job_id = :job_id
+        """), {"job_id": job_id}).fetchone()
+        return result[0] > 0
+    except Exception as e:
+        return False
+
+def get_job(job_id: int):
+    """
+    Get a single job with its progress
+    """
+    try:
+        row = db.session.execute(
+            text(f"SELECT {JOB_COLUMNS} FROM job WHERE job_id = :job_id"),
+            {"job_id": job_id}
+        ).fetchone()
+        if not row:
+            return {"success": False, "message": f"Job with ID {job_id} does not exist"}
+
+        return {"success": True, "data": organize_job_row(row)}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to fetch job: {str(e)}"}
+
+def get_jobs(status: str = None, limit: int = 100):
+    """
+    List jobs, most recent first, optionally filtered by status
+    """
+    try:
+        query = f"SELECT {JOB_COLUMNS} FROM job"
+        params = {"limit": limit}
+        if status:
+            query += " WHERE status = :status"
+            params["status"] = status
+        query += " ORDER BY job_id DESC LIMIT :limit"
+
+        result = db.session.execute(text(query), params)
+        return {"success": True, "data": [organize_job_row(row) for row in result]}
+
+    except Exception as e:
+        return {"success": False, "data": [], "message": f"Failed to fetch jobs: {str(e)}"}
@@ -0,0 +1,84 @@
+import os
+import re
+import json
+import shutil
+import uuid
+from db.db import get_temp_files_dir
+
+UPLOAD_TOKEN_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class StoredUpload:
+    """
+    An uploaded file already saved to disk by the web process.
+    Stands in for werkzeug's FileStorage when the upload is processed by a job worker.
+    """
+
+    def __init__(self, file_path: str, filename: str = None):
+        self.file_path = file_path
+        self.filename = filename or os.path.basename(file_path)
+
+    def save(self, destination: str) -> None:
+        shutil.move(self.file_path, destination)
+
+    def read(self) -> bytes:
+        with open(self.file_path, "rb") as fp:
+            return fp.read()
+
+def job_upload_path(upload_token: str) -> str:
+    """
+    Path of the upload saved for a job under the given token.
+    Only tokens created by save_job_upload are accepted, so job parameters cannot point at other files.
+    """
+    if not isinstance(upload_token, str) or UPLOAD_TOKEN_PATTERN.match(upload_token) is None:
+        raise ValueError("Invalid upload token")
+    return os.path.join(get_temp_files_dir(), f"job_upload_{upload_token}")
+
+def save_job_upload(file) -> dict:
+    """
+    Save an uploaded file for a background job.
+
+    The file is not registered with the TempFileManager since it has to outlive
+    the request; the job removes it once processed.
+
+    Args:
+        file: werkzeug FileStorage from the request
+
+    Returns:
+        Job parameters describing the upload: upload_token and file_name
+    """
+    upload_token = uuid.uuid4().hex
+    file.save(job_upload_path(upload_token))
+    return {"upload_token": upload_token, "file_name": file.filename}
+
+def adopt_job_upload(file_path: str, file_name: str = None) -> dict:
+    """
+    Hand a file received by the server (e.g. a finished chunked upload) over to a background job.
+    The file is moved next to the other job uploads, which is a rename within the temp files directory.
+
+    Returns:
+        Job parameters describing the upload, as save_job_upload
+    """
+    upload_token = uuid.uuid4().hex
+    upload_path = job_upload_path(upload_token)
+    shutil.move(file_path, upload_path)
+    return {"upload_token": upload_token, "file_name": file_name}
+
+def stored_upload(parameters: dict) -> StoredUpload:
+    """
+    The upload saved by save_job_upload for a job. Its content is hashed when the job stores it (see save_upload).
+    """
+    return StoredUpload(job_upload_path(parameters.get("upload_token")), filename=parameters.get("file_name"))
+
+def organize_job_row(row) -> dict:
+    """
+    Convert a job row into a JSON serializable dictionary
+    """
+    job = dict(row._mapping)
+    for key in ["parameters", "result"]:
+        if isinstance(job[key], str):
+            job[key] = json.loads(job[key])
+    for key in ["created_at", "started_at", "finished_at"]:
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
@@ -1,8 +1,13 @@
 import os
+import json
+import time
 import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
-from sqlalchemy import text
-from db.db import db
+from flask import current_app
+from sqlalchemy import text, bindparam
+from db.db import db, create_db_app
 from werkzeug.utils import secure_filename
 import gzip
 import subprocess
@@ -10,8 +15,20 @@ from db.methods.utils import *
 from db.methods.genomes.queries import *
 from db.methods.genomes.utils import *
 from db.methods.TX import TX
-from db.db import get_source_files_dir, get_temp_files_dir, to_relative_path, to_absolute_path
+from db.methods.GTFParser import read_transcripts
+from db.methods.SourceFileBuilder import prepare_source_files_parallel, source_file_descriptions, remove_source_files
+from db.methods.SourceFileCache import remove_source_file
+from db.methods.SequenceCache import get_sequence_cache
+from db.methods.BulkWriter import BulkWriter
+from db.methods.IntronAllocator import IntronAllocator
+from db.methods.IngestPipeline import PipelinedBulkWriter, TranscriptProducer
+from db.methods.BulkLoadReconciler import BulkLoadReconciler
+from db.methods.UploadCache import UploadCache, save_upload, upload_key, link_or_copy
+from db.methods.ChainMatcher import IntronChainMatcher, intron_chain_signature
+from db.methods.JobProgress import JobProgress, JobCancelled
+from db.db import get_source_files_dir, get_temp_files_dir, to_relative_path, to_absolute_path, remove_files_on_rollback
 from db.methods.TempFileManager import get_temp_file_manager
+from config import Config
 
 from .queries import *
 from .utils import *
@@ -128,17 +145,24 @@ def delete_source(source_id: int) -> Dict:
         if files_to_remove is None:
             return {"success": False,"message": f"Error getting files for source with ID {source_id}"}
         
+        sva_ids = [row.sva_id for row in db.session.execute(
+            text("""SELECT sva.sva_id FROM source_version_assembly sva
+                    JOIN source_version sv ON sv.sv_id = sva.sv_id
+                    WHERE sv.source_id = :source_id"""),
+            {"source_id": source_id}
+        )]
+        
         # delete the source
         db.session.execute(
             text("DELETE FROM source WHERE source_id = :source_id"),
             {"source_id": source_id}
         )
+        for sva_id in sva_ids:
+            get_sequence_cache().invalidate_sva(sva_id)
         
         # cleanup the files - resolve relative paths to absolute
         for rel_file_path in files_to_remove:
-            abs_file_path = to_absolute_path(rel_file_path)
-            if os.path.exists(abs_file_path):
-                os.remove(abs_file_path)
+            remove_source_file(to_absolute_path(rel_file_path))
         
         return {
             "success": True,
@@ -234,19 +258,24 @@ def delete_source_version(sv_id: int) -> Dict:
         if files_to_remove is None:
             return {"success": False,"message": f"Error getting files for source version with ID {sv_id}"}
         
+        sva_ids = [row.sva_id for row in db.session.execute(
+            text("SELECT sva_id FROM source_version_assembly WHERE sv_id = :sv_id"),
+            {"sv_id": sv_id}
+        )]
+        
         db.session.execute(
             text("DELETE FROM source_version WHERE sv_id = :sv_id"),
             {"sv_id": sv_id}
         )
+        for sva_id in sva_ids:
+            get_sequence_cache().invalidate_sva(sva_id)
         
         # Resolve relative paths to absolute and delete files
         for rel_file_path in files_to_remove:
-            abs_file_path = to_absolute_path(rel_file_path)
-            if os.path.exists(abs_file_path):
-                try:
-                    os.remove(abs_file_path)
-                except Exception as e:
-                    continue
+            try:
+                remove_source_file(to_absolute_path(rel_file_path))
+            except Exception as e:
+                continue
         
         return {
             "success": True,
@@ -312,10 +341,11 @@ def reorder_source_versions(source_id: int, new_order: List[int]) -> Dict:
         } 
 
 
-def verify_annotation_file_upload_data(data) -> Dict:
+def verify_annotation_file_upload_data(data, progress: Optional[JobProgress] = None) -> Dict:
     """
     Adds an annotation file to a source version.
     """
+    progress = progress or JobProgress()
     try:
         source_version_id = int(data["source_version_id"])
         assembly_id = int(data["assembly_id"])
@@ -328,9 +358,16 @@ def verify_annotation_file_upload_data(data) -> Dict:
         if not assembly_exists(assembly_id):
             return {"success": False,"message": f"Assembly with ID {assembly_id} does not exist"}
 
+        progress.set_stage("Saving uploaded file", 0)
         temp_manager = get_temp_file_manager()
         with temp_manager.managed_temp_file(name='gtf_file') as temp_gtf_file_path:
-            data["file"].save(temp_gtf_file_path)
+            upload = save_upload(data["file"], temp_gtf_file_path)
+
+        # normalization and analysis only depend on the file content - reuse them for identical uploads
+        annotation_cache = UploadCache("annotation")
+        cache_key = upload_key(upload)
+        cached_norm_gtf_path = annotation_cache.get(cache_key, "normalized.gtf")
+        analysis = load_gtf_analysis(cached_norm_gtf_path) if cached_norm_gtf_path else None
 
         # file_format = is_gff(temp_gtf_file_path)
         # if file_format == True:
@@ -345,10 +382,24 @@ def verify_annotation_file_upload_data(data) -> Dict:
 
         # Create normalized GTF file path
         with temp_manager.managed_temp_file(name='normalized_gtf') as norm_gtf_path:
-            run_gffread(temp_gtf_file_path, norm_gtf_path)
+            if analysis is not None:
+                progress.set_stage("Reusing normalized annotation of an identical upload", 10)
+                link_or_copy(cached_norm_gtf_path, norm_gtf_path)
+            else:
+                progress.set_stage("Normalizing annotation with gffread", 10)
+                run_gffread(temp_gtf_file_path, norm_gtf_path)
+
+        # scan the normalized file once for sequence ids, attributes and feature counts
+        # the analysis is stored next to the file and reused by the confirmation step
+        if analysis is None:
+            progress.set_stage("Analyzing annotation", 50)
+            analysis = analyze_gtf(norm_gtf_path,100)
+            save_gtf_analysis(annotation_cache.put(cache_key, "normalized.gtf", norm_gtf_path), analysis)
+        temp_manager.add_temp_file(save_gtf_analysis(norm_gtf_path,analysis), name='normalized_gtf_analysis')
 
         # check sequence ids in the file
-        gtf_seqids = get_seqids_from_gtf(norm_gtf_path)
+        progress.set_stage("Detecting nomenclature", 80)
+        gtf_seqids = list(analysis["seqids"].keys())
         if not gtf_seqids:  
             return {"success": False,"message": "No sequence IDs found in the file"}
         
@@ -377,7 +428,7 @@ def verify_annotation_file_upload_data(data) -> Dict:
         
         # next we need to process the attributes
         # these attributes will be sent back to the frontend to prompt user to resolve conflicts if exist
-        attrs = load_attributes_from_gtf(norm_gtf_path,100)
+        attrs = analysis["attributes"]
         
         # Process attributes to categorize them and provide better structure for frontend
         processed_attributes = {}
@@ -394,11 +445,14 @@ def verify_annotation_file_upload_data(data) -> Dict:
             "detected_nomenclatures": matching_nomenclatures,
             "attributes": processed_attributes,
             "file_sequences": list(gtf_seqids),
+            "feature_counts": analysis["counts"],
             "assembly_id": assembly_id,
             "source_version_id": source_version_id,
             "description": description,
             "temp_file_path": temp_gtf_file_path,
-            "norm_gtf_path": norm_gtf_path
+            "norm_gtf_path": norm_gtf_path,
+            "upload_sha256": upload["sha256"],
+            "upload_size": upload["size"]
         }
         
     except Exception as e:
@@ -408,7 +462,7 @@ def verify_annotation_file_upload_data(data) -> Dict:
             "message": f"Failed to add annotation file: {str(e)}"
         }
 
-def confirm_and_process_annotation_file(confirmation_data: Dict) -> Dict:
+def confirm_and_process_annotation_file(confirmation_data: Dict, progress: Optional[JobProgress] = None) -> Dict:
     """
     Processes the annotation file after user confirms the nomenclature and attribute mappings.
     
@@ -424,11 +478,27 @@ def confirm_and_process_annotation_file(confirmation_data: Dict) -> Dict:
             - description: File description
             - temp_file_path: Path to temporary uploaded file
             - norm_gtf_path: Path to normalized GTF file
+            - transcript_count: Optional number of transcripts, used for progress reporting
+            - commit_every: Optional number of transcripts per commit (defaults to Config.INGEST_COMMIT_EVERY).
+              When set, the load is committed in chunks with a checkpoint after each one and the
+              source version assembly stays hidden from the public views until it completes.
+            - resume_sva_id: Set by resume_annotation_load to continue a chunked load
+            - shards: Optional number of worker processes (defaults to Config.INGEST_SHARDS). With more
+              than one, transcripts are split by sequence and each shard is loaded and committed by its
+              own process; the source version assembly stays hidden until all shards are merged.
+              Not combined with chunked loads.
+        progress: Optional JobProgress reporter when running as a background job
     
     Returns:
         Dictionary with processing results
     """
     temp_manager = get_temp_file_manager()
+    progress = progress or JobProgress()
+    checkpoint = None
+    writer = None
+    sharded = False
+    sva_id = None
+    nomenclature_source_files = {}
     try:
         temp_file_path = confirmation_data.get("temp_file_path")
         norm_gtf_path = confirmation_data.get("norm_gtf_path")
@@ -443,6 +513,12 @@ def confirm_and_process_annotation_file(confirmation_data: Dict) -> Dict:
         description = confirmation_data.get("description")
 
         excluded_attributes = confirmation_data.get("excluded_attributes", [])
+        transcript_count = confirmation_data.get("transcript_count")
+        commit_every = int(confirmation_data.get("commit_every") or Config.INGEST_COMMIT_EVERY)
+        resume_sva_id = confirmation_data.get("resume_sva_id")
+        num_shards = int(confirmation_data.get("shards") or Config.INGEST_SHARDS)
+        sharded = num_shards > 1 and not commit_every and not resume_sva_id
+        analysis = None
 
         if not selected_nomenclature:
             return {"success": False,"message": "No nomenclature selected"}
@@ -453,338 +529,737 @@ def confirm_and_process_annotation_file(confirmation_data: Dict) -> Dict:
         if not gene_name_key:
             return {"success": False,"message": "Gene name attribute key is required"} 
 
-        result = db.session.execute(
-            text("INSERT INTO source_version_assembly (sv_id, assembly_id, information) VALUES (:source_version_id, :assembly_id, :information)"),
-            {
-                "source_version_id": source_version_id,
-                "assembly_id": assembly_id,
-                "information": description
-            }
-        )
-        sva_id = result.lastrowid
-        if not sva_id:
-            return {"success": False,"message": "Failed to create entry in the source_version_assembly table"}
-                
-        # cleanup the norm_gtf_path gtf file by removing all entries with invalid seqids
-        db_nomenclature_data = get_nomenclature(assembly_id, selected_nomenclature)
-        db_nomenclature_seqids = [x["sequence_name"] for x in db_nomenclature_data["data"]]
-        
-        with open(norm_gtf_path, "r") as in_fp, temp_manager.managed_temp_file(name="cleaned_norm_gtf") as cleaned_norm_gtf_path:
-            with open(cleaned_norm_gtf_path, "w") as out_fp:
-                for line in in_fp:
-                    if line.startswith("#"):
-                        continue
-                    lcs = line.strip().split("\t")
-                    if lcs[0] in db_nomenclature_seqids:
-                        out_fp.write(line)
-
-        # extract current GTF for the database
-        with temp_manager.managed_temp_file(name='db_gtf') as db_gtf_fname:
-            to_gtf(assembly_id,selected_nomenclature,db_gtf_fname)
+        if resume_sva_id:
+            # continue a chunked load - the file stored with the checkpoint was already cleaned
+            sva_id = int(resume_sva_id)
+            checkpoint = get_ingestion_checkpoint(sva_id)
+            if not checkpoint["success"] or checkpoint["data"] is None:
+                return {"success": False,"message": f"No checkpoint found for source version assembly {sva_id}"}
+            checkpoint = checkpoint["data"]
+            cleaned_norm_gtf_path = checkpoint["file_path"]
+            progress.set_stage(f"Resuming after {checkpoint['transcripts_done']} transcripts", 0)
+        else:
+            progress.set_stage("Registering source version assembly", 0)
+            result = db.session.execute(
+                text("INSERT INTO source_version_assembly (sv_id, assembly_id, information, load_status) VALUES (:source_version_id, :assembly_id, :information, :load_status)"),
+                {
+                    "source_version_id": source_version_id,
+                    "assembly_id": assembly_id,
+                    "information": description,
+                    "load_status": "loading" if commit_every or sharded else "complete"
+                }
+            )
+            sva_id = result.lastrowid
+            if not sva_id:
+                return {"success": False,"message": "Failed to create entry in the source_version_assembly table"}
+                    
+            # reuse the analysis from the verification step where available
+            analysis = load_gtf_analysis(norm_gtf_path)
+            if analysis is not None and not transcript_count:
+                transcript_count = analysis["counts"]["transcripts"]
+                confirmation_data["transcript_count"] = transcript_count
 
-        # run gffcompare between the database GTF and the normalized input file
-        with temp_manager.managed_temp_file(name='gffcmp_gtf') as gffcmp_gtf_fname:
-            run_gffcompare(cleaned_norm_gtf_path,db_gtf_fname,gffcmp_gtf_fname)
+            # cleanup the norm_gtf_path gtf file by removing all entries with invalid seqids
+            # the rewrite is skipped when the analysis shows every sequence is present in the nomenclature
+            db_nomenclature_data = get_nomenclature(assembly_id, selected_nomenclature)
+            db_nomenclature_seqids = set(x["sequence_name"] for x in db_nomenclature_data["data"])
+            
+            if analysis is not None and set(analysis["seqids"]).issubset(db_nomenclature_seqids):
+                cleaned_norm_gtf_path = norm_gtf_path
+            else:
+                with open(norm_gtf_path, "r") as in_fp, temp_manager.managed_temp_file(name="cleaned_norm_gtf") as cleaned_norm_gtf_path:
+                    with open(cleaned_norm_gtf_path, "w") as out_fp:
+                        for line in in_fp:
+                            if line.startswith("#"):
+                                continue
+                            lcs = line.strip().split("\t")
+                            if lcs[0] in db_nomenclature_seqids:
+                                out_fp.write(line)
 
-        tracking = load_tracking(gffcmp_gtf_fname+".tracking")
+            if commit_every:
+                confirmation_data["commit_every"] = commit_every
+                # the file is kept outside of temp file tracking until the load completes so it can be resumed
+                checkpoint = create_ingestion_checkpoint(sva_id, cleaned_norm_gtf_path, confirmation_data)
+                cleaned_norm_gtf_path = checkpoint["file_path"]
+                db.session.commit()
 
         db_seqids = get_nomenclatures(assembly_id)
         db_seqids = organize_nomenclatures(db_seqids["data"])[assembly_id]
         assert selected_nomenclature in db_seqids["nomenclatures"], f"Nomenclature {selected_nomenclature} not found in the database"
 
-        # iterate over the contents of the file and add them to the database
-        # construct gene_id to Gene.gid map, add every new gene as an entry into Gene Table
-        gene_map = dict()
-        for transcript_lines in read_gffread_gtf(cleaned_norm_gtf_path):
-            transcript = TX()
-            transcript.gene_name_key = gene_name_key
-            transcript.gene_type_key = gene_type_key
-            transcript.transcript_type_key = transcript_type_key
-            transcript.from_strlist(transcript_lines)
-            assert transcript.seqid in db_seqids["sequence_name_mappings"][selected_nomenclature], f"Sequence ID {transcript.seqid} not found in the database"
-            transcript.seqid = db_seqids["sequence_name_mappings"][selected_nomenclature][transcript.seqid]
-
-            working_gid = gene_map.get(transcript.gene_id,None)
-            if working_gid is None:
-                working_gid = insert_gene(transcript,sva_id)
-                if not working_gid["success"]:
-                    raise Exception(f"Failed to insert gene: {working_gid['message']}")
-                working_gid = working_gid["gene_id"]
-                gene_map[transcript.gene_id] = working_gid
-            
-            working_tid = tracking.get(transcript.tid,None) # tid PK of the transcript being worked on as it appears in the Transcripts table
+        if sharded:
+            # shard processes write through their own connections and need the committed source version assembly
+            db.session.commit()
+            progress.set_stage("Loading transcripts", 5)
+            shard_settings = {
+                "sequence_name_mapping": db_seqids["sequence_name_mappings"][selected_nomenclature],
+                "transcript_type_key": transcript_type_key,
+                "gene_type_key": gene_type_key,
+                "gene_name_key": gene_name_key,
+                "attribute_types": attribute_types,
+                "excluded_attributes": excluded_attributes
+            }
+            seqid_counts = analysis["seqids"] if analysis is not None else None
+            ingest_stats = ingest_annotation_sharded(cleaned_norm_gtf_path, sva_id, shard_settings, num_shards,
+                                                     seqid_counts=seqid_counts, transcript_count=transcript_count, progress=progress)
+        else:
+            # iterate over the contents of the file and add them to the database
+            # construct gene_id to Gene.gid map, add every new gene as an entry into Gene Table
+            # rows are buffered per table and written in batches within the current transaction
+            # existing transcripts are matched by their stored intron-chain signature
+            # with the pipeline enabled, parsing runs in a separate process and database writes on a
+            # writer thread, while this thread resolves genes, transcripts and introns
+            progress.set_stage("Loading transcripts", 5)
+            pipelined = Config.INGEST_PIPELINE
+            writer, intron_allocator, reconciler = create_annotation_writer(pipelined=pipelined)
+            chain_matcher = IntronChainMatcher(execute=writer.execute)
+            gene_map = dict()
+            transcripts_done = 0
+            transcript_count_done = 0
+            if checkpoint is not None and checkpoint["transcripts_done"]:
+                # state of the committed chunks: genes already created and transcripts created by this load
+                transcripts_done = checkpoint["transcripts_done"]
+                gene_map = get_loaded_gene_map(sva_id)
+                for tid in get_tids_created_by_sva(sva_id):
+                    chain_matcher.register_new(tid)
+            transcript_keys = {"transcript_type_key": transcript_type_key, "gene_type_key": gene_type_key, "gene_name_key": gene_name_key}
+            if pipelined:
+                transcripts = TranscriptProducer(cleaned_norm_gtf_path, queue_size=Config.INGEST_QUEUE_SIZE, **transcript_keys)
+            else:
+                transcripts = read_transcripts(cleaned_norm_gtf_path, **transcript_keys)
+            load_start = time.perf_counter()
+            for transcript_count_done, transcript in enumerate(transcripts, start=1):
+                if transcript_count_done <= transcripts_done:
+                    continue
+                assert transcript.seqid in db_seqids["sequence_name_mappings"][selected_nomenclature], f"Sequence ID {transcript.seqid} not found in the database"
+                transcript.seqid = db_seqids["sequence_name_mappings"][selected_nomenclature][transcript.seqid]
 
-            if working_tid is None:
-                working_tid = insert_transcript(transcript)
-                if not working_tid["success"]:
-                    raise Exception(f"Failed to insert transcript: {working_tid['message']}")
-                working_tid = working_tid["transcript_id"]
+                ingest_transcript(writer, intron_allocator, chain_matcher, gene_map, transcript, sva_id,
+                                  attribute_types, excluded_attributes)
 
-            dbxref_res = insert_dbxref(transcript,working_tid,working_gid,sva_id)
-            if not dbxref_res["success"]:
-                raise Exception(f"Failed to insert dbxref: {dbxref_res['message']}")
-            
-            for attribute_key, attribute_value in transcript.attributes.items():
-                if attribute_key in ["transcript_id", "gene_id"]:
-                    continue
-                if attribute_key in excluded_attributes:
-                    continue
-                if attribute_key not in attribute_types:
-                    continue
-                
-                attribute_type = attribute_types[attribute_key]
-                
-                value_text = ""
-                value_cat = ""
-                if attribute_type == "categorical":
-                    value_cat = attribute_value
-                else:
-                    value_text = attribute_value
-                try:
-                    # concatenate value and value_text if the primary key already exists
-                    db.session.execute(
-                        text("""INSERT INTO tx_attribute (tid, sva_id, transcript_id, key_name, value_cat, value_text) 
-                                VALUES (:tid, :sva_id, :transcript_id, :key_name, :value_cat, :value_text)
-                                ON DUPLICATE KEY UPDATE 
-                                value_cat = CASE 
-                                    WHEN value_cat = '' OR value_cat IS NULL THEN VALUES(value_cat)
-                                    WHEN VALUES(value_cat) = '' OR VALUES(value_cat) IS NULL THEN value_cat
-                                    ELSE CONCAT(value_cat, '; ', VALUES(value_cat))
-                                END,
-                                value_text = CASE 
-                                    WHEN value_text IS NULL OR value_text = '' THEN VALUES(value_text)
-                                    WHEN VALUES(value_text) IS NULL OR VALUES(value_text) = '' THEN value_text
-                                    ELSE CONCAT(value_text, '; ', VALUES(value_text))
-                                END"""),
-                        {
-                            "tid": working_tid,
-                            "sva_id": sva_id,
-                            "transcript_id": transcript.tid,
-                            "key_name": attribute_key,
-                            "value_cat": value_cat,
-                            "value_text": value_text
-                        }
+                if checkpoint is not None and transcript_count_done % commit_every == 0:
+                    writer.flush()
+                    writer.drain()
+                    save_ingestion_checkpoint(checkpoint, transcript_count_done)
+                    writer.commit()
+
+                if transcript_count_done % 1000 == 0:
+                    progress.update(
+                        percent=5 + 75 * transcript_count_done / transcript_count if transcript_count else None,
+                        rows_written=writer.rows_written
                     )
-                except Exception as e:
-                    raise e
 
-        for target_nomenclature in db_seqids["nomenclatures"]:
+            ingest_stats = writer.close()
+            progress.update(rows_written=writer.rows_written)
+            if pipelined:
+                ingest_stats["pipeline"] = get_pipeline_stats(transcripts, writer, time.perf_counter() - load_start)
+            ingest_stats["intron"].update(intron_allocator.stats)
+            ingest_stats["intron_chain_matches"] = chain_matcher.stats
+            if reconciler:
+                ingest_stats["bulk_load_reconciliation"] = reconciler.stats
+
+        progress.set_stage("Building source files", 80)
+        # all nomenclatures are built concurrently; sequence names are converted while the files are written
+        # with lazy source files only the uploaded nomenclature is built, the others on first request (SourceFileCache)
+        build_nomenclatures = [selected_nomenclature] if Config.SOURCE_FILES_LAZY else db_seqids["nomenclatures"]
+        source_file_targets = {}
+        for target_nomenclature in build_nomenclatures:
             source_file_base_name = f"{sva_id}_{target_nomenclature}"
             source_file_base_name = os.path.join(get_source_files_dir(), source_file_base_name)
 
             nomenclature_map = {}
             for source_seqname, seqid in db_seqids["sequence_name_mappings"][selected_nomenclature].items():
                 nomenclature_map[source_seqname] = db_seqids["sequence_id_mappings"][seqid]["nomenclatures"][target_nomenclature]
-            
-            try:
-                with temp_manager.managed_temp_file(name=f"{sva_id}_{target_nomenclature}.gtf") as temp_new_nomenclature_gtf_file:
-                    convert_gtf_nomenclature(cleaned_norm_gtf_path,temp_new_nomenclature_gtf_file,nomenclature_map)
-                    source_files = prepare_source_files_from_gtf(temp_new_nomenclature_gtf_file,source_file_base_name)
-                
-                for source_file, source_file_data in source_files.items():
-                    # Convert absolute path to relative path for database storage
-                    relative_file_path = to_relative_path(source_file_data["file_path"])
-                    db.session.execute(
-                        text("INSERT INTO source_file (sva_id, assembly_id, file_path, nomenclature, filetype, description) VALUES (:sva_id, :assembly_id, :file_path, :nomenclature, :filetype, :description)"),
-                        {
-                            "sva_id": sva_id,
-                            "assembly_id": assembly_id,
-                            "file_path": relative_file_path,
-                            "nomenclature": target_nomenclature,
-                            "filetype": source_file_data["file_type"],
-                            "description": source_file_data["description"]
-                        }
-                    )
-                
-            except Exception as e:
-                raise e
+            source_file_targets[target_nomenclature] = (source_file_base_name, nomenclature_map)
+
+        # rows are only written once every file exists - a failed build raises and the whole load is rolled back
+        nomenclature_source_files = prepare_source_files_parallel(cleaned_norm_gtf_path, source_file_targets)
+        # the files go if the transaction recording them is rolled back by the caller
+        for source_files in nomenclature_source_files.values():
+            remove_files_on_rollback(file_data["file_path"] for file_data in source_files.values())
+        for target_nomenclature in db_seqids["nomenclatures"]:
+            built_from = None
+            source_files = nomenclature_source_files.get(target_nomenclature)
+            if source_files is None:
+                built_from = selected_nomenclature
+                source_files = source_file_descriptions(os.path.join(get_source_files_dir(), f"{sva_id}_{target_nomenclature}"))
+            insert_source_files(sva_id, assembly_id, target_nomenclature, source_files, built_from)
         
+        if checkpoint is not None or sharded:
+            # published with the final commit
+            db.session.execute(
+                text("UPDATE source_version_assembly SET load_status = 'complete' WHERE sva_id = :sva_id"),
+                {"sva_id": sva_id}
+            )
+        if checkpoint is not None:
+            # the stored file is removed with the other temp files
+            save_ingestion_checkpoint(checkpoint, transcript_count_done, status="complete")
+            temp_manager.add_temp_file(checkpoint["file_path"], name=f"ingest_{sva_id}")
+
+        # sequences cached for an earlier load of this annotation are stale in every process
+        invalidate_transcript_sequences(sva_id)
+
         return {
             "success": True,
+            "sva_id": sva_id,
             "message": f"Annotation file processed successfully with nomenclature: {selected_nomenclature}",
             "attribute_mappings": {
                 "transcript_type": transcript_type_key,
                 "gene_type": gene_type_key,
                 "gene_name": gene_name_key
             },
-            "attribute_types": attribute_types
+            "attribute_types": attribute_types,
+            "ingest_stats": ingest_stats
         }
         
+    except JobCancelled:
+        if writer is not None:
+            shutdown_result = writer.shutdown()
+            if not shutdown_result["success"]:
+                print(shutdown_result["message"])
+        for source_files in nomenclature_source_files.values():
+            remove_source_files(source_files)
+        if checkpoint is not None:
+            fail_ingestion_checkpoint(checkpoint, "Cancelled")
+        if sharded and sva_id:
+            discard_result = discard_sharded_load(sva_id)
+            if not discard_result["success"]:
+                # rows of committed shards are left behind, so the load is reported as failed
+                return {"success": False, "message": f"Cancelled; {discard_result['message']}"}
+        raise
+    except Exception as e:
+        message = f"Failed to process annotation file: {str(e)}"
+        if writer is not None:
+            shutdown_result = writer.shutdown()
+            if not shutdown_result["success"]:
+                message += f"; {shutdown_result['message']}"
+        for source_files in nomenclature_source_files.values():
+            remove_source_files(source_files)
+        if checkpoint is not None:
+            fail_ingestion_checkpoint(checkpoint, str(e))
+        if sharded and sva_id:
+            discard_result = discard_sharded_load(sva_id)
+            if not discard_result["success"]:
+                message += f"; {discard_result['message']}"
+        return {"success": False,"message": message}
+
+def create_ingestion_checkpoint(sva_id: int, gtf_path: str, confirmation_data: Dict) -> Dict:
+    """
+    Records the start of a chunked annotation load.
+
+    The annotation file is moved next to the other temp files under a name derived from the
+    sva_id and is no longer tracked as a temp file, so it survives a failed or cancelled load.
+
+    Args:
+        sva_id: Source version assembly being loaded
+        gtf_path: Cleaned, normalized annotation file
+        confirmation_data: Confirmation parameters, stored to resume the load
+
+    Returns:
+        The checkpoint (sva_id, upload_hash, file_path, transcripts_done)
+    """
+    file_path = os.path.join(get_temp_files_dir(), f"ingest_{sva_id}.gtf")
+    shutil.move(gtf_path, file_path)
+    get_temp_file_manager().release_file(gtf_path)
+
+    upload_hash = file_sha256(file_path)
+    parameters = {k: v for k, v in confirmation_data.items() if k not in ("temp_file_path", "norm_gtf_path", "resume_sva_id", "background")}
+    db.session.execute(
+        text("""INSERT INTO ingestion_checkpoint (sva_id, upload_hash, file_path, parameters)
+                VALUES (:sva_id, :upload_hash, :file_path, :parameters)"""),
+        {
+            "sva_id": sva_id,
+            "upload_hash": upload_hash,
+            "file_path": to_relative_path(file_path),
+            "parameters": json.dumps(parameters)
+        }
+    )
+    return {"sva_id": sva_id, "upload_hash": upload_hash, "file_path": file_path, "transcripts_done": 0}
+
+def save_ingestion_checkpoint(checkpoint: Dict, transcripts_done: int, status: str = "running") -> None:
+    """
+    Records the number of transcripts written. Executed in the transaction of the chunk it describes.
+    """
+    db.session.execute(
+        text("""UPDATE ingestion_checkpoint SET transcripts_done = :transcripts_done, status = :status, message = NULL
+                WHERE sva_id = :sva_id AND upload_hash = :upload_hash"""),
+        {"transcripts_done": transcripts_done, "status": status, "sva_id": checkpoint["sva_id"], "upload_hash": checkpoint["upload_hash"]}
+    )
+    checkpoint["transcripts_done"] = transcripts_done
+
+def fail_ingestion_checkpoint(checkpoint: Dict, message: str) -> None:
+    """
+    Discards the current chunk and marks the load as failed so it can be resumed.
+    """
+    try:
+        db.session.rollback()
+        db.session.execute(
+            text("UPDATE ingestion_checkpoint SET status = 'failed', message = :message WHERE sva_id = :sva_id AND upload_hash = :upload_hash"),
+            {"message": message, "sva_id": checkpoint["sva_id"], "upload_hash": checkpoint["upload_hash"]}
+        )
+        db.session.commit()
     except Exception as e:
-        return {"success": False,"message": f"Failed to process annotation file: {str(e)}"}
+        db.session.rollback()
+        print(f"Warning: Could not record failed checkpoint for sva {checkpoint['sva_id']}: {str(e)}")
 
-def to_gtf(assembly_id: int, selected_nomenclature: str, outfname: str) -> None:
+def resume_annotation_load(sva_id: int, progress: Optional[JobProgress] = None) -> Dict:
     """
-    Retrieve transcripts for a given assembly and output them as a GTF file.
+    Resumes a chunked annotation load from its last checkpoint.
+
+    Args:
+        sva_id: Source version assembly whose load failed or was cancelled
+        progress: Optional JobProgress reporter when running as a background job
+
+    Returns:
+        Dictionary with processing results
+    """
+    try:
+        checkpoint = get_ingestion_checkpoint(sva_id)
+        if not checkpoint["success"]:
+            return checkpoint
+        checkpoint = checkpoint["data"]
+        if checkpoint is None:
+            return {"success": False, "message": f"Source version assembly {sva_id} was not loaded with checkpoints"}
+        if checkpoint["load_status"] == "complete":
+            return {"success": False, "message": f"Source version assembly {sva_id} is already loaded"}
+        if not os.path.exists(checkpoint["file_path"]):
+            return {"success": False, "message": f"Annotation file for source version assembly {sva_id} no longer exists"}
+        if file_sha256(checkpoint["file_path"]) != checkpoint["upload_hash"]:
+            return {"success": False, "message": f"Annotation file for source version assembly {sva_id} has changed since the load started"}
+
+        confirmation_data = dict(checkpoint["parameters"])
+        confirmation_data["resume_sva_id"] = sva_id
+        return confirm_and_process_annotation_file(confirmation_data, progress=progress)
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to resume annotation load: {str(e)}"}
+
+TX_ATTRIBUTE_ON_DUPLICATE = """
+    value_cat = CASE 
+        WHEN value_cat = '' OR value_cat IS NULL THEN VALUES(value_cat)
+        WHEN VALUES(value_cat) = '' OR VALUES(value_cat) IS NULL THEN value_cat
+        ELSE CONCAT(value_cat, '; ', VALUES(value_cat))
+    END,
+    value_text = CASE 
+        WHEN value_text IS NULL OR value_text = '' THEN VALUES(value_text)
+        WHEN VALUES(value_text) IS NULL OR VALUES(value_text) = '' THEN value_text
+        ELSE CONCAT(value_text, '; ', VALUES(value_text))
+    END"""
+
+def create_annotation_writer(pipelined: bool = False, bulk_load: Optional[bool] = None) -> Tuple[BulkWriter, IntronAllocator, Optional[BulkLoadReconciler]]:
+    """
+    Create a bulk writer and intron allocator for annotation ingestion.
+    Tables are registered in foreign key order so that parents are always flushed first.
     
     Args:
-        assembly_id: The ID of the assembly to retrieve transcripts for
-        selected_nomenclature: The nomenclature to use for sequence mapping
-        outfname: Output filename for the GTF file
+        pipelined: Write batches on a background thread (PipelinedBulkWriter)
+        bulk_load: Disable the per-row triggers and reconcile each batch instead
+                   (defaults to Config.INGEST_BULK_LOAD_MODE)
     
     Returns:
-        None
+        Tuple of the BulkWriter (gene, transcript, intron, transcript_intron, tx_dbxref and
+        tx_attribute registered), the IntronAllocator resolving intron IDs and the
+        BulkLoadReconciler (None when bulk_load is off)
+    """
+    bulk_load = Config.INGEST_BULK_LOAD_MODE if bulk_load is None else bulk_load
+    writer = PipelinedBulkWriter(queue_size=Config.INGEST_QUEUE_SIZE) if pipelined else BulkWriter()
+    reconciler = BulkLoadReconciler(writer) if bulk_load else None
+    writer.add_table("gene", ["gid", "gene_id", "sva_id", "name", "type_key", "type_value"])
+    writer.add_table("transcript", ["tid", "sequence_id", "strand", "start", "end", "chain_hash"],
+                     casts={"strand": "CAST({} AS UNSIGNED)"},
+                     after_flush=reconciler.after_transcript_flush if reconciler else None)
+    intron_allocator = IntronAllocator(writer)
+    writer.add_table("transcript_intron", ["tid", "iid"])
+    writer.add_table("tx_dbxref", ["tid", "sva_id", "transcript_id", "start", "end", "type_key", "type_value", "gid", "cds_start", "cds_end", "score"],
+                     after_flush=reconciler.after_dbxref_flush if reconciler else None)
+    writer.add_table("tx_attribute", ["tid", "sva_id", "transcript_id", "key_name", "value_cat", "value_text"],
+                     on_duplicate=TX_ATTRIBUTE_ON_DUPLICATE,
+                     after_flush=reconciler.after_attribute_flush if reconciler else None)
+    if reconciler:
+        writer.begin_bulk_load()
+    return writer, intron_allocator, reconciler
+
+def get_pipeline_stats(producer: TranscriptProducer, writer: PipelinedBulkWriter, elapsed: float) -> Dict:
+    """
+    Per-stage throughput and queue depth of a pipelined ingestion.
+    Resolution time is the time the ingesting thread spent neither waiting for the parser nor for the writer.
+    """
+    writer_stats = writer.get_pipeline_stats()
+    resolve_seconds = max(elapsed - producer.stats["wait_seconds"] - writer_stats["backpressure_seconds"], 0.0)
+    stats = {
+        "parse": {
+            "transcripts": producer.stats["transcripts"],
+            "batches": producer.stats["batches"],
+            "consumer_wait_seconds": round(producer.stats["wait_seconds"], 3),
+            "max_queue_depth": producer.stats["max_queue_depth"]
+        },
+        "resolve": {
+            "transcripts": producer.stats["transcripts"],
+            "seconds": round(resolve_seconds, 3),
+            "transcripts_per_sec": round(producer.stats["transcripts"] / resolve_seconds, 1) if resolve_seconds > 0 else None
+        },
+        "write": {
+            "rows": writer.rows_written,
+            "rows_per_sec": round(writer.rows_written / writer_stats["busy_seconds"], 1) if writer_stats["busy_seconds"] > 0 else None,
+            **writer_stats
+        },
+        "elapsed_seconds": round(elapsed, 3)
+    }
+    print(f"Pipeline: parse wait {stats['parse']['consumer_wait_seconds']}s, resolve {stats['resolve']['seconds']}s, "
+          f"write {writer_stats['busy_seconds']}s (backpressure {writer_stats['backpressure_seconds']}s) over {stats['elapsed_seconds']}s")
+    return stats
+
+def ingest_transcript(writer: BulkWriter, intron_allocator: IntronAllocator, chain_matcher: IntronChainMatcher,
+                      gene_map: Dict, transcript: TX, sva_id: int, attribute_types: Dict, excluded_attributes: List) -> None:
+    """
+    Queue the gene, transcript, dbxref and attribute rows of one annotation record.
+    
+    Args:
+        writer: BulkWriter used for the current ingestion
+        intron_allocator: IntronAllocator registered with the writer
+        chain_matcher: IntronChainMatcher matching against existing transcripts
+        gene_map: gene_id -> gid of the genes created so far, updated in place
+        transcript: TX object with seqid already converted to the sequence_id
+        sva_id: Source version assembly ID
+        attribute_types: Attribute name -> categorical/variable
+        excluded_attributes: Attributes not to store
     
     Raises:
-        Exception: If there's an error writing to the file or executing the query
-    """
-    # Query to retrieve transcript data with intron information
-    query = text("""
-        SELECT 
-            t.tid,
-            t.sequence_id,
-            t.strand,
-            t.start,
-            t.end,
-            ti.tid as ti_tid,
-            ti.iid,
-            i.iid as intron_iid,
-            i.sequence_id as intron_sequence_id,
-            i.strand as intron_strand,
-            i.start as intron_start,
-            i.end as intron_end,
-            sim.sequence_name
-        FROM transcript t 
-        JOIN transcript_intron ti ON t.tid = ti.tid 
-        JOIN intron i ON ti.iid = i.iid 
-        JOIN sequence_id s ON t.sequence_id = s.sequence_id
-        JOIN sequence_id_map sim ON s.sequence_id = sim.sequence_id 
-                                AND s.assembly_id = sim.assembly_id
-        WHERE 
-            s.assembly_id = :assembly_id 
-            AND sim.nomenclature = :nomenclature
-        ORDER BY t.tid;
-    """)
+        Exception: If a record could not be queued
+    """
+    working_gid = gene_map.get(transcript.gene_id,None)
+    if working_gid is None:
+        working_gid = insert_gene(writer,transcript,sva_id)
+        if not working_gid["success"]:
+            raise Exception(f"Failed to insert gene: {working_gid['message']}")
+        working_gid = working_gid["gene_id"]
+        gene_map[transcript.gene_id] = working_gid
     
-    try:
-        select_res = db.session.execute(
-            query, 
-            {"assembly_id": assembly_id, "nomenclature": selected_nomenclature}
-        )
+    # tid PK of the transcript being worked on as it appears in the Transcripts table
+    # when several existing records share the intron chain one of them is picked (see IntronChainMatcher)
+    working_tid = chain_matcher.match(transcript.seqid, transcript.strand, transcript.start, transcript.end, transcript.introns,
+                                      transcript_id=transcript.tid)
+
+    if working_tid is None:
+        working_tid = insert_transcript(writer,intron_allocator,transcript)
+        if not working_tid["success"]:
+            raise Exception(f"Failed to insert transcript: {working_tid['message']}")
+        working_tid = working_tid["transcript_id"]
+        chain_matcher.register_new(working_tid)
+
+    attribute_rows = []
+    for attribute_key, attribute_value in transcript.attributes.items():
+        if attribute_key in ["transcript_id", "gene_id"]:
+            continue
+        if attribute_key in excluded_attributes:
+            continue
+        if attribute_key not in attribute_types:
+            continue
         
-        with open(outfname, "w") as out_fp:
-            # Check if we have any results
-            rows = [dict(row._mapping) for row in select_res]
-            if rows:
-                for tx in group_rows(rows):
-                    out_fp.write(tx.to_gtf() + "\n")
-            # if nothing in the database - create empty file so gffcompare has something to run against
-                    
-    except Exception as e:
-        raise
+        attribute_type = attribute_types[attribute_key]
+        
+        value_text = ""
+        value_cat = ""
+        if attribute_type == "categorical":
+            value_cat = attribute_value
+        else:
+            value_text = attribute_value
+
+        attribute_rows.append((attribute_key, value_cat, value_text))
 
-def insert_gene(transcript: TX, sva_id: int) -> Dict:
+    dbxref_res = insert_dbxref(writer,transcript,working_tid,working_gid,sva_id)
+    if not dbxref_res["success"]:
+        raise Exception(f"Failed to insert dbxref: {dbxref_res['message']}")
+
+    # value and value_text are concatenated if the primary key already exists
+    for attribute_key, value_cat, value_text in attribute_rows:
+        writer.add("tx_attribute", {
+            "tid": working_tid,
+            "sva_id": sva_id,
+            "transcript_id": transcript.tid,
+            "key_name": attribute_key,
+            "value_cat": value_cat,
+            "value_text": value_text
+        })
+
+def ingest_annotation_shard(app_config: Dict, shard_gtf_path: str, sva_id: int, settings: Dict) -> Dict:
     """
-    Insert a gene record and return the generated gid.
+    Load the transcripts of one shard. Runs in a worker process of ingest_annotation_sharded
+    with its own application context and database connection, and commits its rows on success.
     
     Args:
-        transcript: TX object containing gene information
-        sva_id: Source version assembly ID
+        app_config: Database settings of the application running the load
+        shard_gtf_path: Normalized GTF file holding the records of the shard's sequences
+        sva_id: Source version assembly ID (already committed)
+        settings: sequence_name_mapping, attribute keys, attribute_types and excluded_attributes
     
     Returns:
-        Dictionary with success status and gene_id
+        Dictionary with success status, number of transcripts and ingest statistics
+    """
+    app = create_db_app(app_config)
+    with app.app_context():
+        writer = None
+        try:
+            start = time.perf_counter()
+            writer, intron_allocator, reconciler = create_annotation_writer(pipelined=Config.INGEST_PIPELINE)
+            chain_matcher = IntronChainMatcher(execute=writer.execute)
+            gene_map = dict()
+            transcript_count_done = 0
+            sequence_name_mapping = settings["sequence_name_mapping"]
+            transcripts = read_transcripts(shard_gtf_path,
+                                           transcript_type_key=settings["transcript_type_key"],
+                                           gene_type_key=settings["gene_type_key"],
+                                           gene_name_key=settings["gene_name_key"])
+            for transcript_count_done, transcript in enumerate(transcripts, start=1):
+                assert transcript.seqid in sequence_name_mapping, f"Sequence ID {transcript.seqid} not found in the database"
+                transcript.seqid = sequence_name_mapping[transcript.seqid]
+                ingest_transcript(writer, intron_allocator, chain_matcher, gene_map, transcript, sva_id,
+                                  settings["attribute_types"], settings["excluded_attributes"])
+
+            ingest_stats = writer.close()
+            ingest_stats["intron"].update(intron_allocator.stats)
+            ingest_stats["intron_chain_matches"] = chain_matcher.stats
+            if reconciler:
+                ingest_stats["bulk_load_reconciliation"] = reconciler.stats
+            db.session.commit()
+            return {
+                "success": True,
+                "transcripts": transcript_count_done,
+                "rows_written": writer.rows_written,
+                "seconds": round(time.perf_counter() - start, 3),
+                "ingest_stats": ingest_stats
+            }
+
+        except Exception as e:
+            message = str(e)
+            if writer is not None:
+                shutdown_result = writer.shutdown()
+                if not shutdown_result["success"]:
+                    message += f"; {shutdown_result['message']}"
+            db.session.rollback()
+            return {"success": False, "message": message}
+
+def ingest_annotation_sharded(gtf_path: str, sva_id: int, settings: Dict, num_shards: int,
+                              seqid_counts: Optional[Dict] = None, transcript_count: Optional[int] = None,
+                              progress: Optional[JobProgress] = None) -> Dict:
+    """
+    Load an annotation with one worker process per shard of sequences.
+    
+    Transcripts on different sequences never share introns or intron chains, so shards are
+    independent apart from genes whose transcripts lie on several sequences. Each shard creates
+    its own gene records and they are merged by gene_id once all shards are loaded.
+    
+    Args:
+        gtf_path: Cleaned normalized GTF file
+        sva_id: Source version assembly ID (already committed)
+        settings: Passed to ingest_annotation_shard
+        num_shards: Maximum number of shards and worker processes
+        seqid_counts: Optional seqid -> number of transcripts used to balance shards (e.g. from analyze_gtf)
+        transcript_count: Optional total number of transcripts, used for progress reporting
+        progress: Optional JobProgress reporter
+    
+    Returns:
+        Combined ingest statistics with per-shard details
+    
+    Raises:
+        Exception: If a shard fails. Shards that already committed are not rolled back;
+        the caller discards the source version assembly (see discard_sharded_load).
     """
+    temp_manager = get_temp_file_manager()
+    progress = progress or JobProgress()
+
+    # without an analysis every sequence counts the same
+    if seqid_counts is None:
+        seqid_counts = {seqid: 1 for seqid in get_seqids_from_gtf(gtf_path)}
+    seqid_counts = {seqid: count for seqid, count in seqid_counts.items() if seqid in settings["sequence_name_mapping"]}
+    shards = assign_seqid_shards(seqid_counts, num_shards)
+    shard_paths = [temp_manager.create_temp_filename(name=f"ingest_shard_{sva_id}_{i}") for i in range(len(shards))]
+
+    # shard processes connect with the settings of the application running the load
+    app_config = {key: value for key, value in current_app.config.items() if key.startswith("SQLALCHEMY_")}
+
+    start = time.perf_counter()
+    shard_results = [None] * len(shards)
     try:
-        result = db.session.execute(
-            text("INSERT INTO gene (gene_id, sva_id, name, type_key, type_value) VALUES (:gene_id, :sva_id, :name, :type_key, :type_value)"),
-            {
-                "gene_id": transcript.gene_id,
-                "sva_id": sva_id,
-                "name": transcript.gene_name_value,
-                "type_key": transcript.gene_type_key,
-                "type_value": transcript.gene_type_value
+        split_gtf_by_seqid(gtf_path, [shard["seqids"] for shard in shards], shard_paths)
+        print(f"Loading {len(shards)} shards: " + ", ".join(f"{len(shard['seqids'])} sequences/{shard['transcripts']} transcripts" for shard in shards))
+
+        transcripts_done = 0
+        rows_written = 0
+        # spawn keeps the workers free of the parent's database connections and threads
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(ingest_annotation_shard, app_config, shard_path, sva_id, settings): shard_idx
+                for shard_idx, shard_path in enumerate(shard_paths)
             }
-        )
-        
-        return {
-            "success": True,
-            "gene_id": result.lastrowid,
-            "message": "Gene inserted successfully"
+            try:
+                for future in as_completed(futures):
+                    shard_idx = futures[future]
+                    result = future.result()
+                    if not result["success"]:
+                        raise Exception(f"Shard {shard_idx} failed: {result['message']}")
+                    shard_results[shard_idx] = result
+                    transcripts_done += result["transcripts"]
+                    rows_written += result["rows_written"]
+                    progress.update(
+                        percent=5 + 75 * transcripts_done / transcript_count if transcript_count else None,
+                        rows_written=rows_written
+                    )
+            except BaseException:
+                # shards that are already running finish before the executor exits
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        for shard_path in shard_paths:
+            temp_manager.cleanup_file(shard_path)
+    load_seconds = time.perf_counter() - start
+
+    merged_genes = merge_shard_genes(sva_id)
+
+    # counters are summed over the shards; per-shard timings are reported separately
+    ingest_stats = {}
+    for result in shard_results:
+        for table, table_stats in result["ingest_stats"].items():
+            totals = ingest_stats.setdefault(table, {})
+            for key, value in table_stats.items():
+                if isinstance(value, int):
+                    totals[key] = totals.get(key, 0) + value
+                elif isinstance(value, list):
+                    totals.setdefault(key, []).extend(value)
+    ingest_stats["shards"] = [
+        {
+            "seqids": shard["seqids"],
+            "transcripts": result["transcripts"],
+            "rows_written": result["rows_written"],
+            "seconds": result["seconds"]
         }
-        
+        for shard, result in zip(shards, shard_results)
+    ]
+    ingest_stats["merged_genes"] = merged_genes
+    ingest_stats["seconds"] = round(load_seconds, 3)
+    print(f"Sharded load: {transcripts_done} transcripts in {load_seconds:.1f}s over {len(shards)} shards, {merged_genes} gene records merged")
+    return ingest_stats
+
+def merge_shard_genes(sva_id: int) -> int:
+    """
+    Merge the gene records created by several shards for the same gene_id into the one with the lowest gid.
+    
+    Args:
+        sva_id: Source version assembly ID
+    
+    Returns:
+        Number of gene records removed
+    """
+    duplicate_genes = """
+        SELECT gene_id, MIN(gid) AS gid FROM gene
+        WHERE sva_id = :sva_id
+        GROUP BY gene_id HAVING COUNT(*) > 1
+    """
+    db.session.execute(
+        text(f"""UPDATE tx_dbxref d
+                 JOIN gene g ON g.sva_id = d.sva_id AND g.gid = d.gid
+                 JOIN ({duplicate_genes}) k ON k.gene_id = g.gene_id
+                 SET d.gid = k.gid
+                 WHERE d.sva_id = :sva_id AND g.gid <> k.gid"""),
+        {"sva_id": sva_id}
+    )
+    result = db.session.execute(
+        text(f"""DELETE g FROM gene g
+                 JOIN ({duplicate_genes}) k ON k.gene_id = g.gene_id
+                 WHERE g.sva_id = :sva_id AND g.gid <> k.gid"""),
+        {"sva_id": sva_id}
+    )
+    return result.rowcount
+
+def discard_sharded_load(sva_id: int) -> Dict:
+    """
+    Remove a failed sharded load. Shards commit independently, so the rows already written are
+    deleted explicitly, in a single transaction: the source version assembly (cascading to its
+    genes, dbxrefs and attributes) and the transcripts that were created by it.
+    
+    Returns:
+        Dictionary with success status and message
+    """
+    try:
+        db.session.rollback()
+        created_tids = get_tids_created_by_sva(sva_id)
+        result = delete_source_version_assembly(sva_id)
+        if not result["success"]:
+            raise Exception(result["message"])
+        for i in range(0, len(created_tids), 1000):
+            db.session.execute(
+                text("DELETE FROM transcript WHERE tid IN :tids AND NOT EXISTS (SELECT 1 FROM tx_dbxref d WHERE d.tid = transcript.tid)").bindparams(bindparam("tids", expanding=True)),
+                {"tids": created_tids[i:i + 1000]}
+            )
+        db.session.commit()
+        return {"success": True, "message": f"Discarded sharded load of source version assembly {sva_id}"}
     except Exception as e:
-        return {
-            "success": False,
-            "message": f"Failed to insert gene: {str(e)}"
-        }
+        db.session.rollback()
+        return {"success": False, "message": f"Failed to discard sharded load of source version assembly {sva_id}: {str(e)}"}
 
-def insert_intron(sequence_id: int, strand: str, start: int, end: int) -> Dict:
+def insert_gene(writer: BulkWriter, transcript: TX, sva_id: int) -> Dict:
     """
-    Insert an intron record and return the iid (new or existing).
+    Queue a gene record and return the reserved gid.
     
     Args:
-        sequence_id: Sequence ID
-        strand: Strand (+ or -)
-        start: Start position
-        end: End position
+        writer: BulkWriter used for the current ingestion
+        transcript: TX object containing gene information
+        sva_id: Source version assembly ID
     
     Returns:
-        Dictionary with success status and intron_id
+        Dictionary with success status and gene_id
     """
     try:
-        result = db.session.execute(
-            text("""
-                INSERT INTO intron (sequence_id, strand, start, end) 
-                VALUES (:sequence_id, :strand, :start, :end)
-                ON DUPLICATE KEY UPDATE 
-                    iid = LAST_INSERT_ID(iid)
-            """),
-            {
-                "sequence_id": sequence_id,
-                "strand": strand,
-                "start": start,
-                "end": end
-            }
-        )
+        gid = writer.next_id("gene", "gid")
+        writer.add("gene", {
+            "gid": gid,
+            "gene_id": transcript.gene_id,
+            "sva_id": sva_id,
+            "name": transcript.gene_name_value,
+            "type_key": transcript.gene_type_key,
+            "type_value": transcript.gene_type_value
+        })
         
         return {
             "success": True,
-            "intron_id": result.lastrowid,
-            "message": "Intron processed successfully"
+            "gene_id": gid,
+            "message": "Gene inserted successfully"
         }
         
     except Exception as e:
         return {
             "success": False,
-            "intron_id": None,
-            "message": f"Failed to insert intron: {str(e)}"
+            "message": f"Failed to insert gene: {str(e)}"
         }
 
-def insert_transcript(transcript: TX) -> Dict:
+def insert_transcript(writer: BulkWriter, intron_allocator: IntronAllocator, transcript: TX) -> Dict:
     """
-    Insert a transcript record and return the generated tid.
+    Queue a transcript record and return the reserved tid.
     
     Args:
+        writer: BulkWriter used for the current ingestion
+        intron_allocator: IntronAllocator resolving intron IDs for the current ingestion
         transcript: TX object containing transcript information
-        assembly_id: Assembly ID
     
     Returns:
         Dictionary with success status and transcript_id
     """
     try:
-        result = db.session.execute(
-            text("INSERT INTO transcript (sequence_id, strand, start, end) VALUES (:sequence_id, :strand, :start, :end)"),
-            {
-                "sequence_id": transcript.seqid,
-                "strand": transcript.strand,
-                "start": transcript.start,
-                "end": transcript.end
-            }
-        )
-        
-        tid = result.lastrowid
+        tid = writer.next_id("transcript", "tid")
+        writer.add("transcript", {
+            "tid": tid,
+            "sequence_id": transcript.seqid,
+            "strand": transcript.strand,
+            "start": transcript.start,
+            "end": transcript.end,
+            "chain_hash": intron_chain_signature(transcript.seqid, transcript.strand, transcript.introns)
+        })
         
         # Deal with introns here since they are part of transcript
         for intron in transcript.introns:
-            intron_result = insert_intron(transcript.seqid, transcript.strand, intron[0], intron[1])
-            
-            if intron_result["success"]:
-                db.session.execute(
-                    text("INSERT INTO transcript_intron (tid, iid) VALUES (:tid, :iid)"),
-                    {"tid": tid, "iid": intron_result["intron_id"]}
-                )
-            else:
-                raise Exception(f"Failed to insert intron: {intron_result['message']}")
+            iid = intron_allocator.get_iid(transcript.seqid, transcript.strand, intron[0], intron[1])
+            writer.add("transcript_intron", {"tid": tid, "iid": iid})
         
         return {
             "success": True,
@@ -798,45 +1273,38 @@ def insert_transcript(transcript: TX) -> Dict:
             "message": f"Failed to insert transcript: {str(e)}"
         }
 
-def insert_dbxref(transcript: TX, tid: int, gid: int, sva_id: int) -> Dict:
+def insert_dbxref(writer: BulkWriter, transcript: TX, tid: int, gid: int, sva_id: int) -> Dict:
     """
-    Insert a transcript database cross-reference record.
+    Queue a transcript database cross-reference record.
     
     Args:
+        writer: BulkWriter used for the current ingestion
         transcript: TX object containing transcript information
         tid: Transcript ID
         gid: Gene ID
         sva_id: Source version assembly ID
     
     Returns:
-        Dictionary with success status and record_id
+        Dictionary with success status
     """
     try:
-        columns = ["tid", "sva_id", "transcript_id", "start", "end", "type_key", "type_value", "gid"]
-        values = [tid, sva_id, transcript.tid, transcript.start, transcript.end, 
-                  transcript.transcript_type_key, transcript.transcript_type_value, gid]
-        
-        if transcript.cds_start is not None and transcript.cds_end is not None:
-            columns.extend(["cds_start", "cds_end"])
-            values.extend([transcript.cds_start, transcript.cds_end])
-        
-        if transcript.score is not None:
-            columns.append("score")
-            values.append(transcript.score)
-        
-        placeholders = ", ".join([f":{col}" for col in columns])
-        column_list = ", ".join(columns)
-        
-        query = f"INSERT INTO tx_dbxref ({column_list}) VALUES ({placeholders})"
-        
-        result = db.session.execute(
-            text(query),
-            dict(zip(columns, values))
-        )
+        has_cds = transcript.cds_start is not None and transcript.cds_end is not None
+        writer.add("tx_dbxref", {
+            "tid": tid,
+            "sva_id": sva_id,
+            "transcript_id": transcript.tid,
+            "start": transcript.start,
+            "end": transcript.end,
+            "type_key": transcript.transcript_type_key,
+            "type_value": transcript.transcript_type_value,
+            "gid": gid,
+            "cds_start": transcript.cds_start if has_cds else None,
+            "cds_end": transcript.cds_end if has_cds else None,
+            "score": transcript.score
+        })
         
         return {
             "success": True,
-            "record_id": result.lastrowid,
             "message": "Database cross-reference inserted successfully"
         }
         
@@ -846,6 +1314,46 @@ def insert_dbxref(transcript: TX, tid: int, gid: int, sva_id: int) -> Dict:
             "message": f"Failed to insert database cross-reference: {str(e)}"
         }
 
+def insert_source_files(sva_id: int, assembly_id: int, nomenclature: str, source_files: Dict, built_from: Optional[str] = None) -> None:
+    """
+    Records the source files of an annotation in a nomenclature.
+
+    Args:
+        source_files: Files as described by SourceFileBuilder.source_file_descriptions
+        built_from: Nomenclature the files are generated from on first request; None if they were built already
+    """
+    for source_file_data in source_files.values():
+        db.session.execute(
+            text("""INSERT INTO source_file (sva_id, assembly_id, file_path, nomenclature, filetype, description, built_from)
+                    VALUES (:sva_id, :assembly_id, :file_path, :nomenclature, :filetype, :description, :built_from)"""),
+            {
+                "sva_id": sva_id,
+                "assembly_id": assembly_id,
+                # Convert absolute path to relative path for database storage
+                "file_path": to_relative_path(source_file_data["file_path"]),
+                "nomenclature": nomenclature,
+                "filetype": source_file_data["file_type"],
+                "description": source_file_data["description"],
+                "built_from": built_from
+            }
+        )
+
+def invalidate_transcript_sequences(sva_id: int) -> int:
+    """
+    Make the cached transcript sequences of a source version assembly stale in every process.
+
+    Its sequence_version is incremented, so the caches of all processes miss once the change is
+    committed, and the values of this process (and the disk cache) are dropped right away.
+
+    Returns:
+        Number of values removed from the memory cache of this process
+    """
+    db.session.execute(
+        text("UPDATE source_version_assembly SET sequence_version = sequence_version + 1 WHERE sva_id = :sva_id"),
+        {"sva_id": sva_id}
+    )
+    return get_sequence_cache().invalidate_sva(sva_id)
+
 def delete_source_version_assembly(sva_id: int) -> Dict:
     """
     Deletes a source version assembly.
@@ -854,15 +1362,17 @@ def delete_source_version_assembly(sva_id: int) -> Dict:
         # Get file paths before deleting the records (relative paths from DB)
         source_files_result = db.session.execute(text("SELECT file_path FROM source_file WHERE sva_id = :sva_id"), {"sva_id": sva_id})
         file_paths = [row.file_path for row in source_files_result]
+        # annotation files kept for resuming chunked loads
+        checkpoint_result = db.session.execute(text("SELECT file_path FROM ingestion_checkpoint WHERE sva_id = :sva_id"), {"sva_id": sva_id})
+        file_paths.extend(row.file_path for row in checkpoint_result)
         
         # Delete the database records
         db.session.execute(text("DELETE FROM source_version_assembly WHERE sva_id = :sva_id"), {"sva_id": sva_id})
+        get_sequence_cache().invalidate_sva(sva_id)
         
         # Cleanup the files - resolve relative paths to absolute
         for rel_file_path in file_paths:
-            abs_file_path = to_absolute_path(rel_file_path)
-            if os.path.exists(abs_file_path):
-                os.remove(abs_file_path)
+            remove_source_file(to_absolute_path(rel_file_path))
                 
         return {"success": True, "message": "Source version assembly deleted successfully"}
     except Exception as e:
@@ -1,6 +1,8 @@
+import json
 from sqlalchemy import text
 from db.db import db, to_absolute_path, is_paths_configured
 from db.methods.utils import *
+from .utils import group_rows
 
 def source_exists_by_name(source_name):
     try:
@@ -65,6 +67,15 @@ def source_version_assembly_exists_by_ids(sv_id, assembly_id):
     except Exception as e:
         return False
 
+def source_version_assembly_exists_by_id(sva_id):
+    try:
+        result = db.session.execute(text("""
+            SELECT COUNT(*) FROM source_version_assembly WHERE sva_id = :sva_id
+        """), {"sva_id": sva_id}).fetchone()
+        return result[0] > 0
+    except Exception as e:
+        return False
+
 def get_files_by_source_id(source_id):
     try:
         result = db.session.execute(text("""
@@ -185,11 +196,12 @@ def get_latest_source_versions():
 def get_source_file_by_extension(sva_id, nomenclature, file_type):
     """
     Get a source file path and metadata for a specific sva_id, nomenclature, and file type.
-    Returns: {"file_path": directory_path, "file_name": filename, "friendly_file_name": friendly_file_name}
+    Returns: {"file_path": directory_path, "file_name": filename, "friendly_file_name": friendly_file_name,
+              "built_from": nomenclature the file is built from or None, "available": whether the file exists}
     """
     try:
         result = db.session.execute(text("""
-            SELECT sf.file_path, a.assembly_name, s.name, sv.version_name
+            SELECT sf.file_path, sf.built_from, a.assembly_name, s.name, sv.version_name
             FROM source_file sf
             JOIN source_version_assembly sva ON sf.sva_id = sva.sva_id
             JOIN assembly a ON sva.assembly_id = a.assembly_id
@@ -220,14 +232,17 @@ def get_source_file_by_extension(sva_id, nomenclature, file_type):
 
         friendly_file_name = f"{source_name}_v{version_name}_{assembly_name}_{nomenclature}.{file_extension}"
 
-        # Verify file exists
-        if not os.path.exists(file_path):
+        # files of other nomenclatures than the uploaded one are built on first request (see SourceFileCache)
+        available = os.path.exists(file_path)
+        if not available and result.built_from is None:
             raise Exception(f"File not found at path: {file_path}")
         
         return {
             "file_path": directory_path,
             "file_name": file_name,
-            "friendly_file_name": friendly_file_name
+            "friendly_file_name": friendly_file_name,
+            "built_from": result.built_from,
+            "available": available
         }
     except Exception as e:
         raise Exception(f"Error retrieving file: {str(e)}")
@@ -260,4 +275,166 @@ def get_all_transcript_types(sva_id: int=None):
         result = db.session.execute(text(query), params).fetchall()
         return {"success": True, "data": result}
     except Exception as e:
-        return {"success": False, "message": str(e)}
\ No newline at end of file
+        return {"success": False, "message": str(e)}
+
+def is_sva_public(sva_id: int, assembly_id: int = None) -> bool:
+    """
+    Check that a source version assembly is shown on the public site: it exists (on the given
+    assembly) and its load is complete, as in the all_source_versions and latest_source_versions views.
+    """
+    query = "SELECT COUNT(*) FROM source_version_assembly WHERE sva_id = :sva_id AND load_status = 'complete'"
+    if assembly_id is not None:
+        query += " AND assembly_id = :assembly_id"
+    return db.session.execute(text(query), {"sva_id": sva_id, "assembly_id": assembly_id}).scalar() > 0
+
+def iter_transcripts_for_export(assembly_id: int, nomenclature: str, sva_id: int = None):
+    """
+    Stream transcripts of an assembly from the database, one TX at a time.
+
+    Rows are read through an unbuffered server-side cursor on a dedicated connection and
+    grouped on the fly, so memory use does not depend on the size of the database. The
+    intron join is a LEFT JOIN so single-exon transcripts are included. Only transcripts of
+    source version assemblies whose load is complete are exported, like the public views.
+
+    Args:
+        assembly_id: Assembly to export
+        nomenclature: Nomenclature used for sequence names
+        sva_id: Optional source version assembly. When given, only its transcripts are exported,
+                with their source transcript_id, gene_id and coordinates
+
+    Yields:
+        TX objects
+    """
+    if sva_id is None:
+        query = text("""
+            SELECT t.tid, t.strand+0 AS strand, t.start, t.end, sim.sequence_name,
+                   i.start AS intron_start, i.end AS intron_end
+            FROM transcript t
+            JOIN sequence_id s ON t.sequence_id = s.sequence_id
+            JOIN sequence_id_map sim ON s.sequence_id = sim.sequence_id
+                                    AND s.assembly_id = sim.assembly_id
+            LEFT JOIN transcript_intron ti ON t.tid = ti.tid
+            LEFT JOIN intron i ON ti.iid = i.iid
+            WHERE s.assembly_id = :assembly_id
+              AND sim.nomenclature = :nomenclature
+              AND EXISTS (
+                  SELECT 1 FROM tx_dbxref d
+                  JOIN source_version_assembly sva ON d.sva_id = sva.sva_id
+                  WHERE d.tid = t.tid AND sva.load_status = 'complete'
+              )
+            ORDER BY t.tid
+        """)
+    else:
+        query = text("""
+            SELECT t.tid, d.transcript_id, g.gene_id, t.strand+0 AS strand, d.start, d.end, sim.sequence_name,
+                   i.start AS intron_start, i.end AS intron_end
+            FROM tx_dbxref d
+            JOIN source_version_assembly sva ON d.sva_id = sva.sva_id AND sva.load_status = 'complete'
+            JOIN transcript t ON d.tid = t.tid
+            LEFT JOIN gene g ON d.gid = g.gid
+            JOIN sequence_id s ON t.sequence_id = s.sequence_id
+            JOIN sequence_id_map sim ON s.sequence_id = sim.sequence_id
+                                    AND s.assembly_id = sim.assembly_id
+            LEFT JOIN transcript_intron ti ON t.tid = ti.tid
+            LEFT JOIN intron i ON ti.iid = i.iid
+            WHERE d.sva_id = :sva_id
+              AND s.assembly_id = :assembly_id
+              AND sim.nomenclature = :nomenclature
+            ORDER BY t.tid, d.transcript_id
+        """)
+
+    with db.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            query,
+            {"assembly_id": assembly_id, "nomenclature": nomenclature, "sva_id": sva_id}
+        )
+        yield from group_rows(row._mapping for row in result)
+
+def stream_annotation(assembly_id: int, nomenclature: str, sva_id: int = None, file_format: str = "gtf", chunk_size: int = 1000):
+    """
+    Stream the annotation of an assembly as GTF or GFF3 text.
+
+    Args:
+        assembly_id: Assembly to export
+        nomenclature: Nomenclature used for sequence names
+        sva_id: Optional source version assembly to restrict the export to
+        file_format: "gtf" or "gff"
+        chunk_size: Number of transcripts per yielded chunk
+
+    Yields:
+        Chunks of GTF/GFF3 text
+    """
+    assert file_format in ("gtf", "gff"), f"Unsupported format: {file_format}"
+
+    chunk = ["##gff-version 3\n"] if file_format == "gff" else []
+    for transcript in iter_transcripts_for_export(assembly_id, nomenclature, sva_id):
+        chunk.append((transcript.to_gff() if file_format == "gff" else transcript.to_gtf()) + "\n")
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def get_ingestion_checkpoint(sva_id: int):
+    """
+    Returns the most recent checkpoint of a chunked annotation load.
+
+    Args:
+        sva_id: Source version assembly being loaded
+
+    Returns:
+        Dictionary with success status and the checkpoint (None if the sva was not loaded in chunks)
+    """
+    try:
+        row = db.session.execute(text("""
+            SELECT c.sva_id, c.upload_hash, c.file_path, c.transcripts_done, c.status, c.parameters, c.message,
+                   c.last_updated, sva.load_status
+            FROM ingestion_checkpoint c
+            JOIN source_version_assembly sva ON c.sva_id = sva.sva_id
+            WHERE c.sva_id = :sva_id
+            ORDER BY c.last_updated DESC
+            LIMIT 1
+        """), {"sva_id": sva_id}).fetchone()
+        if not row:
+            return {"success": True, "data": None}
+
+        checkpoint = dict(row._mapping)
+        checkpoint["parameters"] = json.loads(checkpoint["parameters"]) if isinstance(checkpoint["parameters"], str) else checkpoint["parameters"]
+        checkpoint["file_path"] = to_absolute_path(checkpoint["file_path"])
+        return {"success": True, "data": checkpoint}
+    except Exception as e:
+        return {"success": False, "message": f"Failed to get ingestion checkpoint: {str(e)}"}
+
+def get_incomplete_ingestions():
+    """
+    Returns annotation loads that were committed in chunks and have not completed.
+    """
+    try:
+        rows = db.session.execute(text("""
+            SELECT c.sva_id, sva.sv_id, sva.assembly_id, c.upload_hash, c.transcripts_done, c.status, c.message, c.last_updated
+            FROM ingestion_checkpoint c
+            JOIN source_version_assembly sva ON c.sva_id = sva.sva_id
+            WHERE sva.load_status = 'loading'
+            ORDER BY c.last_updated DESC
+        """)).fetchall()
+        return {"success": True, "data": [dict(row._mapping) for row in rows]}
+    except Exception as e:
+        return {"success": False, "message": f"Failed to get incomplete ingestions: {str(e)}"}
+
+def get_loaded_gene_map(sva_id: int) -> dict:
+    """
+    Returns the gene_id -> gid map of the genes already stored for a source version assembly.
+    """
+    rows = db.session.execute(text("SELECT gid, gene_id FROM gene WHERE sva_id = :sva_id"), {"sva_id": sva_id})
+    return {row.gene_id: row.gid for row in rows}
+
+def get_tids_created_by_sva(sva_id: int) -> list:
+    """
+    Returns the transcripts referenced only by a source version assembly, i.e. created by its load.
+    """
+    rows = db.session.execute(text("""
+        SELECT DISTINCT d.tid FROM tx_dbxref d
+        WHERE d.sva_id = :sva_id
+          AND NOT EXISTS (SELECT 1 FROM tx_dbxref o WHERE o.tid = d.tid AND o.sva_id <> :sva_id)
+    """), {"sva_id": sva_id})
+    return [row.tid for row in rows]
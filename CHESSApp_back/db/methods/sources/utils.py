@@ -90,55 +90,49 @@ def organize_all_source_versions(source_versions_data):
 
     return sources_dict
 
-def group_rows(rows: List[Dict]) -> TX:
+def group_rows(rows) -> TX:
     """
-    Group database rows by transcript ID and yield TX objects.
+    Group database rows by transcript and yield TX objects.
+    
+    Rows must be ordered by transcript. Rows of single-exon transcripts carry no intron
+    (intron_start is NULL). When rows contain transcript_id and gene_id (exports of a
+    single source), those are used as the identifiers instead of the internal tid.
     
     Args:
-        rows: List of dictionaries containing transcript and intron data
+        rows: Iterable of row mappings containing transcript and intron data
     
     Yields:
         TX: Transcript objects with populated exon information
     """
     tx = TX()
+    current_key = None
     
     for row in rows:
-        tid = row['tid']  # transcript ID
+        transcript_id = row.get('transcript_id')
+        key = (row['tid'], transcript_id)
         
-        if tx.tid != tid:
-            if tx.tid is not None:
+        if key != current_key:
+            if current_key is not None:
                 tx.exons_from_introns()
                 yield tx
             tx = TX()
+            current_key = key
         
-        # Populate transcript data from row
-        tx.tid = tid
-        tx.strand = "+" if row['strand'] == 1 else "-"
-        tx.seqid = row['sequence_name']
-        tx.start = int(row['start'])
-        tx.end = int(row['end'])
-        tx.introns.append((int(row['intron_start']), int(row['intron_end'])))
+            # Populate transcript data from row
+            tx.tid = transcript_id if transcript_id is not None else row['tid']
+            tx.gene_id = row.get('gene_id')
+            tx.strand = "+" if row['strand'] == 1 else "-"
+            tx.seqid = row['sequence_name']
+            tx.start = int(row['start'])
+            tx.end = int(row['end'])
+        if row['intron_start'] is not None:
+            tx.introns.append((int(row['intron_start']), int(row['intron_end'])))
     
     # Don't forget to yield the last transcript
-    if tx.tid is not None:
+    if current_key is not None:
         tx.exons_from_introns()
         yield tx
 
-# parses the .tracking file generated by gffcompare and builds a map of reference to query transcripts
-# this is used inplace of simply parsing the annotated.gtf and relying on the class_code field, since gffcompare removes all non-essential attributes
-def load_tracking(tracking_fname:str) -> dict:
-    assert os.path.exists(tracking_fname),"tracking file does not exist: "+tracking_fname
-    res = dict()
-    with open(tracking_fname, 'r') as trackingFP:
-        for line in trackingFP:
-            lcs = line.strip().split("\t")
-            assert len(lcs)==5,"Invalid line in the tracking file: "+line
-            if lcs[3] == "=":
-                ref_tid = lcs[2].split("|")[1]
-                qry_tid = lcs[4].split("|")[1]
-                res[qry_tid] = ref_tid
-    return res
-
 def organize_feature_types(feature_types_data):
     """
     Organize feature types (genes or transcripts) by sva_id.
@@ -0,0 +1,260 @@
+import os
+import uuid
+import shutil
+import hashlib
+from typing import Dict, Optional
+from sqlalchemy import text
+from config import Config
+from db.db import db, to_relative_path, to_absolute_path
+from db.methods.utils import file_sha256
+
+from .queries import *
+from .utils import *
+
+def remove_expired_uploads() -> Dict:
+    """
+    Removes uploads that have not been active for Config.UPLOAD_EXPIRE_HOURS.
+    Files of finished uploads belong to whatever processed them and are left alone.
+    """
+    try:
+        rows = db.session.execute(
+            text("""SELECT upload_id, file_path, status FROM chunked_upload
+                    WHERE last_updated < NOW() - INTERVAL :hours HOUR"""),
+            {"hours": Config.UPLOAD_EXPIRE_HOURS}
+        ).fetchall()
+        for row in rows:
+            file_path = to_absolute_path(row.file_path)
+            if row.status == "uploading" and os.path.exists(file_path):
+                os.remove(file_path)
+            db.session.execute(
+                text("DELETE FROM chunked_upload WHERE upload_id = :upload_id"),
+                {"upload_id": row.upload_id}
+            )
+        return {"success": True, "count": len(rows)}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to remove expired uploads: {str(e)}"}
+
+def start_upload(file_name: str, total_size: int, expected_sha256: Optional[str] = None) -> Dict:
+    """
+    Starts a chunked upload.
+
+    The target file is created at its full size right away, so chunks can be written at their
+    offsets as they arrive and running out of disk space is detected before any data is sent.
+
+    Args:
+        file_name: Name of the file being uploaded
+        total_size: Size of the file in bytes
+        expected_sha256: Optional SHA-256 of the whole file, verified by finalize_upload
+
+    Returns:
+        Dictionary with success status, upload_id and the largest chunk size accepted
+    """
+    file_path = None
+    try:
+        if not file_name:
+            return {"success": False, "message": "File name is required"}
+        if total_size <= 0:
+            return {"success": False, "message": "File size must be a positive number of bytes"}
+        if expected_sha256 is not None:
+            expected_sha256 = expected_sha256.lower()
+            if not is_sha256(expected_sha256):
+                return {"success": False, "message": "sha256 must be a hex encoded SHA-256 digest"}
+
+        remove_expired_uploads()
+
+        upload_id = uuid.uuid4().hex
+        file_path = upload_file_path(upload_id)
+        free_bytes = shutil.disk_usage(os.path.dirname(file_path)).free
+        if total_size > free_bytes:
+            return {"success": False, "message": f"Not enough disk space for {total_size} bytes ({free_bytes} bytes free)"}
+
+        with open(file_path, "wb") as outFP:
+            outFP.truncate(total_size)
+
+        db.session.execute(
+            text("""INSERT INTO chunked_upload (upload_id, file_name, file_path, total_size, expected_sha256)
+                    VALUES (:upload_id, :file_name, :file_path, :total_size, :expected_sha256)"""),
+            {
+                "upload_id": upload_id,
+                "file_name": os.path.basename(file_name),
+                "file_path": to_relative_path(file_path),
+                "total_size": total_size,
+                "expected_sha256": expected_sha256
+            }
+        )
+
+        return {
+            "success": True,
+            "upload_id": upload_id,
+            "received_bytes": 0,
+            "max_chunk_size": Config.UPLOAD_CHUNK_MAX_BYTES,
+            "message": f"Upload of {file_name} started"
+        }
+
+    except Exception as e:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        return {"success": False, "message": f"Failed to start upload: {str(e)}"}
+
+def _lock_upload(upload_id: str):
+    # concurrent requests for the same upload are serialized until the caller commits
+    return db.session.execute(
+        text("""SELECT upload_id, file_name, file_path, total_size, received_bytes, expected_sha256, status
+                FROM chunked_upload WHERE upload_id = :upload_id FOR UPDATE"""),
+        {"upload_id": upload_id}
+    ).fetchone()
+
+def write_chunk(upload_id: str, offset: int, data: bytes, checksum: str) -> Dict:
+    """
+    Writes a chunk of an upload at its offset.
+
+    Chunks are sent in order; a chunk may start anywhere up to received_bytes, so a chunk whose
+    response was lost can be sent again. The chunk is only written once its checksum matches,
+    and it is flushed to disk before received_bytes moves past it.
+
+    Args:
+        upload_id: ID returned by start_upload
+        offset: Byte offset of the chunk in the file
+        data: Chunk content
+        checksum: Hex encoded SHA-256 of the chunk
+
+    Returns:
+        Dictionary with success status and received_bytes, the offset of the next chunk
+    """
+    try:
+        upload = _lock_upload(upload_id)
+        if not upload:
+            return {"success": False, "message": f"Upload {upload_id} does not exist"}
+        if upload.status != "uploading":
+            return {"success": False, "message": f"Upload is {upload.status}"}
+
+        received_bytes = int(upload.received_bytes)
+        if offset < 0 or offset > received_bytes:
+            return {
+                "success": False,
+                "received_bytes": received_bytes,
+                "message": f"Chunk offset {offset} does not continue the upload, resume at {received_bytes}"
+            }
+        if offset + len(data) > int(upload.total_size):
+            return {"success": False, "received_bytes": received_bytes, "message": "Chunk extends past the end of the file"}
+        if not checksum or hashlib.sha256(data).hexdigest() != checksum.lower():
+            return {"success": False, "received_bytes": received_bytes, "message": "Chunk checksum does not match, send the chunk again"}
+
+        fd = os.open(to_absolute_path(upload.file_path), os.O_WRONLY)
+        try:
+            written = 0
+            while written < len(data):
+                written += os.pwrite(fd, data[written:], offset + written)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        received_bytes = max(received_bytes, offset + len(data))
+        db.session.execute(
+            text("UPDATE chunked_upload SET received_bytes = :received_bytes WHERE upload_id = :upload_id"),
+            {"received_bytes": received_bytes, "upload_id": upload_id}
+        )
+
+        return {
+            "success": True,
+            "received_bytes": received_bytes,
+            "total_size": int(upload.total_size),
+            "message": f"Received {received_bytes} of {int(upload.total_size)} bytes"
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to write chunk: {str(e)}"}
+
+def finalize_upload(upload_id: str) -> Dict:
+    """
+    Completes an upload once every byte has been received.
+
+    The file is hashed once and checked against the digest given to start_upload. Ownership of
+    the file passes to the caller (see jobs.utils.StoredUpload), which moves it into place.
+    If the caller fails to process the file it rolls back and calls fail_upload.
+
+    Returns:
+        Dictionary with success status, file_name and upload (file_path, file_sha256, file_size)
+    """
+    try:
+        upload = _lock_upload(upload_id)
+        if not upload:
+            return {"success": False, "message": f"Upload {upload_id} does not exist"}
+        if upload.status != "uploading":
+            return {"success": False, "message": f"Upload is {upload.status}"}
+        if int(upload.received_bytes) != int(upload.total_size):
+            return {
+                "success": False,
+                "received_bytes": int(upload.received_bytes),
+                "message": f"Upload is incomplete ({int(upload.received_bytes)} of {int(upload.total_size)} bytes received)"
+            }
+        file_path = to_absolute_path(upload.file_path)
+        if not os.path.exists(file_path):
+            return {"success": False, "message": "Uploaded file is missing"}
+
+        sha256 = file_sha256(file_path)
+        if upload.expected_sha256 and sha256 != upload.expected_sha256:
+            return {"success": False, "message": f"File checksum {sha256} does not match the expected {upload.expected_sha256}"}
+
+        db.session.execute(
+            text("UPDATE chunked_upload SET status = 'complete' WHERE upload_id = :upload_id"),
+            {"upload_id": upload_id}
+        )
+
+        return {
+            "success": True,
+            "file_name": upload.file_name,
+            "upload": {"file_path": file_path, "file_sha256": sha256, "file_size": int(upload.total_size)},
+            "message": "Upload complete"
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to finalize upload: {str(e)}"}
+
+def abort_upload(upload_id: str) -> Dict:
+    """
+    Cancels an upload and removes the partially received file.
+    """
+    try:
+        upload = _lock_upload(upload_id)
+        if not upload:
+            return {"success": False, "message": f"Upload {upload_id} does not exist"}
+        if upload.status != "uploading":
+            return {"success": False, "message": f"Upload is {upload.status}"}
+
+        file_path = to_absolute_path(upload.file_path)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        db.session.execute(
+            text("UPDATE chunked_upload SET status = 'aborted' WHERE upload_id = :upload_id"),
+            {"upload_id": upload_id}
+        )
+        return {"success": True, "message": "Upload aborted"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to abort upload: {str(e)}"}
+
+def fail_upload(upload_id: str) -> Dict:
+    """
+    Marks an upload whose file could not be processed after finalize_upload as failed.
+
+    The file may already have been moved, so the upload cannot be finalized again; whatever is
+    left of it is removed. Called after the processing was rolled back.
+    """
+    try:
+        upload = _lock_upload(upload_id)
+        if not upload:
+            return {"success": False, "message": f"Upload {upload_id} does not exist"}
+
+        file_path = to_absolute_path(upload.file_path)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        db.session.execute(
+            text("UPDATE chunked_upload SET status = 'failed' WHERE upload_id = :upload_id"),
+            {"upload_id": upload_id}
+        )
+        return {"success": True, "message": "Upload failed"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to mark upload as failed: {str(e)}"}
@@ -0,0 +1,38 @@
+from sqlalchemy import text
+from db.db import db
+from .utils import *
+
+UPLOAD_COLUMNS = """
+    upload_id, file_name, total_size, received_bytes, expected_sha256, status, created_at, last_updated
+"""
+
+def get_upload(upload_id: str):
+    """
+    Get the state of a chunked upload. received_bytes is the offset of the next chunk to send.
+    """
+    try:
+        row = db.session.execute(
+            text(f"SELECT {UPLOAD_COLUMNS} FROM chunked_upload WHERE upload_id = :upload_id"),
+            {"upload_id": upload_id}
+        ).fetchone()
+        if not row:
+            return {"success": False, "message": f"Upload {upload_id} does not exist"}
+
+        return {"success": True, "data": organize_upload_row(row)}
+
+    except Exception as e:
+        return {"success": False, "message": f"Failed to fetch upload: {str(e)}"}
+
+def get_uploads(status: str = "uploading"):
+    """
+    List chunked uploads with the given status, most recently active first
+    """
+    try:
+        result = db.session.execute(
+            text(f"SELECT {UPLOAD_COLUMNS} FROM chunked_upload WHERE status = :status ORDER BY last_updated DESC"),
+            {"status": status}
+        )
+        return {"success": True, "data": [organize_upload_row(row) for row in result]}
+
+    except Exception as e:
+        return {"success": False, "data": [], "message": f"Failed to fetch uploads: {str(e)}"}
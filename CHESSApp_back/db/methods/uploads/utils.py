@@ -0,0 +1,32 @@
+import os
+import re
+from db.db import get_temp_files_dir
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+def upload_file_path(upload_id: str) -> str:
+    """
+    Path the chunks of an upload are written to.
+    Uploads live in the temp files directory, on the same file system as the FASTA and source
+    files, so handing the finished file over is a rename rather than a copy.
+    """
+    return os.path.join(get_temp_files_dir(), f"chunked_upload_{upload_id}")
+
+def is_sha256(value) -> bool:
+    """
+    Check that a value is a lower case hex encoded SHA-256 digest
+    """
+    return isinstance(value, str) and SHA256_PATTERN.match(value) is not None
+
+def organize_upload_row(row) -> dict:
+    """
+    Convert a chunked_upload row into a JSON serializable dictionary
+    """
+    upload = dict(row._mapping)
+    for key in ["created_at", "last_updated"]:
+        if upload.get(key) is not None:
+            upload[key] = upload[key].isoformat()
+    upload["total_size"] = int(upload["total_size"])
+    upload["received_bytes"] = int(upload["received_bytes"])
+    upload.pop("file_path", None)
+    return upload
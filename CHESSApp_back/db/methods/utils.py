@@ -1,11 +1,16 @@
 # contains reusable funcitons used throughout the experiments
 
 import os
+import re
+import gzip
 import json
+import shutil
 import copy
 import base64
+import hashlib
 import random
 import subprocess
+from typing import Dict
 
 def serialize_sql_data(cell):
     if isinstance(cell, bytes):
@@ -67,29 +72,34 @@ def get_gff3cols() -> list:
     """
     return gff3cols
     
-def extract_attributes(attribute_str:str,gff=False)->dict:
+# one GTF attribute: key followed by a quoted value (which may contain ";" and spaces) or a bare value
+GTF_ATTRIBUTE_RE = re.compile(r'\s*([^\s;"]+)\s+(?:"([^"]*)"|([^;]*?))\s*(?:;|$)')
+# one GFF3 attribute: key=value
+GFF_ATTRIBUTE_RE = re.compile(r'\s*([^=;]+?)\s*=\s*([^;]*?)\s*(?:;|$)')
+
+def parse_attributes(attribute_str: str, gff: bool = False) -> Dict[str, str]:
     """
-    This function extracts attributes from an attribute string. Assumes that the only information passed is the 9th column of the GTF file;
-    
-    Parameters:
-    attribute_str (str): The attribute string to extract attributes from.
-    gff (bool, optional): A flag indicating whether the attribute string is from a GFF file. Defaults to False.
+    Parse the 9th column of a GTF/GFF record.
+
+    Quoted values containing ";" or spaces are kept intact.
+    The first occurrence of a repeated key wins.
+
+    Args:
+        attribute_str: Attribute column
+        gff: Whether the column uses GFF3 key=value syntax
 
     Returns:
-    dict: A dictionary of attributes extracted from the attribute string.
+        Dictionary of attributes
     """
-    attrs = attribute_str.rstrip().rstrip(";").split(";")
-    attrs = [x.strip() for x in attrs]
-    attrs = [x.strip("\"") for x in attrs]
-    attrs_dict = dict()
-    sep = " \""
+    attributes = {}
     if gff:
-        sep = "="
-    for at in attrs:
-        k,v = at.split(sep)
-        attrs_dict.setdefault(k,v)
-        
-    return attrs_dict
+        for match in GFF_ATTRIBUTE_RE.finditer(attribute_str):
+            attributes.setdefault(match.group(1), match.group(2))
+    else:
+        for match in GTF_ATTRIBUTE_RE.finditer(attribute_str):
+            value = match.group(2)
+            attributes.setdefault(match.group(1), match.group(3) if value is None else value)
+    return attributes
 
 def chain_inv(chain:list) -> list:
     """
@@ -166,19 +176,61 @@ def to_attribute_string(attrs:dict,gff:bool=False,feature_type:str=None)->str:
         res = res.rstrip(";")
     return res
 
+def detect_compression(fname:str) -> str:
+    """
+    This function detects whether a file is gzip compressed from its header.
+    BGZF (bgzip) files are gzip files whose first member carries a "BC" extra subfield.
+
+    Parameters:
+    fname (str): The name of the file to check.
+
+    Returns:
+    str: "bgzf", "gzip" or None for uncompressed files.
+    """
+    with open(fname,"rb") as inFP:
+        header = inFP.read(18)
+
+    if len(header) < 2 or header[:2] != b"\x1f\x8b":
+        return None
+    if len(header) >= 14 and header[3] & 4 and header[12:14] == b"BC":
+        return "bgzf"
+    return "gzip"
+
 def run_gffread(infname:str,outfname:str):
     assert os.path.exists(infname),"input file does not exist: "+infname
 
+    compression = detect_compression(infname)
     cmd = ["gffread","-T","-F","--cluster-only",
-            "-o",outfname,
-            infname]
+            "-o",outfname]
+    if compression is None:
+        cmd.append(infname)
 
     print("Executing gffread to normalize the input annotation file")
-    print(" ".join(cmd))
+    print(" ".join(cmd) + (f" < {infname} ({compression} decompressed)" if compression else ""))
 
-    proc = subprocess.Popen(cmd,stderr=subprocess.PIPE)
+    if compression is None:
+        # run() reads stderr while waiting, so a verbose gffread cannot fill the pipe and block
+        proc = subprocess.run(cmd,stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise Exception(f"gffread failed with exit code {proc.returncode}: {proc.stderr.decode(errors='replace').strip()}")
+        return
 
-    proc.wait()
+    # compressed input is decompressed as a stream into gffread - the uncompressed file is never written
+    proc = subprocess.Popen(cmd,stdin=subprocess.PIPE)
+    try:
+        with gzip.open(infname,"rb") as inFP:
+            shutil.copyfileobj(inFP,proc.stdin,1024*1024)
+    except BrokenPipeError:
+        # gffread exited early, reported through its exit code below
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait()
+    if proc.returncode != 0:
+        raise Exception(f"gffread failed with exit code {proc.returncode}")
 
 def get_seqids_from_gtf(infname:str) -> list:
     assert os.path.exists(infname),"input file does not exist: "+infname
@@ -193,6 +245,67 @@ def get_seqids_from_gtf(infname:str) -> list:
 
     return list(seqids)
 
+def assign_seqid_shards(seqid_counts:dict, num_shards:int) -> list:
+    """
+    Group sequences into at most num_shards shards of similar size.
+    Sequences are taken largest first and each is added to the currently smallest shard.
+
+    Parameters:
+    seqid_counts (dict): {seqid: number of transcripts}
+    num_shards (int): Maximum number of shards
+
+    Returns:
+    list: Non-empty shards as {"seqids": [...], "transcripts": int}
+    """
+    assert num_shards > 0,"num_shards must be positive"
+
+    shards = [{"seqids":[],"transcripts":0} for _ in range(num_shards)]
+    for seqid,count in sorted(seqid_counts.items(),key=lambda x:(-x[1],x[0])):
+        shard = min(shards,key=lambda x:x["transcripts"])
+        shard["seqids"].append(seqid)
+        shard["transcripts"] += count
+
+    return [shard for shard in shards if shard["seqids"]]
+
+def split_gtf_by_seqid(input_gtf:str, shard_seqids:list, output_gtfs:list) -> list:
+    """
+    Split a GTF file into one file per shard of sequences, keeping the order of records.
+    Records on sequences that are not part of any shard are dropped.
+
+    Parameters:
+    input_gtf (str): Path to the GTF file
+    shard_seqids (list): List of seqid lists, one per shard
+    output_gtfs (list): Output path of each shard
+
+    Returns:
+    list: Number of records written to each shard
+    """
+    assert os.path.exists(input_gtf),"input file does not exist: "+input_gtf
+    assert len(shard_seqids) == len(output_gtfs),"one output file is required per shard"
+
+    seqid_shard = dict()
+    for shard_idx,seqids in enumerate(shard_seqids):
+        for seqid in seqids:
+            seqid_shard[seqid] = shard_idx
+
+    counts = [0]*len(output_gtfs)
+    outFPs = [open(output_gtf,"w") for output_gtf in output_gtfs]
+    try:
+        with open(input_gtf,"r") as inFP:
+            for line in inFP:
+                if line.startswith("#"):
+                    continue
+                shard_idx = seqid_shard.get(line.split("\t",1)[0])
+                if shard_idx is None:
+                    continue
+                outFPs[shard_idx].write(line)
+                counts[shard_idx] += 1
+    finally:
+        for outFP in outFPs:
+            outFP.close()
+
+    return counts
+
 def load_attributes_from_gtf(gtf_fname:str, max_values:int) -> dict:
     # if the number of observed values for the attribute is over the max_value - it is treated as variable and values are not stored
 
@@ -216,7 +329,7 @@ def load_attributes_from_gtf(gtf_fname:str, max_values:int) -> dict:
             if lcs[2] in ["exon","CDS"]:
                 continue
 
-            attrs = extract_attributes(lcs[8],fname_is_gff)
+            attrs = parse_attributes(lcs[8],fname_is_gff)
             # join attrs into the main attributes dictionary
             for k,v in attrs.items():
                 attributes.setdefault(k,{"values":set(),"over_max_capacity":False})
@@ -232,6 +345,142 @@ def load_attributes_from_gtf(gtf_fname:str, max_values:int) -> dict:
 
     return attributes
 
+def analyze_gtf(gtf_fname:str, max_values:int) -> dict:
+    """
+    This function scans an annotation file once and collects everything needed to verify an upload:
+    sequence IDs, file format, attribute values and feature counts.
+
+    Parameters:
+    gtf_fname (str): The name of the GTF/GFF file to analyze.
+    max_values (int): Attributes with more distinct values than this are treated as variable and their values are not stored (same as load_attributes_from_gtf).
+
+    Returns:
+    dict: A dictionary with keys:
+        - seqids: {seqid: number of transcripts}
+        - is_gff: True for GFF, False for GTF, None if undetermined (same as is_gff)
+        - attributes: {name: {"values": set, "over_max_capacity": bool}}
+        - counts: {"transcripts", "genes", "exons", "cds"}
+    """
+    assert os.path.exists(gtf_fname),"input file does not exist: "+gtf_fname
+
+    seqids = dict()
+    attributes = dict()
+    gene_ids = set()
+    counts = {"transcripts": 0, "genes": 0, "exons": 0, "cds": 0}
+    fname_is_gff = None
+    format_detected = False
+
+    with open(gtf_fname, 'r') as inFP:
+        for line in inFP:
+            if line[0] == "#":
+                continue
+            lcs = line.rstrip().split("\t")
+            if not len(lcs) == 9:
+                # consistent with is_gff: extra columns leave the format undetermined
+                if not format_detected and len(lcs) > 9:
+                    format_detected = True
+                    fname_is_gff = None
+                continue
+
+            feature = lcs[2]
+            if feature == "exon":
+                counts["exons"] += 1
+                continue
+            if feature == "CDS":
+                counts["cds"] += 1
+                continue
+
+            if not format_detected:
+                format_detected = feature != "gene"
+                if feature == "transcript":
+                    if lcs[8].startswith("ID="):
+                        fname_is_gff = True
+                    elif lcs[8].startswith("transcript_id"):
+                        fname_is_gff = False
+                elif feature != "gene":
+                    fname_is_gff = None
+
+            if feature == "transcript":
+                counts["transcripts"] += 1
+                seqids[lcs[0]] = seqids.get(lcs[0], 0) + 1
+            else:
+                seqids.setdefault(lcs[0], 0)
+
+            attrs = parse_attributes(lcs[8],fname_is_gff)
+            if "gene_id" in attrs:
+                gene_ids.add(attrs["gene_id"])
+            # join attrs into the main attributes dictionary
+            for k,v in attrs.items():
+                attributes.setdefault(k,{"values":set(),"over_max_capacity":False})
+                if attributes[k]["over_max_capacity"]:
+                    continue
+                if len(attributes[k]["values"])>max_values:
+                    attributes[k]["over_max_capacity"] = True
+                    attributes[k]["values"] = set()
+                    continue
+                attributes[k]["values"].add(v)
+
+    counts["genes"] = len(gene_ids)
+    return {
+        "seqids": seqids,
+        "is_gff": fname_is_gff,
+        "attributes": attributes,
+        "counts": counts
+    }
+
+def file_sha256(fname:str, chunk_size:int=1024*1024) -> str:
+    """
+    This function computes the SHA-256 digest of a file, reading it in chunks.
+
+    Returns:
+    str: Hex encoded digest.
+    """
+    digest = hashlib.sha256()
+    with open(fname, "rb") as inFP:
+        for chunk in iter(lambda: inFP.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def gtf_analysis_path(gtf_fname:str) -> str:
+    """
+    This function returns the path of the analysis file stored next to an annotation file.
+    """
+    return gtf_fname+".analysis.json"
+
+def save_gtf_analysis(gtf_fname:str, analysis:dict) -> str:
+    """
+    This function stores the result of analyze_gtf next to the analyzed file so later steps can reuse it without rescanning.
+
+    Parameters:
+    gtf_fname (str): The analyzed file.
+    analysis (dict): Result of analyze_gtf.
+
+    Returns:
+    str: Path of the stored analysis.
+    """
+    analysis_fname = gtf_analysis_path(gtf_fname)
+    serializable = dict(analysis)
+    serializable["attributes"] = {k:{"values":sorted(v["values"]),"over_max_capacity":v["over_max_capacity"]} for k,v in analysis["attributes"].items()}
+    with open(analysis_fname, "w") as outFP:
+        json.dump(serializable, outFP)
+    return analysis_fname
+
+def load_gtf_analysis(gtf_fname:str):
+    """
+    This function loads the analysis stored by save_gtf_analysis.
+
+    Returns:
+    dict: The analysis, or None if the file was never analyzed.
+    """
+    analysis_fname = gtf_analysis_path(gtf_fname)
+    if not os.path.exists(analysis_fname):
+        return None
+    with open(analysis_fname, "r") as inFP:
+        analysis = json.load(inFP)
+    for v in analysis["attributes"].values():
+        v["values"] = set(v["values"])
+    return analysis
+
 # reads GTF file (assumes gffreat -T output) and combines all records into transcript structures (one per transcript)
 # storing associated exons and cds records
 # yields transcripts one by one
@@ -267,139 +516,3 @@ def read_gffread_gtf(infname:str):
     if current_tid is not None:
         assert not len(transcript_lines)==0,"empty transcript lines for: "+current_tid
         yield transcript_lines 
-
-def convert_gtf_nomenclature(input_gtf:str,output_gtf:str,seqid_map:dict):
-    assert os.path.exists(input_gtf),"input file does not exist: "+input_gtf
-
-    with open(input_gtf,"r") as inFP, open(output_gtf,"w") as outFP:
-        for line in inFP:
-            if line.startswith("#"):
-                outFP.write(line)
-                continue
-            lcs = line.rstrip().split("\t")
-            if not len(lcs) == 9:
-                continue
-            seqid = lcs[0]
-            if seqid in seqid_map:
-                lcs[0] = seqid_map[seqid]
-            outFP.write("\t".join(lcs)+"\n")
-
-
-def run_gffcompare(query: str, reference: str, outfname: str):
-    """
-    Run gffcompare to compare query and reference GTF files.
-    
-    Args:
-        query: Path to query GTF file
-        reference: Path to reference GTF file
-        outfname: Output filename prefix
-    """
-    assert os.path.exists(query), "query file does not exist: " + query
-    assert os.path.exists(reference), "reference file does not exist: " + reference
-
-    cmd = ["gffcompare", "-F",
-           "-r", reference,
-           "-o", outfname,
-           query]
-
-    print("Executing gffcompare to build transcript map")
-    print(" ".join(cmd))
-   
-    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
-    proc.wait()
-
-
-def run_gffread_gtf_to_gff(gtf_file: str, gff_file: str):
-    """
-    Convert GTF file to GFF format using gffread.
-    
-    Args:
-        gtf_file: Path to input GTF file
-        gff_file: Path to output GFF file
-    """
-    assert os.path.exists(gtf_file), "GTF file does not exist: " + gtf_file
-
-    cmd = ["gffread", "-F", "--keep-exon-attrs", "-o", gff_file, gtf_file]
-
-    print("Executing gffread to convert GTF to GFF")
-    print(" ".join(cmd))
-   
-    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
-    proc.wait()
-
-def prepare_source_files_from_gtf(input_gtf_file: str, source_file_base_name: str):
-    """
-    Generates all files to represent the source annotation in the database.
-    
-    Args:
-        gtf_file: Path to input GTF file
-    """
-
-    result = {
-        "gtf_file": {
-            "file_type": "gtf",
-            "file_path": source_file_base_name + ".gtf.gz",
-            "description": "GTF file for source version assembly " + source_file_base_name
-        },
-        "gff_file": {
-            "file_type": "gff",
-            "file_path": source_file_base_name + ".gff.gz",
-            "description": "GFF file for source version assembly " + source_file_base_name
-        },
-        "sorted_gff_file_bgz": {
-            "file_type": "sorted_gff_bgz",
-            "file_path": source_file_base_name + ".sorted.gff.gz",
-            "description": "Sorted GFF file for source version assembly " + source_file_base_name
-        },
-        "sorted_gff_file_bgz_tbi": {
-            "file_type": "sorted_gff_bgz_tbi",
-            "file_path": source_file_base_name + ".sorted.gff.gz.tbi",
-            "description": "Tabix index for sorted GFF file for source version assembly " + source_file_base_name
-        }
-    }
-
-    assert os.path.exists(input_gtf_file), "GTF file does not exist: " + input_gtf_file
-
-    try:
-        # Create a gtf_file from the input_gtf_file by compressing it
-        gzip_cmd = f"gzip -c {input_gtf_file} > {result['gtf_file']['file_path']}"
-        subprocess.run(gzip_cmd, shell=True, check=True)
-    except Exception as e:
-        raise f"Error creating gtf_file: {e}"
-
-    try:
-        # Use the gtf_file to create a gff_file
-        run_gffread_gtf_to_gff(input_gtf_file, result["gff_file"]["file_path"].rstrip(".gz"))
-    except Exception as e:
-        raise f"Error creating gff_file: {e}"
-
-    # Compress the gff_file - no need to keep the original gff_file
-    try:
-        gzip_cmd = f"gzip -f {result['gff_file']['file_path'].rstrip('.gz')}"
-        subprocess.run(gzip_cmd, shell=True, check=True)
-    except Exception as e:
-        raise f"Error compressing gff_file: {e}"
-
-    # Sort the gff_file
-    try:
-        base = source_file_base_name
-        sort_cmd = f"gffread -F --keep-exon-attrs -o- {input_gtf_file} | sort -t$'\t' -k1,1 -k4,4n > {result['sorted_gff_file_bgz']['file_path'].rstrip('.gz')}"
-        subprocess.run(sort_cmd, shell=True, check=True)
-    except Exception as e:
-        raise f"Error sorting gff_file: {e}"
-    
-    # Compress the sorted gff_file - no need to keep the original sorted gff_file
-    try:
-        bgzip_cmd = f"bgzip -f {result['sorted_gff_file_bgz']['file_path'].rstrip('.gz')}"
-        subprocess.run(bgzip_cmd, shell=True, check=True)
-    except Exception as e:
-        raise f"Error compressing sorted gff_file: {e}"
-
-    # Index the sorted gff_file
-    try:
-        tabix_cmd = f"tabix -p gff {result['sorted_gff_file_bgz']['file_path']}"
-        subprocess.run(tabix_cmd, shell=True, check=True)
-    except Exception as e:
-        raise f"Error indexing sorted gff_file: {e}"
-
-    return result
\ No newline at end of file
@@ -1,23 +1,47 @@
 # Admin routes for the CHESS Web App
 # Routes for database management and administrative functions
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, send_from_directory
 from db.methods.database import admin as db_admin
 from db.methods.genomes import admin as genome_admin
 from db.methods.sources import admin as source_admin
+from db.methods.sources import queries as source_queries
 from db.methods.datasets import admin as dataset_admin
+from db.methods.datasets import queries as dataset_queries
 from db.methods.configurations import admin as config_admin
 from db.methods.configurations import utils as config_utils
 from db.methods.configurations import queries as config_queries
+from db.methods.jobs import admin as job_admin
+from db.methods.jobs import queries as job_queries
+from db.methods.jobs.utils import save_job_upload, adopt_job_upload, stored_upload, StoredUpload
+from db.methods.uploads import admin as upload_admin
+from db.methods.uploads import queries as upload_queries
+from config import Config
 from db.methods import db
 from sqlalchemy import text
 from middleware import *
 from db.methods.genomes.queries import *
 from db.methods.TempFileManager import get_temp_file_manager
+from db.methods.FastaHandlePool import get_fasta_handle_pool
+from db.methods.SequenceCache import get_sequence_cache
 import os
 
 admin_bp = Blueprint('admin', __name__)
 
+def run_in_background(data=None):
+    """Check whether the client asked for the request to be queued as a background job"""
+    value = data.get('background') if data is not None else request.form.get('background')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def queue_job(job_type, parameters):
+    """Submit a job and return the 202 response for it"""
+    result = job_admin.submit_job(job_type, parameters)
+    if result["success"]:
+        db.session.commit()
+        return jsonify(result), 202
+    db.session.rollback()
+    return jsonify(result), 400
+
 # ============================================================================
 # DATABASE MANAGEMENT ROUTES
 # ============================================================================
@@ -392,6 +416,13 @@ def upload_fasta():
         except (ValueError, TypeError):
             return jsonify({"success": False, "message": "Assembly ID must be a valid integer"}), 400
         
+        if run_in_background():
+            return queue_job("fasta_upload", {
+                "assembly_id": assembly_id,
+                "nomenclature": nomenclature,
+                **save_job_upload(file)
+            })
+        
         result = genome_admin.process_fasta_file(assembly_id, nomenclature, file)
         if result["success"]:
             db.session.commit()
@@ -404,6 +435,22 @@ def upload_fasta():
         db.session.rollback()
         return jsonify({"success": False, "message": f"Failed to upload FASTA file: {str(e)}"}), 500
 
+@admin_bp.route('/assemblies/compress-genomes', methods=['POST'])
+def compress_genomes():
+    """
+    Queues a job converting stored uncompressed genomes to BGZF (optionally for one assembly_id).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        parameters = {}
+        if data.get('assembly_id') is not None:
+            parameters["assembly_id"] = int(data['assembly_id'])
+        return queue_job("genome_compress", parameters)
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to queue genome compression: {str(e)}"}), 500
+
 # ============================================================================
 # NOMENCLATURE MANAGEMENT ROUTES
 # ============================================================================
@@ -445,6 +492,63 @@ def upload_nomenclature_tsv(assembly_id):
         temp_manager = get_temp_file_manager()
         temp_manager.cleanup_all()
 
+@admin_bp.route('/assemblies/fasta-readers', methods=['GET'])
+def get_fasta_reader_stats():
+    """
+    Hit and miss counters of the open genome FASTA readers of the admin process.
+    Sequences shown on the site are extracted by the public workers, each with its own pool;
+    their counters are returned by GET /api/public/stats/fasta-readers.
+    """
+    try:
+        return jsonify({"success": True, "data": get_fasta_handle_pool().get_stats()})
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get FASTA reader statistics: {str(e)}"}), 500
+
+@admin_bp.route('/assemblies/fasta-readers', methods=['DELETE'])
+def close_fasta_readers():
+    """
+    Close the open genome FASTA readers of the admin process (optionally of one assembly).
+    Readers of the public workers are not affected; they reopen a changed genome on their next lookup.
+    """
+    try:
+        assembly_id = request.args.get('assembly_id', type=int)
+        closed = get_fasta_handle_pool().invalidate(assembly_id)
+        return jsonify({"success": True, "message": f"Closed {closed} FASTA readers"})
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to close FASTA readers: {str(e)}"}), 500
+
+@admin_bp.route('/sequence-cache', methods=['GET'])
+def get_sequence_cache_stats():
+    """
+    Size and hit rate of the transcript sequence cache of the admin process.
+    Sequences shown on the site are cached by the public workers, each with its own cache;
+    their statistics are returned by GET /api/public/stats/sequence-cache.
+    """
+    try:
+        return jsonify({"success": True, "data": get_sequence_cache().get_stats()})
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get sequence cache statistics: {str(e)}"}), 500
+
+@admin_bp.route('/sequence-cache/<int:sva_id>', methods=['DELETE'])
+def clear_sequence_cache(sva_id):
+    """
+    Drop the cached transcript sequences of a source version assembly in every process.
+    The sequence version of the annotation is incremented, so the public workers miss as well.
+    """
+    try:
+        if not source_queries.source_version_assembly_exists_by_id(sva_id):
+            return jsonify({"success": False, "message": f"Source version assembly {sva_id} not found"}), 404
+        removed = source_admin.invalidate_transcript_sequences(sva_id)
+        db.session.commit()
+        return jsonify({"success": True, "message": f"Cached transcripts invalidated ({removed} removed from the admin process)"})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to clear sequence cache: {str(e)}"}), 500
+
 # ============================================================================
 # CONFIGURATION MANAGEMENT ROUTES
 # ============================================================================
@@ -760,6 +864,10 @@ def upload_gtf(source_id, sv_id):
             "description": request.form.get('description', '')
         }
 
+        if run_in_background():
+            data.update(save_job_upload(data.pop("file")))
+            return queue_job("annotation_upload", data)
+
         result = source_admin.verify_annotation_file_upload_data(data)
         if result["success"]:
             return jsonify(result)
@@ -781,6 +889,15 @@ def confirm_annotation_upload(source_id, sv_id):
 
         data["source_id"] = source_id
         data["source_version_id"] = sv_id
+
+        temp_manager = get_temp_file_manager()
+        for key in ["temp_file_path", "norm_gtf_path"]:
+            if temp_manager.resolve_temp_file(data[key]) is None:
+                return jsonify({"success": False, "message": f"{key} is not a file of the upload step"}), 400
+        
+        if run_in_background(data):
+            # temp files are removed by the job once it finishes
+            return queue_job("annotation_confirm", data)
         
         result = source_admin.confirm_and_process_annotation_file(data)
         if result["success"]:
@@ -794,8 +911,57 @@ def confirm_annotation_upload(source_id, sv_id):
         db.session.rollback()
         return jsonify({"success": False, "message": f"Failed to confirm annotation upload: {str(e)}"}), 500
     finally:
-        temp_manager = get_temp_file_manager()
-        temp_manager.cleanup_all()
+        if not run_in_background(request.get_json(silent=True) or {}):
+            temp_manager = get_temp_file_manager()
+            temp_manager.cleanup_all()
+
+@admin_bp.route('/ingestions', methods=['GET'])
+def get_incomplete_ingestions():
+    """
+    Lists annotation loads committed in chunks that have not completed.
+    """
+    result = source_queries.get_incomplete_ingestions()
+    if result["success"]:
+        return jsonify(result)
+    return jsonify(result), 500
+
+@admin_bp.route('/ingestions/<int:sva_id>', methods=['GET'])
+def get_ingestion_checkpoint(sva_id):
+    """
+    Returns the checkpoint of a chunked annotation load.
+    """
+    result = source_queries.get_ingestion_checkpoint(sva_id)
+    if not result["success"]:
+        return jsonify(result), 500
+    if result["data"] is None:
+        return jsonify({"success": False, "message": f"No checkpoint found for source version assembly {sva_id}"}), 404
+    return jsonify(result)
+
+@admin_bp.route('/ingestions/<int:sva_id>/resume', methods=['POST'])
+def resume_ingestion(sva_id):
+    """
+    Resumes a failed or cancelled chunked annotation load from its last checkpoint.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if run_in_background(data):
+            return queue_job("annotation_resume", {"sva_id": sva_id})
+
+        result = source_admin.resume_annotation_load(sva_id)
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result)
+        else:
+            db.session.rollback()
+            return jsonify(result), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to resume annotation load: {str(e)}"}), 500
+    finally:
+        if not run_in_background(data):
+            temp_manager = get_temp_file_manager()
+            temp_manager.cleanup_all()
 
 # ============================================================================
 # DATASET MANAGEMENT ROUTES
@@ -812,8 +978,9 @@ def add_data_type():
         data = request.get_json()
         data_type = data['data_type'].strip()
         description = data['description'].strip()
+        is_numeric = bool(data.get('is_numeric', False))
 
-        result = dataset_admin.add_data_type(data_type, description)
+        result = dataset_admin.add_data_type(data_type, description, is_numeric)
         if result["success"]:
             db.session.commit()
             return jsonify(result)
@@ -921,6 +1088,10 @@ def create_dataset():
             "file": file
         }
         
+        if run_in_background():
+            dataset_data.update(save_job_upload(dataset_data.pop("file")))
+            return queue_job("dataset_create", dataset_data)
+        
         result = dataset_admin.create_dataset(dataset_data)
         if result["success"]:
             db.session.commit()
@@ -978,3 +1149,279 @@ def delete_dataset(dataset_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Failed to delete dataset: {str(e)}"}), 500
+
+@admin_bp.route('/datasets/<int:dataset_id>/rejects', methods=['GET'])
+def download_dataset_rejects(dataset_id):
+    """
+    Download the TSV lines that were not loaded into a dataset (e.g. unknown transcript IDs).
+    """
+    try:
+        rejects_file = dataset_queries.get_dataset_rejects_file(dataset_id)
+        if not rejects_file["success"]:
+            return jsonify(rejects_file), 404
+
+        return send_from_directory(
+            rejects_file["file_path"],
+            rejects_file["file_name"],
+            as_attachment=True,
+            download_name=rejects_file["friendly_file_name"],
+            mimetype='text/tab-separated-values'
+        )
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get dataset rejects: {str(e)}"}), 500
+
+# ============================================================================
+# BACKGROUND JOB ROUTES
+# ============================================================================
+
+@admin_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    List background jobs, most recent first.
+    """
+    try:
+        status = request.args.get('status')
+        limit = request.args.get('limit', 100, type=int)
+        result = job_queries.get_jobs(status, limit)
+        if result["success"]:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+        
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to list jobs: {str(e)}"}), 500
+
+@admin_bp.route('/jobs', methods=['POST'])
+@require_json
+@validate_required_fields(['job_type', 'parameters'])
+def submit_job():
+    """
+    Submit a background job from JSON parameters.
+    File based jobs are submitted through the upload routes with background=true.
+    """
+    try:
+        data = request.get_json()
+        if data['job_type'] not in job_admin.PARAMETER_JOB_TYPES:
+            return jsonify({"success": False, "message": f"Jobs of type {data['job_type']} are submitted through their own routes"}), 400
+        if not isinstance(data['parameters'], dict):
+            return jsonify({"success": False, "message": "parameters must be an object"}), 400
+        return queue_job(data['job_type'], data['parameters'])
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to submit job: {str(e)}"}), 500
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll the status and progress of a background job.
+    """
+    try:
+        result = job_queries.get_job(job_id)
+        if result["success"]:
+            return jsonify(result)
+        else:
+            return jsonify(result), 404
+        
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get job: {str(e)}"}), 500
+
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running background job.
+    """
+    try:
+        result = job_admin.cancel_job(job_id)
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result)
+        else:
+            db.session.rollback()
+            return jsonify(result), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to cancel job: {str(e)}"}), 500
+
+# ============================================================================
+# CHUNKED UPLOAD ROUTES
+# ============================================================================
+
+@admin_bp.route('/uploads', methods=['POST'])
+@require_json
+@validate_required_fields(['file_name', 'total_size'])
+def start_upload():
+    """
+    Starts a resumable upload of a large FASTA or annotation file.
+    The file is then sent with PUT /uploads/<upload_id>?offset=<n> and completed with POST /uploads/<upload_id>/finalize.
+    """
+    try:
+        data = request.get_json()
+        try:
+            total_size = int(data['total_size'])
+        except (ValueError, TypeError):
+            return jsonify({"success": False, "message": "total_size must be a number of bytes"}), 400
+
+        result = upload_admin.start_upload(data['file_name'], total_size, data.get('sha256'))
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result), 201
+        else:
+            db.session.rollback()
+            return jsonify(result), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to start upload: {str(e)}"}), 500
+
+@admin_bp.route('/uploads', methods=['GET'])
+def get_uploads():
+    """
+    Lists unfinished chunked uploads.
+    """
+    result = upload_queries.get_uploads()
+    if result["success"]:
+        return jsonify(result)
+    return jsonify(result), 500
+
+@admin_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """
+    Returns the state of a chunked upload. An interrupted upload resumes at received_bytes.
+    """
+    result = upload_queries.get_upload(upload_id)
+    if result["success"]:
+        return jsonify(result)
+    return jsonify(result), 404
+
+@admin_bp.route('/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """
+    Writes one chunk of a chunked upload.
+    The request body is the raw chunk, the offset is a query parameter and the SHA-256 of the
+    chunk is sent in the X-Chunk-SHA256 header (or the checksum query parameter).
+    """
+    try:
+        try:
+            offset = int(request.args.get('offset'))
+        except (ValueError, TypeError):
+            return jsonify({"success": False, "message": "offset must be a byte offset"}), 400
+
+        if request.content_length is None:
+            return jsonify({"success": False, "message": "Content-Length is required"}), 411
+        if request.content_length > Config.UPLOAD_CHUNK_MAX_BYTES:
+            return jsonify({"success": False, "message": f"Chunks are limited to {Config.UPLOAD_CHUNK_MAX_BYTES} bytes"}), 413
+
+        checksum = request.headers.get('X-Chunk-SHA256') or request.args.get('checksum')
+        chunk = request.get_data(cache=False)
+
+        result = upload_admin.write_chunk(upload_id, offset, chunk, checksum)
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result)
+        else:
+            db.session.rollback()
+            # 409 tells the client to resume from received_bytes
+            return jsonify(result), 409 if "received_bytes" in result else 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to write chunk: {str(e)}"}), 500
+
+@admin_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@require_json
+@validate_required_fields(['file_type'])
+def finalize_upload(upload_id):
+    """
+    Completes a chunked upload and processes the file like the regular upload routes.
+
+    file_type "fasta" takes assembly_id and nomenclature (see upload_fasta), file_type "gtf" takes
+    source_id, source_version_id, assembly_id and description (see upload_gtf). With background=true
+    the file is handed to a job instead. The uploaded file is moved into place, not copied, so an
+    upload whose file cannot be processed is marked failed and has to be sent again.
+    """
+    finalized = None
+    try:
+        data = request.get_json()
+        file_type = data['file_type']
+        if file_type not in ('fasta', 'gtf'):
+            return jsonify({"success": False, "message": "file_type must be fasta or gtf"}), 400
+        try:
+            assembly_id = int(data.get('assembly_id'))
+        except (ValueError, TypeError):
+            return jsonify({"success": False, "message": "Assembly ID must be a valid integer"}), 400
+        if file_type == 'gtf':
+            try:
+                parameters = {
+                    "source_id": int(data.get('source_id')),
+                    "source_version_id": int(data.get('source_version_id')),
+                    "assembly_id": assembly_id,
+                    "description": data.get('description', '')
+                }
+            except (ValueError, TypeError):
+                return jsonify({"success": False, "message": "Source ID and source version ID must be valid integers"}), 400
+
+        finalized = upload_admin.finalize_upload(upload_id)
+        if not finalized["success"]:
+            db.session.rollback()
+            return jsonify(finalized), 400
+        upload = finalized["upload"]
+        file = StoredUpload(upload["file_path"], filename=finalized["file_name"])
+
+        if run_in_background(data):
+            job_upload = adopt_job_upload(upload["file_path"], finalized["file_name"])
+            if file_type == 'fasta':
+                result = job_admin.submit_job("fasta_upload", {"assembly_id": assembly_id, "nomenclature": data.get('nomenclature'), **job_upload})
+            else:
+                result = job_admin.submit_job("annotation_upload", {**parameters, **job_upload})
+            if result["success"]:
+                db.session.commit()
+                return jsonify(result), 202
+            os.remove(stored_upload(job_upload).file_path)
+        elif file_type == 'fasta':
+            result = genome_admin.process_fasta_file(assembly_id, data.get('nomenclature'), file)
+        else:
+            result = source_admin.verify_annotation_file_upload_data({**parameters, "file": file})
+
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result)
+        else:
+            fail_finalized_upload(upload_id)
+            return jsonify(result), 400
+
+    except Exception as e:
+        if finalized is not None and finalized["success"]:
+            fail_finalized_upload(upload_id)
+        else:
+            db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to finalize upload: {str(e)}"}), 500
+
+def fail_finalized_upload(upload_id):
+    """Roll back the processing of a finalized upload and mark the upload failed (see upload_admin.fail_upload)"""
+    db.session.rollback()
+    result = upload_admin.fail_upload(upload_id)
+    if result["success"]:
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+@admin_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """
+    Aborts a chunked upload and removes the data received so far.
+    """
+    try:
+        result = upload_admin.abort_upload(upload_id)
+        if result["success"]:
+            db.session.commit()
+            return jsonify(result)
+        else:
+            db.session.rollback()
+            return jsonify(result), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to abort upload: {str(e)}"}), 500
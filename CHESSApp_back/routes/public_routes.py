@@ -9,9 +9,11 @@ import uuid
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from timeit import main
-from flask import Blueprint, jsonify, request, send_from_directory, Response, redirect
+from flask import Blueprint, jsonify, request, send_from_directory, Response, redirect, stream_with_context
 from sqlalchemy import text
 from db.methods import *
+from db.methods.FastaHandlePool import get_fasta_handle_pool
+from db.methods.SequenceCache import get_sequence_cache
 from db.db import db
 
 public_bp = Blueprint('public', __name__)
@@ -148,12 +150,27 @@ def get_fasta(assembly_id, nomenclature):
     try:
         fasta_file_result = get_fasta_file(assembly_id, nomenclature)
         
+        if fasta_file_result["file_nomenclature"] != nomenclature and not request.headers.get('Range'):
+            # virtual nomenclature: full downloads get the shared file with renamed headers,
+            # range requests (JBrowse) read the shared bytes through the renamed .fai below
+            name_map = get_map_between_nomenclatures(assembly_id, fasta_file_result["file_nomenclature"], nomenclature)
+            if not name_map["success"]:
+                raise Exception(name_map["message"])
+            fasta_file_path = os.path.join(fasta_file_result["file_path"], fasta_file_result["file_name"])
+            response = Response(
+                stream_with_context(stream_renamed_fasta(fasta_file_path, name_map["data"])),
+                mimetype='application/gzip' if fasta_file_result["file_name"].endswith('.gz') else 'text/plain'
+            )
+            response.headers['Content-Disposition'] = f'attachment; filename="{fasta_file_result["friendly_file_name"]}"'
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            return response
+        
         response = send_from_directory(
             fasta_file_result["file_path"],
             fasta_file_result["file_name"],
             as_attachment=True,
             download_name=fasta_file_result["friendly_file_name"],
-            mimetype='text/plain',
+            mimetype='application/gzip' if fasta_file_result["file_name"].endswith('.gz') else 'text/plain',
             conditional=True  # Enable Range requests for JBrowse
         )
         
@@ -174,14 +191,62 @@ def get_fai(assembly_id, nomenclature):
     Get the fai file for a specific organism, assembly, source, version, and nomenclature
     """
     try:
-        fai_file_result = get_fai_file(assembly_id, nomenclature)
+        fasta_file_result = get_fasta_file(assembly_id, nomenclature)
+        if fasta_file_result["file_nomenclature"] != nomenclature:
+            # virtual nomenclature: the index of the shared file with renamed sequences
+            fai_file_result = get_renamed_fai(assembly_id, nomenclature)
+            response = Response(fai_file_result["content"], mimetype='text/plain')
+            response.headers['Content-Disposition'] = f'attachment; filename="{fai_file_result["friendly_file_name"]}"'
+        else:
+            fai_file_result = get_fai_file(assembly_id, nomenclature)
+            
+            response = send_from_directory(
+                fai_file_result["file_path"],
+                fai_file_result["file_name"],
+                as_attachment=True,
+                download_name=fai_file_result["friendly_file_name"],
+                mimetype='text/plain',
+                conditional=True
+            )
+        
+        # Add CORS headers for JBrowse
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Expose-Headers'] = 'Content-Range, Content-Length, Accept-Ranges'
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        
+        return response
+        
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get fai file: {str(e)}"}), 500
+
+@public_bp.route('/refname_aliases/<int:assembly_id>/<string:nomenclature>', methods=['GET'])
+def get_refname_aliases_file(assembly_id, nomenclature):
+    """
+    Get the sequence name aliases of an assembly for JBrowse's RefNameAliasAdapter,
+    so tracks named in any nomenclature display against the selected one
+    """
+    try:
+        response = Response(get_refname_aliases(assembly_id, nomenclature), mimetype='text/plain')
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+        
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get refNameAliases: {str(e)}"}), 500
+
+@public_bp.route('/gzi/<int:assembly_id>/<string:nomenclature>', methods=['GET'])
+def get_gzi(assembly_id, nomenclature):
+    """
+    Get the gzi index of a BGZF compressed fasta file, used by JBrowse's BgzipFastaAdapter
+    """
+    try:
+        gzi_file_result = get_gzi_file(assembly_id, nomenclature)
         
         response = send_from_directory(
-            fai_file_result["file_path"],
-            fai_file_result["file_name"],
+            gzi_file_result["file_path"],
+            gzi_file_result["file_name"],
             as_attachment=True,
-            download_name=fai_file_result["friendly_file_name"],
-            mimetype='text/plain',
+            download_name=gzi_file_result["friendly_file_name"],
+            mimetype='application/octet-stream',
             conditional=True
         )
         
@@ -193,7 +258,46 @@ def get_fai(assembly_id, nomenclature):
         return response
         
     except Exception as e:
-        return jsonify({"success": False, "message": f"Failed to get fai file: {str(e)}"}), 500
+        return jsonify({"success": False, "message": f"Failed to get gzi file: {str(e)}"}), 404
+
+def send_source_file(sva_id, nomenclature, file_type, as_attachment=False, **send_options):
+    """
+    Send a source file with send_from_directory, as a download named after the annotation with as_attachment.
+
+    Files of nomenclatures other than the uploaded one are built by the job worker (see SourceFileCache):
+    while they are missing a build is queued and 202 is returned. Built files are held with a shared
+    lock until the response is closed, so they are not evicted while being sent.
+    """
+    source_file = get_source_file_by_extension(sva_id, nomenclature, file_type)
+    if as_attachment:
+        send_options.update(as_attachment=True, download_name=source_file["friendly_file_name"])
+    if source_file["built_from"] is None:
+        return send_from_directory(source_file["file_path"], source_file["file_name"], **send_options)
+
+    source_file_cache = SourceFileCache()
+    lock = source_file_cache.acquire(sva_id, nomenclature)
+    if lock is None:
+        result = queue_source_file_build(sva_id, nomenclature)
+        if not result["success"]:
+            db.session.rollback()
+            raise Exception(result["message"])
+        db.session.commit()
+        response = jsonify({
+            "success": True,
+            "job_id": result["job_id"],
+            "message": f"The {nomenclature} files of this annotation are being built, try again shortly"
+        })
+        response.status_code = 202
+        response.headers['Retry-After'] = '30'
+        return response
+
+    try:
+        response = send_from_directory(source_file["file_path"], source_file["file_name"], **send_options)
+    except Exception:
+        source_file_cache.release(lock)
+        raise
+    response.call_on_close(lambda: source_file_cache.release(lock))
+    return response
 
 @public_bp.route('/gff3bgz_jbrowse2/<int:sva_id>/<string:nomenclature>', methods=['GET'])
 def get_gff3bgz_jbrowse2(sva_id, nomenclature):
@@ -202,15 +306,14 @@ def get_gff3bgz_jbrowse2(sva_id, nomenclature):
     Uses send_from_directory to properly handle Range requests for bgzip random access.
     """
     try:
-        gff3bgz_file = get_source_file_by_extension(sva_id, nomenclature, "sorted_gff_bgz")
-        
-        # Use send_from_directory which properly handles:
+        # send_from_directory properly handles:
         # - HTTP Range requests (required for bgzip/tabix random access)
         # - ETags and conditional requests
         # - Proper streaming for large files
-        response = send_from_directory(
-            gff3bgz_file["file_path"],
-            gff3bgz_file["file_name"],
+        response = send_source_file(
+            sva_id,
+            nomenclature,
+            "sorted_gff_bgz",
             mimetype='application/octet-stream',
             conditional=True  # Enable conditional responses (ETags, Range requests)
         )
@@ -233,11 +336,10 @@ def get_gff3bgztbi(sva_id, nomenclature):
     Get the gff3bgztbi (tabix index) file for a specific organism, assembly, source, version, and nomenclature.
     """
     try:
-        gff3bgztbi_file = get_source_file_by_extension(sva_id, nomenclature, "sorted_gff_bgz_tbi")
-        
-        response = send_from_directory(
-            gff3bgztbi_file["file_path"],
-            gff3bgztbi_file["file_name"],
+        response = send_source_file(
+            sva_id,
+            nomenclature,
+            "sorted_gff_bgz_tbi",
             mimetype='application/octet-stream',
             conditional=True
         )
@@ -257,19 +359,44 @@ def get_source_file(sva_id, nomenclature, file_type):
     Get a file for a specific organism, assembly, source, version, and nomenclature
     """
     try:
-        source_file = get_source_file_by_extension(sva_id, nomenclature, file_type)
-
-        return send_from_directory(
-            source_file["file_path"],
-            source_file["file_name"],
-            as_attachment=True,
-            download_name=source_file["friendly_file_name"],  # Custom filename from source_file
+        return send_source_file(
+            sva_id,
+            nomenclature,
+            file_type,
+            as_attachment=True,  # Custom filename from source_file
             max_age=3600  # Cache control
         )
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Failed to get source file: {str(e)}"}), 500
 
+@public_bp.route('/export/<int:assembly_id>/<string:nomenclature>', methods=['GET'])
+def export_annotation(assembly_id, nomenclature):
+    """
+    Stream the transcripts stored for an assembly as GTF or GFF3.
+    Optional query parameters: sva_id (restrict to one source version) and format (gtf or gff).
+    """
+    try:
+        sva_id = request.args.get('sva_id', type=int)
+        file_format = request.args.get('format', 'gtf').lower()
+        if file_format not in ('gtf', 'gff'):
+            return jsonify({"success": False, "message": f"Unsupported format: {file_format}"}), 400
+        # source versions still being loaded are hidden like in the other public routes
+        if sva_id is not None and not is_sva_public(sva_id, assembly_id):
+            return jsonify({"success": False, "message": f"Source version assembly {sva_id} not found for assembly {assembly_id}"}), 404
+
+        download_name = f"{assembly_id}_{nomenclature}" + (f"_{sva_id}" if sva_id is not None else "") + f".{file_format}"
+        response = Response(
+            stream_with_context(stream_annotation(assembly_id, nomenclature, sva_id=sva_id, file_format=file_format)),
+            mimetype='text/plain'
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to export annotation: {str(e)}"}), 500
+
 @public_bp.route('/pdb/<int:td_id>', methods=['GET'])
 def pdb_file_for_3dmoljs(td_id):
     """
@@ -329,8 +456,13 @@ def search_genes():
         per_page = min(request.args.get('per_page', 25, type=int), 100)
         sort_by = request.args.get('sort', 'name')
         sort_order = request.args.get('order', 'asc')
+        # values of a numeric dataset to sort or filter by
+        dataset_id = request.args.get('dataset_id', type=int)
+        min_value = request.args.get('min_value', type=float)
+        max_value = request.args.get('max_value', type=float)
         
-        result = search_genes_paginated(sva_id, search_term, gene_type, page, per_page, sort_by, sort_order)
+        result = search_genes_paginated(sva_id, search_term, gene_type, page, per_page, sort_by, sort_order,
+                                        dataset_id=dataset_id, min_value=min_value, max_value=max_value)
         return jsonify(result), 200 if result["success"] else 500
         
     except Exception as e:
@@ -460,4 +592,94 @@ def get_data_types():
             return jsonify(result), 400
         
     except Exception as e:
-        return jsonify({"success": False, "message": f"Failed to get data types: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"success": False, "message": f"Failed to get data types: {str(e)}"}), 500
+
+@public_bp.route('/datasets/<int:dataset_id>/top', methods=['GET'])
+def get_dataset_top(dataset_id):
+    """
+    Get the transcripts with the highest values of a numeric dataset.
+    Optional query parameters: limit (default 10, at most 1000) and order (desc or asc).
+    """
+    try:
+        limit = min(request.args.get('limit', 10, type=int), 1000)
+        order = request.args.get('order', 'desc')
+        if limit < 1:
+            return jsonify({"success": False, "message": "limit must be a positive integer"}), 400
+        if not is_dataset_public(dataset_id):
+            return jsonify({"success": False, "message": "Dataset not found"}), 404
+
+        result = get_dataset_top_transcripts(dataset_id, limit, order)
+        return jsonify(result), 200 if result["success"] else 500
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get top transcripts: {str(e)}"}), 500
+
+@public_bp.route('/datasets/<int:dataset_id>/values', methods=['GET'])
+def get_dataset_values(dataset_id):
+    """
+    Get the transcripts of a numeric dataset with values between min_value and max_value, ordered by value.
+    """
+    try:
+        min_value = request.args.get('min_value', type=float)
+        max_value = request.args.get('max_value', type=float)
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 100, type=int), 1000)
+        if page < 1 or per_page < 1:
+            return jsonify({"success": False, "message": "page and per_page must be positive integers"}), 400
+        if not is_dataset_public(dataset_id):
+            return jsonify({"success": False, "message": "Dataset not found"}), 404
+
+        result = get_dataset_values_in_range(dataset_id, min_value, max_value, page, per_page)
+        return jsonify(result), 200 if result["success"] else 500
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get dataset values: {str(e)}"}), 500
+
+@public_bp.route('/datasets/<int:dataset_id>/quantiles', methods=['GET'])
+def get_dataset_value_quantiles(dataset_id):
+    """
+    Get quantiles of the values of a numeric dataset.
+    Optional query parameter q: comma separated quantiles between 0 and 1 (default 0,0.25,0.5,0.75,1).
+    """
+    try:
+        if not is_dataset_public(dataset_id):
+            return jsonify({"success": False, "message": "Dataset not found"}), 404
+
+        quantiles = request.args.get('q')
+        if quantiles:
+            try:
+                quantiles = [float(quantile) for quantile in quantiles.split(',')]
+            except ValueError:
+                return jsonify({"success": False, "message": "q must be a comma separated list of numbers"}), 400
+            result = get_dataset_quantiles(dataset_id, quantiles)
+        else:
+            result = get_dataset_quantiles(dataset_id)
+        return jsonify(result), 200 if result["success"] else 400
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get dataset quantiles: {str(e)}"}), 500
+
+@public_bp.route('/stats/fasta-readers', methods=['GET'])
+def get_fasta_reader_stats():
+    """
+    Hit and miss counters of the genome FASTA readers of the worker serving the request.
+    Every worker has its own pool: pid identifies the worker and repeated requests sample the others.
+    The paths of the open files are not included.
+    """
+    try:
+        return jsonify({"success": True, "data": get_fasta_handle_pool().get_stats(include_open=False)})
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get FASTA reader statistics: {str(e)}"}), 500
+
+@public_bp.route('/stats/sequence-cache', methods=['GET'])
+def get_sequence_cache_stats():
+    """
+    Size and hit rate of the transcript sequence cache of the worker serving the request.
+    Every worker has its own cache: pid identifies the worker and repeated requests sample the others.
+    """
+    try:
+        return jsonify({"success": True, "data": get_sequence_cache().get_stats()})
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get sequence cache statistics: {str(e)}"}), 500
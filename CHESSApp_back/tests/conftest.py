@@ -0,0 +1,8 @@
+import os
+import sys
+
+# config refuses to load without database settings; the tests below never connect
+for name, value in [("CHESSDB_HOST", "localhost"), ("CHESSDB_NAME", "chess_test"), ("CHESSDB_USER", "chess"), ("CHESSDB_PASS", "chess")]:
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
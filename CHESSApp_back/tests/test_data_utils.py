@@ -0,0 +1,16 @@
+from db.methods.data.utils import build_exon_chain, cut
+
+def test_build_exon_chain_single_exon():
+    assert build_exon_chain(100, 500, []) == [[100, 500]]
+
+def test_build_exon_chain_introns():
+    assert build_exon_chain(100, 900, [(200, 300), (400, 600)]) == [[100, 200], [300, 400], [600, 900]]
+
+def test_build_exon_chain_accepts_lists():
+    # introns read from the database come back as rows or lists rather than tuples
+    assert build_exon_chain(1, 50, [[10, 20]]) == [[1, 10], [20, 50]]
+
+def test_build_exon_chain_cut_to_cds():
+    # the gene loader derives the CDS segments from the exon chain
+    exons = build_exon_chain(100, 900, [(200, 300), (400, 600)])
+    assert cut(exons, 150, 700) == [(150, 200), (300, 400), (600, 700)]
@@ -0,0 +1,101 @@
+import os
+
+import pysam
+import pytest
+
+from db.methods.FastaHandlePool import FastaHandlePool, FastaReader, ReaderClosed
+
+SEQUENCES = {"chr1": "ACGTACGTAA" * 3, "chr2": "GGGGCCCCTT"}
+
+def write_fasta(path, sequences=SEQUENCES, compressed=False):
+    content = "".join(f">{name}\n{sequence}\n" for name, sequence in sequences.items()).encode()
+    if compressed:
+        with pysam.BGZFile(str(path), "wb") as outFP:
+            outFP.write(content)
+    else:
+        path.write_bytes(content)
+    pysam.faidx(str(path))
+    return str(path)
+
+@pytest.fixture
+def genomes(tmp_path):
+    return [write_fasta(tmp_path / f"genome{i}.fasta") for i in range(3)]
+
+@pytest.mark.parametrize("backend", ["pyfaidx", "pysam"])
+def test_reader_fetch_is_one_based_inclusive(tmp_path, backend):
+    reader = FastaReader(write_fasta(tmp_path / "genome.fasta"), backend)
+    assert reader.fetch("chr1", 1, 4) == "ACGT"
+    assert reader.fetch("chr2", 5, 10) == "CCCCTT"
+    reader.close()
+
+def test_reader_bgzf(tmp_path):
+    reader = FastaReader(write_fasta(tmp_path / "genome.fasta.gz", compressed=True), "pyfaidx")
+    assert reader.backend == "pysam"
+    assert reader.fetch("chr1", 9, 12) == "AAAC"
+    reader.close()
+
+def test_closed_reader_is_not_reopened(genomes):
+    reader = FastaReader(genomes[0])
+    reader.close()
+    with pytest.raises(ReaderClosed):
+        reader.fetch("chr1", 1, 4)
+    assert reader.handle is None
+
+def test_pool_reuses_readers(genomes):
+    pool = FastaHandlePool(max_handles=2, backend="pyfaidx")
+    reader = pool.get(1, "UCSC", genomes[0])
+    assert pool.get(1, "UCSC", genomes[0]) is reader
+    stats = pool.get_stats()
+    assert (stats["hits"], stats["misses"], stats["open_handles"]) == (1, 1, 1)
+
+def test_pool_closes_least_recently_used(genomes):
+    pool = FastaHandlePool(max_handles=2, backend="pyfaidx")
+    first = pool.get(1, "UCSC", genomes[0])
+    second = pool.get(2, "UCSC", genomes[1])
+    pool.get(1, "UCSC", genomes[0])
+    pool.get(3, "UCSC", genomes[2])
+    assert second.handle is None
+    assert first.handle is not None
+    assert pool.get_stats()["evictions"] == 1
+    assert [item["assembly_id"] for item in pool.get_stats()["open"]] == [1, 3]
+    assert "open" not in pool.get_stats(include_open=False)
+
+def test_pool_fetch_replaces_reader_closed_meanwhile(genomes):
+    pool = FastaHandlePool(max_handles=1, backend="pyfaidx")
+    held = pool.get(1, "UCSC", genomes[0])
+    pool.invalidate(1)
+    assert held.handle is None
+    assert pool.fetch(1, "UCSC", genomes[0], "chr1", [(1, 4), (9, 10)]) == ["ACGT", "AA"]
+    # the closed reader stays closed and the new one is owned by the pool
+    assert held.handle is None
+    assert pool.get_stats()["open_handles"] == 1
+
+def test_pool_reopens_changed_file(tmp_path):
+    pool = FastaHandlePool(max_handles=2, backend="pyfaidx")
+    path = tmp_path / "genome.fasta"
+    write_fasta(path)
+    old_reader = pool.get(1, "UCSC", str(path))
+    # replaced on disk, e.g. by another process
+    replacement = write_fasta(tmp_path / "replacement.fasta", {"chr1": "TTTT"})
+    os.replace(replacement, path)
+    os.replace(replacement + ".fai", str(path) + ".fai")
+    assert pool.fetch(1, "UCSC", str(path), "chr1", [(1, 4)]) == ["TTTT"]
+    assert old_reader.handle is None
+    assert pool.get_stats()["invalidations"] == 1
+
+def test_pool_reopens_other_file_for_key(genomes):
+    pool = FastaHandlePool(max_handles=2, backend="pyfaidx")
+    first = pool.get(1, "UCSC", genomes[0])
+    second = pool.get(1, "UCSC", genomes[1])
+    assert second is not first
+    assert first.handle is None
+
+def test_invalidate_assembly_and_nomenclature(genomes):
+    pool = FastaHandlePool(max_handles=3, backend="pyfaidx")
+    pool.get(1, "UCSC", genomes[0])
+    pool.get(1, "RefSeq", genomes[1])
+    pool.get(2, "UCSC", genomes[2])
+    assert pool.invalidate(1, "RefSeq") == 1
+    assert pool.invalidate(1) == 1
+    assert pool.invalidate() == 1
+    assert pool.get_stats()["open_handles"] == 0
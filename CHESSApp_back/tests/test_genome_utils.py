@@ -0,0 +1,34 @@
+import pytest
+
+from db.methods.genomes.utils import rename_fai, iter_nomenclature_mapping
+
+def test_rename_fai(tmp_path):
+    fai_path = tmp_path / "genome.fasta.fai"
+    fai_path.write_text("chr1\t6\t19\t4\t5\nchr2\t4\t37\t4\t5\nchrM\t2\t48\t2\t3\n")
+    assert rename_fai(str(fai_path), {"chr1": "1", "chr2": "2"}) == "1\t6\t19\t4\t5\n2\t4\t37\t4\t5\n"
+
+def test_rename_fai_keeps_index_order(tmp_path):
+    fai_path = tmp_path / "genome.fasta.fai"
+    fai_path.write_text("chr2\t4\t6\t4\t5\nchr1\t6\t17\t4\t5\n")
+    assert rename_fai(str(fai_path), {"chr1": "1", "chr2": "2"}).splitlines()[0].startswith("2\t")
+
+def test_iter_nomenclature_mapping(tmp_path):
+    mapping_path = tmp_path / "mapping.tsv"
+    mapping_path.write_text("chr1\t1\n chr2 \t 2 \nchrM\tMT\n")
+    assert [(source_id, new_id) for _, source_id, new_id in iter_nomenclature_mapping(str(mapping_path))] == [
+        ("chr1", "1"), ("chr2", "2"), ("chrM", "MT")
+    ]
+
+def test_iter_nomenclature_mapping_is_lazy(tmp_path):
+    mapping_path = tmp_path / "mapping.tsv"
+    mapping_path.write_text("chr1\t1\nchr2\n")
+    rows = iter_nomenclature_mapping(str(mapping_path))
+    assert next(rows)[1:] == ("chr1", "1")
+    with pytest.raises(Exception, match="Expected 2 columns"):
+        next(rows)
+
+def test_iter_nomenclature_mapping_missing_value(tmp_path):
+    mapping_path = tmp_path / "mapping.tsv"
+    mapping_path.write_text("chr1\t1\nchr2\t \n")
+    with pytest.raises(Exception, match="got 1"):
+        list(iter_nomenclature_mapping(str(mapping_path)))
@@ -0,0 +1,108 @@
+import os
+import sys
+import random
+
+import pytest
+
+from db.methods.SequenceCache import SequenceCache
+
+# db.methods re-exports the class under the module's name
+sequence_cache_module = sys.modules["db.methods.SequenceCache"]
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "sequence_cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(sequence_cache_module, "get_sequence_cache_dir", lambda: str(cache_dir))
+    return cache_dir
+
+def sequences(seed, length=200):
+    rng = random.Random(seed)
+    nt = "".join(rng.choice("ACGT") for _ in range(length))
+    return {"nt": nt, "cds": nt[:99], "aa": "M" * 33}
+
+def blob_size(value, version="1"):
+    return len(SequenceCache._pack(version, value))
+
+def key(tid, sva_id=1):
+    return (tid, f"TX{tid}", sva_id, "UCSC")
+
+def age(cache, key, seconds):
+    disk_path = cache._disk_path(key)
+    os.utime(disk_path, (seconds, seconds))
+
+def test_get_missing():
+    cache = SequenceCache(max_bytes=1000, use_disk=False)
+    assert cache.get(key(1), "1") is None
+    assert cache.get_stats()["misses"] == 1
+
+def test_put_get():
+    cache = SequenceCache(max_bytes=1000, use_disk=False)
+    cache.put(key(1), "1", sequences(1))
+    assert cache.get(key(1), "1") == sequences(1)
+    assert cache.get_stats()["hits"] == 1
+
+def test_other_version_is_a_miss():
+    cache = SequenceCache(max_bytes=1000, use_disk=False)
+    cache.put(key(1), "1", sequences(1))
+    assert cache.get(key(1), "2") is None
+    # the stale value is dropped
+    assert cache.get_stats()["entries"] == 0
+
+def test_evicts_least_recently_used():
+    size = max(blob_size(sequences(seed)) for seed in range(3))
+    cache = SequenceCache(max_bytes=2 * size + 1, use_disk=False)
+    cache.put(key(1), "1", sequences(1))
+    cache.put(key(2), "1", sequences(2))
+    cache.get(key(1), "1")
+    cache.put(key(0), "1", sequences(0))
+    assert cache.get(key(2), "1") is None
+    assert cache.get(key(1), "1") == sequences(1)
+    assert cache.get(key(0), "1") == sequences(0)
+    assert cache.get_stats()["evictions"] == 1
+
+def test_value_larger_than_cache_is_not_kept():
+    cache = SequenceCache(max_bytes=10, use_disk=False)
+    cache.put(key(1), "1", sequences(1))
+    assert cache.get(key(1), "1") is None
+
+def test_disk_shared_between_caches(cache_dir):
+    SequenceCache(max_bytes=1000, use_disk=True, disk_max_bytes=10**6).put(key(1), "1", sequences(1))
+    other = SequenceCache(max_bytes=1000, use_disk=True, disk_max_bytes=10**6)
+    assert other.get(key(1), "1") == sequences(1)
+    assert other.get(key(1), "2") is None
+    assert other.get_stats()["disk_hits"] == 1
+
+def test_disk_evicts_least_recently_used(cache_dir):
+    size = max(blob_size(sequences(seed)) for seed in range(3))
+    cache = SequenceCache(max_bytes=1000, use_disk=True, disk_max_bytes=10**6)
+    for tid in range(3):
+        cache.put(key(tid), "1", sequences(tid))
+    age(cache, key(0), 1000)
+    age(cache, key(1), 3000)
+    age(cache, key(2), 2000)
+    cache.disk_max_bytes = 2 * size + 1
+    assert cache.evict_disk() == 1
+    assert not os.path.exists(cache._disk_path(key(0)))
+    assert os.path.exists(cache._disk_path(key(1)))
+    assert os.path.exists(cache._disk_path(key(2)))
+
+def test_disk_eviction_after_writes(cache_dir):
+    size = blob_size(sequences(0))
+    # checked after writing a twentieth of the limit, i.e. after every value here
+    cache = SequenceCache(max_bytes=1000, use_disk=True, disk_max_bytes=size)
+    cache.put(key(0), "1", sequences(0))
+    age(cache, key(0), 1000)
+    cache.put(key(1), "1", sequences(1))
+    assert not os.path.exists(cache._disk_path(key(0)))
+    assert os.path.exists(cache._disk_path(key(1)))
+    assert cache.get_stats()["disk_evictions"] == 1
+
+def test_invalidate_sva(cache_dir):
+    cache = SequenceCache(max_bytes=10000, use_disk=True, disk_max_bytes=10**6)
+    cache.put(key(1, sva_id=1), "1", sequences(1))
+    cache.put(key(2, sva_id=2), "1", sequences(2))
+    assert cache.invalidate_sva(1) == 1
+    assert not os.path.exists(cache_dir / "1")
+    assert cache.get(key(1, sva_id=1), "1") is None
+    assert cache.get(key(2, sva_id=2), "1") == sequences(2)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+from db.methods.TempFileManager import TempFileManager
+
+# db.methods re-exports the class under the module's name
+temp_file_manager_module = sys.modules["db.methods.TempFileManager"]
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    temp_dir = tmp_path / "temp_files"
+    temp_dir.mkdir()
+    monkeypatch.setattr(temp_file_manager_module, "get_temp_files_dir", lambda: str(temp_dir))
+    return temp_dir
+
+def test_resolve_temp_file(temp_dir):
+    path = os.path.join(str(temp_dir), "temp_abc")
+    assert TempFileManager().resolve_temp_file(path) == os.path.realpath(path)
+
+def test_resolve_rejects_other_files(temp_dir, tmp_path):
+    manager = TempFileManager()
+    assert manager.resolve_temp_file(str(tmp_path / "other")) is None
+    assert manager.resolve_temp_file(os.path.join(str(temp_dir), "..", "other")) is None
+    assert manager.resolve_temp_file(os.path.join(str(temp_dir), "sub", "temp_abc")) is None
+    assert manager.resolve_temp_file("") is None
+
+def test_resolve_rejects_links_out_of_temp_dir(temp_dir, tmp_path):
+    link = temp_dir / "temp_link"
+    os.symlink(str(tmp_path / "other"), str(link))
+    assert TempFileManager().resolve_temp_file(str(link)) is None
@@ -0,0 +1,74 @@
+import os
+import sys
+import hashlib
+
+import pytest
+
+from db.methods.UploadCache import UploadCache, save_upload, upload_key
+from db.methods.jobs.utils import StoredUpload
+
+# db.methods re-exports the class under the module's name
+upload_cache_module = sys.modules["db.methods.UploadCache"]
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "upload_cache"
+    monkeypatch.setattr(upload_cache_module, "get_upload_cache_dir", lambda: str(cache_dir))
+    return cache_dir
+
+def source_file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+def age(cache, key, seconds):
+    # entries are ordered by the mtime of their directory
+    entry_dir = cache._entry_dir(key)
+    os.utime(entry_dir, (seconds, seconds))
+
+def test_get_missing(cache_dir):
+    assert UploadCache("gtf", max_bytes=100).get("key", "file.gtf") is None
+
+def test_put_get(cache_dir, tmp_path):
+    cache = UploadCache("gtf", max_bytes=100)
+    path = cache.put("a", "file.gtf", source_file(tmp_path, "a.gtf", 10))
+    assert cache.get("a", "file.gtf") == path
+    with open(path, "rb") as inFP:
+        assert inFP.read() == b"x" * 10
+
+def test_cached_file_outlives_source(cache_dir, tmp_path):
+    cache = UploadCache("gtf", max_bytes=100)
+    source_path = source_file(tmp_path, "a.gtf", 10)
+    cache.put("a", "file.gtf", source_path)
+    os.remove(source_path)
+    assert os.path.getsize(cache.get("a", "file.gtf")) == 10
+
+def test_evicts_least_recently_used(cache_dir, tmp_path):
+    cache = UploadCache("gtf", max_bytes=25)
+    cache.put("a", "file.gtf", source_file(tmp_path, "a.gtf", 10))
+    cache.put("b", "file.gtf", source_file(tmp_path, "b.gtf", 10))
+    age(cache, "a", 1000)
+    age(cache, "b", 2000)
+    # a hit makes a the most recently used entry
+    assert cache.get("a", "file.gtf") is not None
+    cache.put("c", "file.gtf", source_file(tmp_path, "c.gtf", 10))
+    assert cache.get("b", "file.gtf") is None
+    assert cache.get("a", "file.gtf") is not None
+    assert cache.get("c", "file.gtf") is not None
+
+def test_keeps_entry_being_added(cache_dir, tmp_path):
+    cache = UploadCache("gtf", max_bytes=5)
+    cache.put("a", "file.gtf", source_file(tmp_path, "a.gtf", 10))
+    assert cache.get("a", "file.gtf") is not None
+
+def test_kinds_are_separate(cache_dir, tmp_path):
+    UploadCache("gtf", max_bytes=100).put("a", "file.gtf", source_file(tmp_path, "a.gtf", 10))
+    assert UploadCache("fasta", max_bytes=100).get("a", "file.gtf") is None
+
+def test_save_upload_hashes_stored_upload(tmp_path):
+    upload_path = source_file(tmp_path, "upload", 10)
+    destination = str(tmp_path / "saved.gtf")
+    upload = save_upload(StoredUpload(upload_path, filename="a.gtf"), destination)
+    assert upload == {"sha256": hashlib.sha256(b"x" * 10).hexdigest(), "size": 10}
+    assert not os.path.exists(upload_path)
+    assert upload_key(upload) == f"{upload['sha256']}_10"
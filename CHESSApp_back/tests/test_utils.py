@@ -0,0 +1,57 @@
+import gzip
+
+import pysam
+
+from db.methods.utils import detect_compression, parse_attributes, analyze_gtf
+from db.methods.TX import TX
+
+def write(path, data):
+    with open(path, "wb") as outFP:
+        outFP.write(data)
+    return str(path)
+
+def test_detect_compression_plain(tmp_path):
+    assert detect_compression(write(tmp_path / "a.gtf", b"chr1\tsrc\texon\t1\t10\t.\t+\t.\t\n")) is None
+
+def test_detect_compression_empty_and_short(tmp_path):
+    assert detect_compression(write(tmp_path / "empty.gtf", b"")) is None
+    assert detect_compression(write(tmp_path / "short.gtf", b"\x1f")) is None
+
+def test_detect_compression_gzip(tmp_path):
+    path = tmp_path / "a.gtf.gz"
+    with gzip.open(path, "wb") as outFP:
+        outFP.write(b"chr1\tsrc\texon\t1\t10\t.\t+\t.\t\n")
+    assert detect_compression(str(path)) == "gzip"
+
+def test_detect_compression_bgzf(tmp_path):
+    path = tmp_path / "a.gtf.bgz"
+    with pysam.BGZFile(str(path), "wb") as outFP:
+        outFP.write(b"chr1\tsrc\texon\t1\t10\t.\t+\t.\t\n")
+    assert detect_compression(str(path)) == "bgzf"
+
+def test_detect_compression_ignores_extension(tmp_path):
+    assert detect_compression(write(tmp_path / "plain.gz", b"not compressed\n")) is None
+
+def test_parse_attributes_quoted_separators():
+    attributes = parse_attributes('transcript_id "T1"; note "a;b c"; gene_id "G1"; level 2;')
+    assert attributes == {"transcript_id": "T1", "note": "a;b c", "gene_id": "G1", "level": "2"}
+
+def test_parse_attributes_gff():
+    assert parse_attributes("ID=T1;Parent=G1;note=a b", gff=True) == {"ID": "T1", "Parent": "G1", "note": "a b"}
+
+QUOTED_GTF = (
+    'chr1\tsrc\ttranscript\t1\t100\t.\t+\t.\ttranscript_id "T1"; gene_id "G1"; note "a;b";\n'
+    'chr1\tsrc\texon\t1\t100\t.\t+\t.\ttranscript_id "T1"; gene_id "G1";\n'
+)
+
+def test_analyze_gtf_quoted_separators(tmp_path):
+    analysis = analyze_gtf(write(tmp_path / "a.gtf", QUOTED_GTF.encode()), 100)
+    assert analysis["is_gff"] is False
+    assert analysis["attributes"]["note"]["values"] == {"a;b"}
+    assert analysis["counts"]["transcripts"] == 1
+
+def test_tx_quoted_separators():
+    transcript = TX()
+    transcript.transcript_type_key = transcript.gene_type_key = transcript.gene_name_key = "gene_id"
+    transcript.from_strlist(QUOTED_GTF.splitlines())
+    assert transcript.attributes["note"] == "a;b"
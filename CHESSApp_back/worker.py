@@ -0,0 +1,92 @@
+import os
+import time
+import socket
+import argparse
+import multiprocessing
+from flask import Flask
+from db.db import db, initialize_paths, is_paths_configured
+from db.methods.jobs import JOB_HANDLERS, claim_next_job, finish_job, fail_stale_jobs
+from db.methods.JobProgress import JobProgress, JobCancelled
+from db.methods.TempFileManager import get_temp_file_manager
+from config import Config
+
+def create_app():
+    """Create a minimal Flask app providing database access for job workers"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    return app
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome.
+    Mirrors the route pattern: commit on success, rollback otherwise.
+    """
+    job_id = job["job_id"]
+    progress = JobProgress(job_id)
+    try:
+        result = JOB_HANDLERS[job["job_type"]](job["parameters"], progress)
+        if result["success"]:
+            db.session.commit()
+            finish_job(job_id, "completed", result.get("message", "Completed"), result)
+        else:
+            db.session.rollback()
+            finish_job(job_id, "failed", result.get("message", "Failed"), result)
+    except JobCancelled as e:
+        db.session.rollback()
+        finish_job(job_id, "cancelled", str(e))
+    except Exception as e:
+        db.session.rollback()
+        finish_job(job_id, "failed", f"Job failed: {str(e)}")
+    finally:
+        db.session.commit()
+        get_temp_file_manager().cleanup_all()
+
+def worker_loop(worker_name, poll_interval):
+    """Poll the job table and run jobs one at a time"""
+    app = create_app()
+    with app.app_context():
+        initialize_paths()
+        fail_stale_jobs(worker_name)
+        db.session.commit()
+        print(f"Worker {worker_name} started")
+
+    while True:
+        with app.app_context():
+            if not is_paths_configured():
+                # data directory may be configured after the worker started
+                initialize_paths()
+                if not is_paths_configured():
+                    time.sleep(poll_interval)
+                    continue
+
+            claimed = claim_next_job(worker_name)
+            db.session.commit()
+            job = claimed.get("data") if claimed["success"] else None
+            if job is None:
+                if not claimed["success"]:
+                    print(f"Worker {worker_name}: {claimed['message']}")
+                time.sleep(poll_interval)
+                continue
+
+            print(f"Worker {worker_name} running job {job['job_id']} ({job['job_type']})")
+            run_job(job)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CHESS Web App - Background job worker')
+    parser.add_argument('--processes', '-n', type=int, default=int(os.environ.get('CHESS_WORKER_PROCESSES', 2)),
+                        help='Number of worker processes (default: 2)')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                        help='Seconds between polls of an empty queue (default: 2)')
+    args = parser.parse_args()
+
+    # worker names are stable across restarts so jobs left running by a crashed worker can be failed
+    hostname = os.environ.get('CHESS_WORKER_NAME', socket.gethostname())
+    processes = []
+    for i in range(args.processes):
+        process = multiprocessing.Process(target=worker_loop, args=(f"{hostname}-{i}", args.poll_interval))
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
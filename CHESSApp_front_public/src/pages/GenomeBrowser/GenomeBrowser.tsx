@@ -130,7 +130,10 @@ const GenomeBrowser: React.FC = () => {
         name: assembly?.assembly_name || '',
         assembly_name: assembly?.assembly_name || '',
         assembly_id: assembly?.assembly_id || 0,
-        nomenclature: nomenclature || ''
+        nomenclature: nomenclature || '',
+        compressed: assembly?.genome_files?.some(
+          (genomeFile) => genomeFile.nomenclature === nomenclature && genomeFile.file_path.endsWith('.gz')
+        ) || false
       };
 
       const tracksConfig = generateTracksFromConfig(currentTracks, assembly?.assembly_name || '');
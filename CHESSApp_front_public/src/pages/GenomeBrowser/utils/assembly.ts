@@ -4,21 +4,39 @@ export interface BrowserAssemblyProps {
   assembly_name: string;
   assembly_id: number;
   nomenclature: string;
+  // genome stored BGZF compressed, read through its .gzi index
+  compressed?: boolean;
 }
 export const getAssembly = (assembly: BrowserAssemblyProps) => {
+  const adapter: Record<string, unknown> = {
+    type: assembly.compressed ? 'BgzipFastaAdapter' : 'IndexedFastaAdapter',
+    fastaLocation: {
+      uri: `${API_BASE_URL}/public/fasta/${assembly.assembly_id}/${assembly.nomenclature}`,
+      locationType: 'UriLocation',
+    },
+    faiLocation: {
+      uri: `${API_BASE_URL}/public/fai/${assembly.assembly_id}/${assembly.nomenclature}`,
+      locationType: 'UriLocation',
+    },
+  };
+  if (assembly.compressed) {
+    adapter.gziLocation = {
+      uri: `${API_BASE_URL}/public/gzi/${assembly.assembly_id}/${assembly.nomenclature}`,
+      locationType: 'UriLocation',
+    };
+  }
   return {
     name: `${assembly.name}`,
     sequence: {
       type: 'ReferenceSequenceTrack',
       trackId: `ReferenceSequenceTrack`,
+      adapter,
+    },
+    refNameAliases: {
       adapter: {
-        type: 'IndexedFastaAdapter',
-        fastaLocation: {
-          uri: `${API_BASE_URL}/public/fasta/${assembly.assembly_id}/${assembly.nomenclature}`,
-          locationType: 'UriLocation',
-        },
-        faiLocation: {
-          uri: `${API_BASE_URL}/public/fai/${assembly.assembly_id}/${assembly.nomenclature}`,
+        type: 'RefNameAliasAdapter',
+        location: {
+          uri: `${API_BASE_URL}/public/refname_aliases/${assembly.assembly_id}/${assembly.nomenclature}`,
           locationType: 'UriLocation',
         },
       },